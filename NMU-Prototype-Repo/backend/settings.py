@@ -45,10 +45,20 @@ INSTALLED_APPS = [
     'corsheaders',
     'drf_spectacular',
     'drf_spectacular_sidecar',
+    'django_q',
 ]
 
+# 'wsgi' or 'asgi', the gunicorn deployment profile (see gunicorn.conf.py)
+SERVER_PROFILE = os.environ.get('SERVER_PROFILE', 'wsgi')
+# Request threads of a gthread worker (wsgi profile), read by gunicorn.conf.py too
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # WhiteNoise is synchronous and would push every ASGI request through a thread, under
+    # ASGI the web server serves STATIC_ROOT (with the .gz/.br files collectstatic writes)
+    *(['whitenoise.middleware.WhiteNoiseMiddleware'] if SERVER_PROFILE == 'wsgi' else []),
+    'prototypes.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,12 +96,81 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default. For production set DB_ENGINE=postgresql (or mysql) with DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST and DB_PORT. Connections are kept for DB_CONN_MAX_AGE seconds and checked
+# before reuse. DB_POOL=native uses Django's connection pool (PostgreSQL with psycopg 3 and
+# psycopg-pool), DB_POOL=pgbouncer suits a transaction-mode PgBouncer in front of the database.
+# DB_REPLICA_HOST (and optionally DB_REPLICA_PORT/NAME/USER/PASSWORD) adds a read replica that
+# lists, search and statistics read from, see prototypes/routers.py.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+DB_POOL = os.environ.get('DB_POOL', '')
+
+
+def database_settings(prefix):
+    config = {
+        'ENGINE': f'django.db.backends.{DB_ENGINE}',
+        'NAME': os.environ.get(f'{prefix}_NAME', os.environ.get('DB_NAME', 'nmu_archive')),
+        'USER': os.environ.get(f'{prefix}_USER', os.environ.get('DB_USER', '')),
+        'PASSWORD': os.environ.get(f'{prefix}_PASSWORD', os.environ.get('DB_PASSWORD', '')),
+        'HOST': os.environ.get(f'{prefix}_HOST', ''),
+        'PORT': os.environ.get(f'{prefix}_PORT', os.environ.get('DB_PORT', '')),
+        # Django advises against persistent connections under ASGI, use DB_POOL there instead
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60 if SERVER_PROFILE == 'wsgi' else 0)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
-}
+    if DB_POOL == 'native':
+        # The pool replaces persistent connections, Django refuses both at once
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    elif DB_POOL == 'pgbouncer':
+        # Server-side cursors (queryset.iterator()) do not survive transaction pooling
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    DATABASES = {'default': database_settings('DB')}
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {**database_settings('DB_REPLICA'), 'TEST': {'MIRROR': 'default'}}
+        DATABASE_ROUTERS = ['prototypes.routers.ReplicaRouter']
+
+
+# Cache
+# Local memory by default (and in tests), set REDIS_URL to share the cache between workers in production
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Whether every process (gunicorn workers, qcluster) sees the same default cache. Conditional GET
+# validators that rely on the version tokens kept there (prototypes/services/versions.py) are only
+# sent when it does, a per-process cache never sees the bumps made by the other processes.
+SHARED_CACHE = bool(os.environ.get('REDIS_URL'))
+
+# Seconds dashboard statistics stay cached, they are also dropped whenever a prototype changes
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))
 
 
 # Password validation
@@ -113,6 +192,24 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTH_USER_MODEL = 'prototypes.CustomUser'
+
+# Passwords are checked on a bounded thread pool per process (prototypes/services/password_hashing.py):
+# LOGIN_HASH_WORKERS checks run at once with LOGIN_HASH_QUEUE more waiting, further logins get a 429.
+# A login holds its request thread until its check is done, so by default the two together stay
+# below GUNICORN_THREADS: a burst of logins always leaves a request thread for other requests.
+AUTHENTICATION_BACKENDS = ['prototypes.backends.PooledPasswordBackend']
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', max(1, min(os.cpu_count() or 1, GUNICORN_THREADS - 1))))
+LOGIN_HASH_QUEUE = int(os.environ.get('LOGIN_HASH_QUEUE', max(0, GUNICORN_THREADS - 1 - LOGIN_HASH_WORKERS)))
+
+# PBKDF2 rounds for new hashes (Django's default when unset), stored hashes are upgraded at login
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 0)) or None
+PASSWORD_HASHERS = [
+    'prototypes.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -129,9 +226,20 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+# Served by WhiteNoise; collectstatic writes .gz and .br copies next to every file
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -140,7 +248,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'prototypes.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -148,23 +256,60 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
-    
+
+    # orjson backed JSON (see prototypes/renderers.py), the stdlib is used when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': (
+        'prototypes.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'prototypes.parsers.FastJSONParser',
     ),
 
+    # Default page size for the cursor paginated list endpoints (see prototypes/pagination.py),
+    # clients can ask for up to 100 rows with ?page_size=
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 25)),
+
      "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 
+    # Login attempts allowed per client address and per account (prototypes/throttles.py), counted
+    # in the cache, so set REDIS_URL for the limits to hold across workers. The address limit is
+    # generous because a campus shares a few NAT addresses.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_RATE_PER_IP', '300/min'),
+        'login_email': os.environ.get('LOGIN_RATE_PER_EMAIL', '10/min'),
+    },
+    # Proxies in front of the app whose X-Forwarded-For is trusted, 0 uses the peer address
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+
 }
 
+# PAGE_SIZE is global but pagination classes are set per view (see prototypes/pagination.py)
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Tokens carry role, department_id and is_approved (prototypes/authentication.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'prototypes.serializers.ClaimsTokenObtainPairSerializer',
+    # Rotated refresh tokens are revoked in TOKEN_BLACKLIST_BACKEND (prototypes/services/token_blacklist.py)
+    'TOKEN_REFRESH_SERIALIZER': 'prototypes.serializers.ClaimsTokenRefreshSerializer',
 }
 
+# Where revoked refresh tokens are kept: 'cache' (expiring keys, needs the shared REDIS_URL cache)
+# or 'database' (RevokedToken table, purged hourly)
+TOKEN_BLACKLIST_BACKEND = os.environ.get(
+    'TOKEN_BLACKLIST_BACKEND', 'cache' if os.environ.get('REDIS_URL') else 'database'
+)
+
+# Per-process cache of authenticated users: seconds an entry is trusted without checking the
+# database, and the number of users kept. User and department saves invalidate it right away.
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10_000))
+
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "NMU Project Archive System API",
@@ -175,4 +320,53 @@ SPECTACULAR_SETTINGS = {
     "SWAGGER_UI_FAVICON_HREF": "SIDECAR",
     "REDOC_DIST": "SIDECAR",
     # OTHER SETTINGS
-}
\ No newline at end of file
+}
+
+
+# Background task queue (django-q) for PDF exports and reports.
+# Uses the database as broker so no extra service is needed; run workers with `python manage.py qcluster`
+Q_CLUSTER = {
+    'name': 'nmu_archive',
+    'orm': 'default',
+    'workers': int(os.environ.get('Q_CLUSTER_WORKERS', 2)),
+    'timeout': 600,
+    'retry': 900,
+    'save_limit': 250,
+    'sync': os.environ.get('Q_CLUSTER_SYNC', 'False') == 'True',
+}
+
+# How long finished export files are kept under MEDIA_ROOT/temp_reports before `purge_exports` removes them
+EXPORT_RETENTION = timedelta(hours=int(os.environ.get('EXPORT_RETENTION_HOURS', 24)))
+
+# Processes used to hash initial passwords during bulk user import (1 = hash in the request process)
+USER_IMPORT_HASH_WORKERS = int(os.environ.get('USER_IMPORT_HASH_WORKERS', os.cpu_count() or 1))
+
+# Attachment downloads can be handed to the web server instead of streamed by Django:
+# 'x-sendfile' (Apache mod_xsendfile, lighttpd) or 'x-accel-redirect' (nginx). For nginx, map
+# ATTACHMENT_ACCEL_PREFIX to MEDIA_ROOT in an `internal` location.
+ATTACHMENT_SENDFILE = os.environ.get('ATTACHMENT_SENDFILE') or None
+ATTACHMENT_ACCEL_PREFIX = os.environ.get('ATTACHMENT_ACCEL_PREFIX', '/protected-media/')
+
+# Chunked source code uploads (/api/uploads/): default chunk size, largest archive accepted, and
+# how long a session may sit idle before `purge_expired_uploads` deletes it
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 2 * 1024 ** 3))
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24)))
+
+# Attachments are stored once per distinct content under MEDIA_ROOT/blobs. Unreferenced blobs
+# younger than this are kept, so a file saved just before the row that points at it survives.
+BLOB_GC_GRACE = timedelta(minutes=int(os.environ.get('BLOB_GC_GRACE_MINUTES', 60)))
+
+# Background inspection of uploaded attachments (tasks.process_attachment). Archives over these
+# limits are flagged as suspicious, PDF text is kept up to PDF_TEXT_MAX_CHARS characters.
+ZIP_MAX_COMPRESSION_RATIO = int(os.environ.get('ZIP_MAX_COMPRESSION_RATIO', 100))
+ZIP_MAX_UNCOMPRESSED_SIZE = int(os.environ.get('ZIP_MAX_UNCOMPRESSED_SIZE', 10 * 1024 ** 3))
+PDF_TEXT_MAX_CHARS = int(os.environ.get('PDF_TEXT_MAX_CHARS', 100_000))
+
+# Image format of the rendered first-page report previews: 'webp' or 'png'
+PREVIEW_FORMAT = os.environ.get('PREVIEW_FORMAT', 'webp')
+
+# Brotli/gzip for API responses (prototypes/middleware.py): smallest body worth compressing,
+# and the Brotli quality (4 is smaller and cheaper than gzip -6, 11 is only worth it for static files)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
@@ -0,0 +1,34 @@
+"""
+gunicorn deployment profiles, picked with SERVER_PROFILE (settings.py reads it too):
+
+    wsgi (default)  threaded workers running backend.wsgi, WhiteNoise serves static files
+    asgi            uvicorn workers running backend.asgi, one worker serves many concurrent
+                    requests on the async endpoints under /api/async/. The web server in
+                    front serves STATIC_ROOT, and DB_POOL is recommended.
+
+    gunicorn -c gunicorn.conf.py
+    SERVER_PROFILE=asgi gunicorn -c gunicorn.conf.py
+
+Compare the two with `python manage.py loadtest_api`.
+"""
+import multiprocessing
+import os
+
+profile = os.environ.get('SERVER_PROFILE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+# Recycle workers now and then, so a slow leak cannot grow without bound
+max_requests = 1000
+max_requests_jitter = 100
+
+if profile == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'backend.wsgi:application'
+    worker_class = 'gthread'
+    # settings.GUNICORN_THREADS reads the same variable, the login hashing pool is sized below it
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
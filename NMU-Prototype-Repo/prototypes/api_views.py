@@ -1,15 +1,16 @@
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import ClaimsRefreshToken
+from .throttles import LOGIN_THROTTLES
 
 User = get_user_model()
 
 def get_tokens_for_user(user):
     """Generate JWT access and refresh tokens for a user"""
-    refresh = RefreshToken.for_user(user)
+    refresh = ClaimsRefreshToken.for_user(user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -48,9 +49,11 @@ def register_user(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def login_user(request):
     """
     Login user. General users must be approved (is_approved=True).
+    Attempts are rate limited per address and per email, see prototypes/throttles.py.
     """
     email = request.data.get("email")
     password = request.data.get("password")
@@ -58,7 +61,7 @@ def login_user(request):
     if not email or not password:
         return Response({"error": "Email and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    user = authenticate(username=email, password=password)
+    user = authenticate(request, username=email, password=password)
 
     if user is None:
         return Response({"error": "Invalid credentials."}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,222 @@
+"""
+Native async variants of the hot read endpoints, under /api/async/. Served by an ASGI server
+(see gunicorn.conf.py), a request waiting on the database or a file holds a coroutine instead
+of a worker thread. They answer like their synchronous counterparts, except that there are no
+conditional GET validators and list cursors are not interchangeable with the synchronous ones.
+"""
+import base64
+import os
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.text import slugify
+from django.views.decorators.http import require_safe
+from rest_framework import filters
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, PermissionDenied
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .authentication import AsyncJWTAuthentication
+from .models import Prototype, PrototypeAttachment
+from .pagination import PrototypeCursorPagination
+from .renderers import FastJSONRenderer
+from .routers import replica_reads
+from .serializers import PrototypeSerializer, PrototypeSummarySerializer
+from .services.file_delivery import serve_file
+from .services.stats_cache import acached_stat
+from .views import PrototypeViewSet
+
+authentication = AsyncJWTAuthentication()
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def async_api_view(view):
+    """
+    @api_view + IsAuthenticated for async views: JWT authentication, JSON rendering and
+    DRF-shaped error bodies for APIExceptions.
+    """
+    @require_safe
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            auth = await authentication.aauthenticate(request)
+            if auth is None:
+                raise NotAuthenticated()
+            request.user, request.auth = auth
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            response = json_response(detail, status=exc.status_code)
+            if exc.status_code == 401:
+                response['WWW-Authenticate'] = authentication.authenticate_header(request)
+            return response
+    return wrapper
+
+
+def planned(queryset):
+    plan = PrototypeViewSet.DEFAULT_QUERY_PLAN
+    return queryset.select_related(*plan['select_related']).prefetch_related(*plan['prefetch_related'])
+
+
+# Same order as PrototypeCursorPagination. A cursor is the (submission_date, id) of the last row
+# of a page, for the rows after it, or of the first row, for the rows before it ('previous').
+ORDERING = PrototypeCursorPagination.ordering
+OLDEST_FIRST = ('submission_date', 'id')
+
+
+def list_ordering(request, queryset):
+    """ORDERING, or oldest first for ?ordering=submission_date, which the viewset's OrderingFilter accepts"""
+    ordering = filters.OrderingFilter().get_ordering(request, queryset, PrototypeViewSet)
+    return OLDEST_FIRST if ordering and ordering[0] == 'submission_date' else ORDERING
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def seek(queryset, ordering, key, before):
+    """Rows after the one with key = (submission_date, id) in ordering, or before it"""
+    submitted, pk = key
+    date_lookup = 'lt' if ordering[0].startswith('-') != before else 'gt'
+    id_lookup = 'lt' if before else 'gt'
+    return queryset.filter(
+        Q(**{f'submission_date__{date_lookup}': submitted})
+        | Q(submission_date=submitted, **{f'pk__{id_lookup}': pk})
+    )
+
+
+def encode_cursor(row, before=False):
+    value = f'{"p" if before else "n"}|{row["submission_date"].isoformat()}|{row["id"]}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(before, key)"""
+    try:
+        direction, submitted, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        return direction == 'p', (datetime.fromisoformat(submitted), int(pk))
+    except (ValueError, UnicodeDecodeError):
+        raise NotFound('Invalid cursor')
+
+
+def page_size(request):
+    paginator = PrototypeCursorPagination
+    try:
+        size = int(request.GET[paginator.page_size_query_param])
+    except (KeyError, ValueError):
+        return api_settings.PAGE_SIZE
+    return min(size, paginator.max_page_size) if size > 0 else api_settings.PAGE_SIZE
+
+
+@async_api_view
+async def prototype_list(request):
+    """
+    Async GET /api/prototypes/: the viewset's ?search= and ?ordering=, ?view=summary / ?fields=
+    and page_size, with 'next' and 'previous' cursor links
+    """
+    fields = PrototypeSummarySerializer.requested_fields(request.GET)
+    drf_request = Request(request)
+    queryset = filters.SearchFilter().filter_queryset(drf_request, Prototype.objects.all(), PrototypeViewSet)
+    ordering = list_ordering(drf_request, queryset)
+
+    cursor = request.GET.get('cursor')
+    before = False
+    if cursor:
+        before, key = decode_cursor(cursor)
+        queryset = seek(queryset, ordering, key, before)
+    # Rows before the cursor are read backwards from it, then put back in list order
+    queryset = queryset.order_by(*(reverse_ordering(ordering) if before else ordering))
+    size = page_size(request)
+
+    with replica_reads():
+        if fields:
+            rows = queryset.values(*PrototypeSummarySerializer.lookups(fields, extra=('submission_date', 'id')))
+            page = [row async for row in rows[:size + 1]]
+        else:
+            page = [prototype async for prototype in planned(queryset)[:size + 1]]
+    more = len(page) > size
+    page = page[:size]
+    if before:
+        page.reverse()
+
+    if fields:
+        keys = page
+        results = PrototypeSummarySerializer(page, fields).data
+    else:
+        keys = [{'submission_date': prototype.submission_date, 'id': prototype.pk} for prototype in page]
+        results = PrototypeSerializer(page, many=True, context={'request': request}).data
+
+    url = request.build_absolute_uri()
+    has_next, has_previous = (True, more) if before else (more, bool(cursor))
+    next_url = replace_query_param(url, 'cursor', encode_cursor(keys[-1])) if has_next and keys else None
+    previous_url = replace_query_param(url, 'cursor', encode_cursor(keys[0], before=True)) if has_previous and keys else None
+    return json_response({'next': next_url, 'previous': previous_url, 'results': results})
+
+
+@async_api_view
+async def prototype_detail(request, pk):
+    prototype = await planned(Prototype.objects.filter(pk=pk)).afirst()
+    if prototype is None:
+        raise NotFound()
+    return json_response(PrototypeSerializer(prototype, context={'request': request}).data)
+
+
+@async_api_view
+async def prototype_download(request, pk, kind):
+    """Report or source code download, streamed from a worker thread chunk by chunk"""
+    if request.user.role == 'general_user':
+        raise PermissionDenied()
+    attachment = await PrototypeAttachment.objects.select_related('prototype').filter(prototype_id=pk).afirst()
+    field_file = getattr(attachment, kind, None)
+    if not field_file or not await sync_to_async(field_file.storage.exists)(field_file.name):
+        return json_response({'error': 'This prototype has no such file.'}, status=404)
+    extension = os.path.splitext(field_file.name)[1]
+    filename = f'{slugify(attachment.prototype.title) or pk}_{kind}{extension}'
+    return await sync_to_async(serve_file, thread_sensitive=False)(request, field_file, filename=filename)
+
+
+@async_api_view
+async def storage_locations(request):
+    locations = (
+        Prototype.objects.exclude(storage_location__isnull=True).exclude(storage_location='')
+        .values_list('storage_location', flat=True).distinct()
+    )
+    return json_response([location async for location in locations])
+
+
+@async_api_view
+async def prototype_count(request):
+    user = request.user
+    with replica_reads():
+        available_count = await acached_stat('count', Prototype.objects.acount)
+        if user.role == 'student':
+            user_count = await acached_stat('count', Prototype.objects.filter(student=user).acount, 'student', user.pk)
+        else:
+            user_count = available_count
+    return json_response({'your_count': user_count, 'available_count': available_count})
+
+
+@async_api_view
+async def user_profile(request):
+    user = request.user  # loaded with its department by AsyncJWTAuthentication
+    return json_response({
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'role': user.role,
+        'phone': user.phone,
+        'institution_id': user.institution_id,
+        'level': user.level,
+        'full_name': user.full_name,
+        'department': user.department.name if user.department else None,
+        'is_approved': user.is_approved,
+    })
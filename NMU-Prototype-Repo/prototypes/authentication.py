@@ -0,0 +1,101 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch, get_md5_hash_password
+
+from .services import token_blacklist, user_cache
+
+# User attributes copied into every token, so clients can tell who they are without asking
+USER_CLAIMS = ('role', 'department_id', 'is_approved')
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying USER_CLAIMS, the access tokens made from it inherit them.
+    Revoked tokens are refused, see services/token_blacklist.py.
+    """
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if token_blacklist.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """Revoke this token, False when it already was"""
+        return token_blacklist.revoke(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves users through the per-process user cache
+    (services/user_cache.py), with the department already loaded, so the authentication and
+    permission checks of most requests run no queries. A token whose claims no longer match
+    the user (role or department changed, approval withdrawn) is refused and the client has
+    to log in again.
+    """
+
+    def get_user(self, validated_token):
+        return self.check_user(user_cache.get_user(self.get_user_id(validated_token)), validated_token)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    def check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        # Tokens issued before the claims were added have none to compare
+        if any(claim in validated_token and validated_token[claim] != getattr(user, claim) for claim in USER_CLAIMS):
+            raise AuthenticationFailed(_('Your account has changed, log in again.'), code='claims_changed')
+
+        return user
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """CachedJWTAuthentication for the async views, cache misses use the async ORM"""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        user = user_cache.cached_user(user_id)
+        if user is None:
+            versions = user_cache.current_versions()
+            user = await self.user_model.objects.select_related('department').filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).afirst()
+            if user is not None:
+                user_cache.remember(user, versions)
+        return self.check_user(user, validated_token)
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .services import password_hashing
+
+UserModel = get_user_model()
+
+
+class PooledPasswordBackend(ModelBackend):
+    """
+    ModelBackend that checks passwords on the hashing pool (services/password_hashing.py).
+    A stored hash made with older hasher parameters is replaced on a successful login, like
+    AbstractBaseUser.check_password does.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            password_hashing.dummy_hash(password)
+            return
+
+        is_correct, new_encoded = password_hashing.verify(password, user.password)
+        if not is_correct:
+            return
+        if new_encoded is not None:
+            user.password = new_encoded
+            user.save(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
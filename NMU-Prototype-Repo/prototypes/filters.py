@@ -9,18 +9,33 @@ class PrototypeFilter(django_filters.FilterSet):
     status = django_filters.MultipleChoiceFilter(
         choices=Prototype.STATUS_CHOICES
     )
-    has_physical = django_filters.BooleanFilter()
+    has_physical = django_filters.BooleanFilter(
+        field_name='has_physical_prototype'
+    )
     department = django_filters.CharFilter(
         field_name='department__code'
     )
     student = django_filters.CharFilter(
         field_name='student__email'
     )
+    # Filled in by the background attachment inspection (AttachmentMetadata)
+    language = django_filters.CharFilter(
+        field_name='attachment__metadata__primary_language',
+        lookup_expr='iexact'
+    )
+    min_pages = django_filters.NumberFilter(
+        field_name='attachment__metadata__pdf_pages',
+        lookup_expr='gte'
+    )
+    max_pages = django_filters.NumberFilter(
+        field_name='attachment__metadata__pdf_pages',
+        lookup_expr='lte'
+    )
 
     class Meta:
         model = Prototype
         fields = [
             'academic_year', 'status',
             'has_physical', 'department',
-            'student'
+            'student', 'language', 'min_pages', 'max_pages'
         ]
\ No newline at end of file
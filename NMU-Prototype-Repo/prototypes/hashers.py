@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with PASSWORD_HASH_ITERATIONS rounds (Django's default when unset). Existing hashes
+    keep working after the count changes, and are redone with the new one at the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
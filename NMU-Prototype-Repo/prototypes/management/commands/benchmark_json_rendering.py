@@ -0,0 +1,74 @@
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from prototypes.management.commands.benchmark_prototype_list import Rollback, create_benchmark_prototypes
+from prototypes.models import Prototype
+from prototypes.parsers import FastJSONParser
+from prototypes.renderers import FastJSONRenderer, orjson
+from prototypes.serializers import PrototypeSerializer
+from prototypes.views import PrototypeViewSet
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+class Command(BaseCommand):
+    help = (
+        'Time PrototypeSerializer(many=True) and rendering/parsing its output with the stdlib '
+        'and orjson JSON renderers. Rows are created inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed, FastJSONRenderer falls back to the stdlib renderer')
+        try:
+            with transaction.atomic():
+                user = create_benchmark_prototypes(max(options['rows']))
+                self.compare(user, sorted(options['rows']), options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def compare(self, user, row_counts, repeat):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+        request = Request(APIRequestFactory(HTTP_HOST=host).get('/api/prototypes/'))
+        request.user = user
+        plan = PrototypeViewSet.DEFAULT_QUERY_PLAN
+        stages = [
+            ('render stdlib', lambda data, body: JSONRenderer().render(data)),
+            ('render orjson', lambda data, body: FastJSONRenderer().render(data)),
+            ('parse stdlib', lambda data, body: JSONParser().parse(BytesIO(body))),
+            ('parse orjson', lambda data, body: FastJSONParser().parse(BytesIO(body))),
+        ]
+
+        self.stdout.write(f'PrototypeSerializer(many=True), best of {repeat} runs, times in ms')
+        self.stdout.write(f'{"rows":>8}{"bytes":>12}{"serialize":>12}' + ''.join(f'{label:>16}' for label, _ in stages))
+        for rows in row_counts:
+            prototypes = list(
+                Prototype.objects.select_related(*plan['select_related'])
+                .prefetch_related(*plan['prefetch_related']).order_by('pk')[:rows]
+            )
+            serialize_ms, data = best_of(
+                repeat, lambda: PrototypeSerializer(prototypes, many=True, context={'request': request}).data
+            )
+            body = JSONRenderer().render(data)
+            timings = [best_of(repeat, lambda: func(data, body))[0] for _, func in stages]
+            self.stdout.write(f'{rows:>8}{len(body):>12}{serialize_ms:>12.1f}' + ''.join(f'{ms:>16.1f}' for ms in timings))
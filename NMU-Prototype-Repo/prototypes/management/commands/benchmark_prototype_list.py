@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from prototypes.models import CustomUser, Department, Prototype, PrototypeAttachment
+from prototypes.views import PrototypeViewSet
+
+VARIANTS = [
+    ('full', {}),
+    ('view=summary', {'view': 'summary'}),
+    ('fields=id,title,status', {'fields': 'id,title,status'}),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_benchmark_prototypes(rows):
+    """Create rows prototypes with supervisors and attachments, returns a staff user to query as"""
+    department, _ = Department.objects.get_or_create(code='BENCH', defaults={'name': 'Benchmark'})
+    student = CustomUser.objects.create(
+        username='bench_student', email='bench_student@example.com',
+        role='student', level='masters', department=department, full_name='Bench Student',
+    )
+    staff = [
+        CustomUser.objects.create(
+            username=f'bench_staff_{i}', email=f'bench_staff_{i}@example.com',
+            role='staff', department=department, full_name=f'Bench Supervisor {i}',
+        )
+        for i in range(3)
+    ]
+    abstract = 'A realistic abstract of a student prototype, several sentences long. ' * 12
+    prototypes = Prototype.objects.bulk_create(
+        Prototype(
+            student=student, department=department, academic_year='2024/2025',
+            title=f'Benchmark prototype {i}', abstract=abstract, reviewer=staff[0],
+            barcode=f'NM-BENCH-{i:08d}', storage_location='Shelf A1', has_physical_prototype=True,
+        )
+        for i in range(rows)
+    )
+    Prototype.supervisors.through.objects.bulk_create(
+        Prototype.supervisors.through(prototype_id=prototype.pk, customuser_id=supervisor.pk)
+        for prototype in prototypes for supervisor in staff[:2]
+    )
+    PrototypeAttachment.objects.bulk_create(
+        PrototypeAttachment(
+            prototype=prototype, report=f'prototypes/reports/{prototype.pk}.pdf',
+            source_code=f'prototypes/source_code/{prototype.pk}.zip',
+        )
+        for prototype in prototypes
+    )
+    return staff[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare payload size and latency of the full prototype list with the sparse '
+        'representations. Rows are created inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = create_benchmark_prototypes(options['rows'])
+                self.compare(user, options['page_size'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def compare(self, user, page_size, repeat):
+        # A host the ALLOWED_HOSTS check accepts, pagination builds absolute next/previous links
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+        factory = APIRequestFactory(HTTP_HOST=host)
+        view = PrototypeViewSet.as_view({'get': 'list'})
+
+        self.stdout.write(f'One page of {page_size} prototypes, best of {repeat} runs')
+        self.stdout.write(f'{"variant":<28}{"bytes":>10}{"ms":>10}')
+        for label, params in VARIANTS:
+            timings = []
+            for _ in range(repeat):
+                request = factory.get('/api/prototypes/', {**params, 'page_size': page_size})
+                force_authenticate(request, user=user)
+                start = time.perf_counter()
+                response = view(request)
+                body = response.render().content
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(f'{label:<28}{len(body):>10}{min(timings) * 1000:>10.1f}')
@@ -0,0 +1,113 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from prototypes.models import CustomUser, Department, Prototype
+from prototypes.services import search
+
+SYLLABLES = ['ka', 'mi', 'to', 'ra', 'ne', 'su', 'lo', 'pe', 'di', 'ba', 'zu', 'shi', 'ngo', 'mwa', 'ta', 'ki']
+VOCABULARY_SIZE = 5000
+# (label, vocabulary ranks) per query: words are drawn with Zipf weights, so rank sets how common a term is
+QUERY_RANKS = [('common', [5]), ('mid', [300]), ('rare', [4000]), ('two terms', [20, 300]), ('missing', None)]
+
+
+def build_vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare full-text search with the icontains SearchFilter path on synthetic data. '
+        'Rows are created inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=25)
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError('This database has no full-text index to benchmark')
+
+        rng = random.Random(42)
+        vocabulary = build_vocabulary(rng)
+        try:
+            with transaction.atomic():
+                self.populate(options['rows'], rng, vocabulary)
+                self.compare(options['repeat'], options['page_size'], vocabulary)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, rows, rng, vocabulary):
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        department, _ = Department.objects.get_or_create(code='BENCH', defaults={'name': 'Benchmark'})
+        student = CustomUser.objects.create(
+            username='bench_student', email='bench_student@example.com',
+            role='student', level='masters', department=department, full_name='Bench Student',
+        )
+
+        start = time.perf_counter()
+        Prototype.objects.bulk_create(
+            (
+                Prototype(
+                    student=student,
+                    department=department,
+                    academic_year='2024/2025',
+                    title=' '.join(rng.choices(vocabulary, weights, k=4)),
+                    abstract=' '.join(rng.choices(vocabulary, weights, k=80)),
+                )
+                for _ in range(rows)
+            ),
+            batch_size=2000,
+        )
+        search.rebuild_index()
+        self.stdout.write(f'Created and indexed {rows} prototypes in {time.perf_counter() - start:.1f}s')
+
+    def timed(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000, result
+
+    def compare(self, repeat, page_size, vocabulary):
+        def icontains(terms, fields):
+            query = Q()
+            for term in terms.split():
+                term_query = Q()
+                for field in fields:
+                    term_query |= Q(**{f'{field}__icontains': term})
+                query &= term_query
+            queryset = Prototype.objects.filter(query).order_by('-submission_date', 'id')
+            return lambda: (queryset.count(), list(queryset[:page_size]))
+
+        def full_text(terms):
+            def run():
+                results = search.search_prototypes(terms)
+                return results.count(), list(results[:page_size])
+            return run
+
+        self.stdout.write('One page plus total count per query, best of %d runs, in ms' % repeat)
+        self.stdout.write(f'{"query":<36}{"icontains":>11}{"+abstract":>11}{"fts":>9}{"hits":>9}')
+        for label, ranks in QUERY_RANKS:
+            terms = ' '.join(vocabulary[rank] for rank in ranks) if ranks else 'qqqqqq'
+            # The current SearchFilter fields, then the same fields plus abstract for equal coverage
+            current_ms, _ = self.timed(icontains(terms, ['title', 'barcode', 'storage_location']), repeat)
+            abstract_ms, _ = self.timed(icontains(terms, ['title', 'barcode', 'storage_location', 'abstract']), repeat)
+            fts_ms, (hits, _) = self.timed(full_text(terms), repeat)
+            self.stdout.write(
+                f'{label + " (" + terms + ")":<36}{current_ms:>11.1f}{abstract_ms:>11.1f}{fts_ms:>9.1f}{hits:>9}'
+            )
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from prototypes.authentication import ClaimsRefreshToken
+from prototypes.management.commands.benchmark_prototype_list import Rollback
+from prototypes.models import CustomUser, RevokedToken
+
+BACKENDS = ['database', 'cache']
+
+
+class Command(BaseCommand):
+    help = (
+        'Time /api/token/refresh/ with each TOKEN_BLACKLIST_BACKEND, with the RevokedToken table '
+        'holding the given numbers of rows. Rows are created inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refreshes', type=int, default=2000)
+        parser.add_argument('--revoked', type=int, nargs='+', default=[0, 100_000])
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create(username='bench_refresh', email='bench_refresh@example.com', role='staff')
+                self.compare(user, options['refreshes'], sorted(options['revoked']))
+                raise Rollback
+        except Rollback:
+            pass
+
+    def compare(self, user, refreshes, table_sizes):
+        view = TokenRefreshView.as_view()
+        factory = APIRequestFactory()
+        expires_at = timezone.now() + timedelta(days=7)
+
+        self.stdout.write(f'{refreshes} refreshes per run')
+        self.stdout.write(f'{"revoked rows":>14}{"backend":>10}{"refresh/s":>12}{"ms each":>10}{"errors":>8}')
+        for size in table_sizes:
+            missing = size - RevokedToken.objects.count()
+            RevokedToken.objects.bulk_create(
+                (RevokedToken(jti=f'bench-{size}-{i}', expires_at=expires_at) for i in range(missing)), batch_size=5000
+            )
+            for backend in BACKENDS:
+                with override_settings(TOKEN_BLACKLIST_BACKEND=backend):
+                    requests = [
+                        factory.post('/api/token/refresh/', {'refresh': str(ClaimsRefreshToken.for_user(user))}, format='json')
+                        for _ in range(refreshes)
+                    ]
+                    start = time.perf_counter()
+                    errors = sum(view(request).status_code != 200 for request in requests)
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{size:>14}{backend:>10}{refreshes / elapsed:>12.0f}{elapsed / refreshes * 1000:>10.2f}{errors:>8}'
+                )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from prototypes.services.blobs import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Recount attachment blob references and delete blobs nothing refers to'
+
+    def handle(self, *args, **options):
+        recounted, removed = collect_garbage()
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {recounted} reference counts and removed {removed} unreferenced blobs'
+        ))
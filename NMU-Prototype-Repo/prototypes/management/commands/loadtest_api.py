@@ -0,0 +1,83 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from prototypes.authentication import ClaimsRefreshToken
+from prototypes.models import Prototype
+
+# (name, WSGI path, async path), {pk} is replaced by an existing prototype
+ENDPOINTS = [
+    ('list', '/api/prototypes/', '/api/async/prototypes/'),
+    ('detail', '/api/prototypes/{pk}/', '/api/async/prototypes/{pk}/'),
+    ('count', '/api/count/', '/api/async/count/'),
+    ('storage_locations', '/api/prototypes/storage_locations/', '/api/async/prototypes/storage_locations/'),
+    ('profile', '/api/user/profile/', '/api/async/user/profile/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the read endpoints of a running WSGI deployment (synchronous views) against an '
+        'ASGI deployment (the /api/async/ views), see gunicorn.conf.py. Prints throughput and latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', help='Base URL of the WSGI server, e.g. http://localhost:8000')
+        parser.add_argument('--asgi', help='Base URL of the ASGI server, e.g. http://localhost:8001')
+        parser.add_argument('--user', required=True, help='Username the requests are authenticated as')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--endpoints', nargs='+', choices=[name for name, _, _ in ENDPOINTS])
+
+    def handle(self, *args, **options):
+        servers = [(label, options[label]) for label in ('wsgi', 'asgi') if options[label]]
+        if not servers:
+            raise CommandError('Give the base URL of at least one server with --wsgi and/or --asgi.')
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user named {options["user"]}.')
+        token = str(ClaimsRefreshToken.for_user(user).access_token)
+        pk = Prototype.objects.values_list('pk', flat=True).first()
+
+        self.stdout.write(f'{options["requests"]} requests per endpoint, {options["concurrency"]} concurrent')
+        self.stdout.write(f'{"server":<8}{"endpoint":<20}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}')
+        for name, sync_path, async_path in ENDPOINTS:
+            if options['endpoints'] and name not in options['endpoints']:
+                continue
+            for label, base_url in servers:
+                path = (sync_path if label == 'wsgi' else async_path).format(pk=pk)
+                self.run(label, name, base_url.rstrip('/') + path, token, options['requests'], options['concurrency'])
+
+    def run(self, label, name, url, token, count, concurrency):
+        def fetch(_):
+            request = Request(url, headers={'Authorization': f'Bearer {token}', 'Accept-Encoding': 'gzip, br'})
+            start = time.perf_counter()
+            try:
+                with urlopen(request, timeout=60) as response:
+                    response.read()
+                ok = True
+            except (HTTPError, URLError, OSError):
+                ok = False
+            return time.perf_counter() - start, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(count)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for latency, ok in results if ok)
+        errors = sum(not ok for _, ok in results)
+        if len(latencies) < 2:
+            self.stdout.write(f'{label:<8}{name:<20}{"-":>10}{"-":>10}{"-":>10}{"-":>10}{errors:>8}')
+            return
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{label:<8}{name:<20}{len(latencies) / elapsed:>10.1f}{percentiles[49] * 1000:>10.1f}'
+            f'{percentiles[94] * 1000:>10.1f}{percentiles[98] * 1000:>10.1f}{errors:>8}'
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django_q.tasks import async_task
+
+from prototypes.models import PrototypeAttachment
+from prototypes.tasks import process_attachment
+
+
+class Command(BaseCommand):
+    help = 'Inspect attachments that have no metadata yet (or all with --all)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-check attachments that were processed before')
+        parser.add_argument('--sync', action='store_true', help='Process in this process instead of the django-q cluster')
+
+    def handle(self, *args, **options):
+        attachments = PrototypeAttachment.objects.all()
+        if not options['all']:
+            attachments = attachments.exclude(metadata__status='done')
+
+        count = 0
+        for attachment_id in attachments.values_list('pk', flat=True).iterator():
+            if options['sync']:
+                process_attachment(attachment_id)
+            else:
+                async_task('prototypes.tasks.process_attachment', attachment_id, task_name=f'attachment-{attachment_id}')
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'{"Processed" if options["sync"] else "Queued"} {count} attachments'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from prototypes.tasks import purge_expired_exports
+
+
+class Command(BaseCommand):
+    help = 'Delete expired export jobs and old files from MEDIA_ROOT/temp_reports'
+
+    def handle(self, *args, **options):
+        job_count, file_count = purge_expired_exports()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {job_count} expired export jobs and {file_count} stale files'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from prototypes.tasks import purge_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired refresh tokens from the RevokedToken blacklist table'
+
+    def handle(self, *args, **options):
+        count = purge_revoked_tokens()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} expired revoked tokens'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from prototypes.tasks import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete expired chunked upload sessions and their partial files'
+
+    def handle(self, *args, **options):
+        count = purge_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} expired upload sessions'))
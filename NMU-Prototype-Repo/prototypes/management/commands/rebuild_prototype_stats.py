@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from prototypes.services import prototype_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the materialized prototype statistics (PrototypeStat) from the prototypes table'
+
+    def handle(self, *args, **options):
+        count = prototype_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} statistics rows'))
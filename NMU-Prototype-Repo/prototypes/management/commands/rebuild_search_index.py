@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from prototypes.services import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the prototype full-text search index'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING('This database has no full-text index, search uses icontains'))
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} prototypes'))
@@ -0,0 +1,88 @@
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional, responses are gzipped only
+    brotli = None
+
+# Content types worth compressing, exports (PDF, XLSX, ZIP) and images are compressed already
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|vnd\.oai\.openapi)|[^;]*\+(json|xml)\b|image/svg\+xml)'
+)
+
+
+def accepted_encodings(accept_encoding):
+    """Content codings the client accepts with their q-values, e.g. {'br': 1.0, 'gzip': 0.5}"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Brotli or gzip for buffered responses of at least COMPRESSION_MIN_SIZE bytes, whichever
+    the client prefers in Accept-Encoding (Brotli on a tie). Unlike Django's GZipMiddleware,
+    streaming responses (file downloads, exports, Range requests) are left alone: they are
+    mostly compressed formats already, and compressing them would drop Content-Length.
+
+    HTML is only gzipped, with Django's random padding against BREACH, since admin pages carry
+    CSRF tokens. API responses are authenticated by header, not cookie.
+    """
+    max_random_bytes = 100
+
+    def choose_encoding(self, request, content_type):
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0.0)
+        candidates = ['gzip']
+        if brotli is not None and not content_type.startswith('text/html'):
+            candidates.insert(0, 'br')
+        best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+        return best if accepted.get(best, wildcard) > 0 else None
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.status_code == 206
+            or response.has_header('Content-Encoding')
+            or 'no-transform' in response.get('Cache-Control', '')
+            or not COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request, response.get('Content-Type', ''))
+        if encoding is None:
+            return response
+
+        compressed = self.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body is a different representation, strong ETags become weak (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
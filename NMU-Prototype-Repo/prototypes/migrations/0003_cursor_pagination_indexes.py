@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('prototypes', '0002_remove_prototype_supervisor_prototype_supervisors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-date_joined', 'id'], name='prototypes__date_jo_158d44_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prototype',
+            index=models.Index(fields=['-submission_date', 'id'], name='prototypes__submiss_d1a8c2_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE prototypes_search USING fts5("
+            "title, abstract, people, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        insert = 'INSERT INTO prototypes_search (rowid, title, abstract, people) VALUES (%s, %s, %s, %s)'
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE prototypes_search ("
+            "prototype_id bigint PRIMARY KEY REFERENCES prototypes_prototype (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute('CREATE INDEX prototypes_search_document_idx ON prototypes_search USING GIN (document)')
+        insert = (
+            "INSERT INTO prototypes_search (prototype_id, document) VALUES (%s, "
+            "setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'C') || "
+            "setweight(to_tsvector('simple', %s), 'B'))"
+        )
+    else:
+        return
+
+    # Index the prototypes that already exist
+    Prototype = apps.get_model('prototypes', 'Prototype')
+    with connection.cursor() as cursor:
+        for prototype in Prototype.objects.select_related('student').prefetch_related('supervisors').iterator(chunk_size=500):
+            people = [prototype.student.full_name or prototype.student.username]
+            people += [s.full_name or s.username for s in prototype.supervisors.all()]
+            cursor.execute(insert, [prototype.pk, prototype.title, prototype.abstract, ' '.join(people)])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS prototypes_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0005_userimportjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:10
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def schedule_upload_purge(apps, schema_editor):
+    # Hourly clean-up of expired upload sessions by the django-q cluster
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.update_or_create(
+        name='purge-expired-uploads',
+        defaults={'func': 'prototypes.tasks.purge_expired_uploads', 'schedule_type': 'H', 'repeats': -1},
+    )
+
+
+def unschedule_upload_purge(apps, schema_editor):
+    apps.get_model('django_q', 'Schedule').objects.filter(name='purge-expired-uploads').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0006_prototype_search_index'),
+        ('django_q', '0018_task_success_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('open', 'Receiving Chunks'), ('complete', 'Complete'), ('attached', 'Attached')], default='open', max_length=10)),
+                ('file', models.FileField(blank=True, upload_to='prototypes/source_code/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+                ('prototype', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='prototypes.prototype')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('file', models.FileField(upload_to='uploads/')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='prototypes.uploadsession')),
+            ],
+            options={
+                'ordering': ['index'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'expires_at'], name='prototypes__status_b1135d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'index'), name='unique_upload_chunk'),
+        ),
+        migrations.RunPython(schedule_upload_purge, unschedule_upload_purge),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:14
+
+import django.core.validators
+import prototypes.storage
+from django.db import migrations, models
+
+
+def schedule_blob_collection(apps, schema_editor):
+    # Daily sweep for blobs left unreferenced inside the grace period or by bulk deletes
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.update_or_create(
+        name='collect-blobs',
+        defaults={'func': 'prototypes.services.blobs.collect_garbage', 'schedule_type': 'D', 'repeats': -1},
+    )
+
+
+def unschedule_blob_collection(apps, schema_editor):
+    apps.get_model('django_q', 'Schedule').objects.filter(name='collect-blobs').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0007_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='prototypeattachment',
+            name='report',
+            field=models.FileField(storage=prototypes.storage.ContentAddressedStorage(), upload_to='prototypes/reports/', validators=[django.core.validators.FileExtensionValidator(['pdf'])]),
+        ),
+        migrations.AlterField(
+            model_name='prototypeattachment',
+            name='source_code',
+            field=models.FileField(storage=prototypes.storage.ContentAddressedStorage(), upload_to='prototypes/source_code/', validators=[django.core.validators.FileExtensionValidator(['zip'])]),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='file',
+            field=models.FileField(blank=True, storage=prototypes.storage.ContentAddressedStorage(), upload_to='prototypes/source_code/'),
+        ),
+        migrations.RunPython(schedule_blob_collection, unschedule_blob_collection),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0008_content_addressed_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('report_name', models.CharField(blank=True, max_length=255)),
+                ('source_code_name', models.CharField(blank=True, max_length=255)),
+                ('pdf_valid', models.BooleanField(null=True)),
+                ('pdf_pages', models.PositiveIntegerField(null=True)),
+                ('pdf_text', models.TextField(blank=True)),
+                ('zip_valid', models.BooleanField(null=True)),
+                ('zip_file_count', models.PositiveIntegerField(null=True)),
+                ('zip_compressed_size', models.PositiveBigIntegerField(null=True)),
+                ('zip_uncompressed_size', models.PositiveBigIntegerField(null=True)),
+                ('zip_compression_ratio', models.FloatField(null=True)),
+                ('zip_languages', models.JSONField(blank=True, default=dict)),
+                ('primary_language', models.CharField(blank=True, max_length=30)),
+                ('is_suspicious', models.BooleanField(default=False)),
+                ('problems', models.JSONField(blank=True, default=dict)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('attachment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metadata', to='prototypes.prototypeattachment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status'], name='prototypes__status_4e1598_idx'), models.Index(fields=['primary_language'], name='prototypes__primary_c76f51_idx'), models.Index(fields=['pdf_pages'], name='prototypes__pdf_pag_625bfb_idx'), models.Index(fields=['zip_uncompressed_size'], name='prototypes__zip_unc_6e7a36_idx'), models.Index(fields=['is_suspicious'], name='prototypes__is_susp_ba1738_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0009_attachmentmetadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmentmetadata',
+            name='preview_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0010_attachmentmetadata_preview'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prototype',
+            index=models.Index(fields=['last_modified'], name='prototypes__last_mo_41b2bb_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+
+def schedule_token_purge(apps, schema_editor):
+    # Hourly clean-up of expired revoked refresh tokens by the django-q cluster
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.update_or_create(
+        name='purge-revoked-tokens',
+        defaults={'func': 'prototypes.tasks.purge_revoked_tokens', 'schedule_type': 'H', 'repeats': -1},
+    )
+
+
+def unschedule_token_purge(apps, schema_editor):
+    apps.get_model('django_q', 'Schedule').objects.filter(name='purge-revoked-tokens').delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0011_prototype_last_modified_index'),
+        ('django_q', '0018_task_success_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('jti', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(schedule_token_purge, unschedule_token_purge),
+    ]
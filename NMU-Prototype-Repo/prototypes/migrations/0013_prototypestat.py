@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_existing_prototypes(apps, schema_editor):
+    from prototypes.services.prototype_stats import rebuild
+    rebuild(apps.get_model('prototypes', 'Prototype'), apps.get_model('prototypes', 'PrototypeStat'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0012_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrototypeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grouping', models.PositiveSmallIntegerField()),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('research_group', models.CharField(blank=True, max_length=50, null=True)),
+                ('academic_year', models.CharField(blank=True, max_length=9, null=True)),
+                ('status', models.CharField(blank=True, max_length=50, null=True)),
+                ('has_physical_prototype', models.BooleanField(null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='prototypes.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['grouping'], name='prototypes__groupin_fd43e0_idx')],
+            },
+        ),
+        migrations.RunPython(count_existing_prototypes, migrations.RunPython.noop),
+    ]
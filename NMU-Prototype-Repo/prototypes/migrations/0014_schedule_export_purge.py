@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def schedule_export_purge(apps, schema_editor):
+    # Hourly clean-up of expired export jobs and MEDIA_ROOT/temp_reports by the django-q cluster
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.update_or_create(
+        name='purge-expired-exports',
+        defaults={'func': 'prototypes.tasks.purge_expired_exports', 'schedule_type': 'H', 'repeats': -1},
+    )
+
+
+def unschedule_export_purge(apps, schema_editor):
+    apps.get_model('django_q', 'Schedule').objects.filter(name='purge-expired-exports').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0013_prototypestat'),
+        ('django_q', '0018_task_success_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_export_purge, unschedule_export_purge),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_current_format(apps, schema_editor):
+    # Existing previews were rendered in the PREVIEW_FORMAT of the time, the current one
+    AttachmentMetadata = apps.get_model('prototypes', 'AttachmentMetadata')
+    AttachmentMetadata.objects.exclude(preview_digest='').update(preview_format=settings.PREVIEW_FORMAT)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prototypes', '0014_schedule_export_purge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmentmetadata',
+            name='preview_format',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.RunPython(record_current_format, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -10,6 +10,7 @@ from django.db import models
 from django.core.exceptions import ValidationError
 import os
 import hashlib
+from .storage import blob_storage
 
 
 class Department(models.Model):
@@ -53,6 +54,9 @@ class CustomUser(AbstractUser):
         verbose_name = "User"
         verbose_name_plural = "Users"
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['-date_joined', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.email} ({self.get_role_display()})"
@@ -124,6 +128,8 @@ class Prototype(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['barcode']),
             models.Index(fields=['academic_year']),
+            models.Index(fields=['-submission_date', 'id']),
+            models.Index(fields=['last_modified']),
         ]
 
     def __str__(self):
@@ -137,7 +143,10 @@ class Prototype(models.Model):
     def save(self, *args, **kwargs):
         if self.has_physical_prototype and not self.barcode:
             self.barcode = f"NM-{self.department.code}-{uuid.uuid4().hex[:8].upper()}"
-        super().save(*args, **kwargs)
+        # One transaction for the save and its signals: signals.remember_stat_dimensions locks the
+        # stored row, so a concurrent save of this prototype waits until the statistics are moved
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 
@@ -145,9 +154,215 @@ class Prototype(models.Model):
 #model for the attachment of files to the project (prototypes) by students
 class PrototypeAttachment(models.Model):
     prototype = models.OneToOneField(Prototype, on_delete=models.CASCADE, related_name="attachment")
-    report = models.FileField(upload_to='prototypes/reports/', validators=[FileExtensionValidator(['pdf'])])
-    source_code = models.FileField(upload_to='prototypes/source_code/', validators=[FileExtensionValidator(['zip'])])
+    # Stored content-addressed under media/blobs, identical resubmissions share one file
+    report = models.FileField(upload_to='prototypes/reports/', storage=blob_storage, validators=[FileExtensionValidator(['pdf'])])
+    source_code = models.FileField(upload_to='prototypes/source_code/', storage=blob_storage, validators=[FileExtensionValidator(['zip'])])
 
     def __str__(self):
         return f"Attachments for {self.prototype.title}"
 
+
+
+#background export jobs (PDF exports and per-prototype reports) run by the django-q cluster
+class ExportJob(models.Model):
+    KIND_CHOICES = [
+        ('prototypes_pdf', 'Prototype List (PDF)'),
+        ('prototype_report', 'Prototype Report (PDF)'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='export_jobs')
+    prototype = models.ForeignKey(Prototype, on_delete=models.CASCADE, null=True, blank=True, related_name='export_jobs')
+    params = models.JSONField(default=dict, blank=True)  # PrototypeFilter parameters for list exports
+    file = models.FileField(upload_to='temp_reports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} [{self.status}]"
+
+
+#chunked bulk user import, progress is committed per chunk so a failed import can resume
+class UserImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file = models.FileField(upload_to='imports/', validators=[FileExtensionValidator(['xlsx', 'csv'])])
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    chunk_size = models.PositiveIntegerField(default=500)
+    next_row = models.PositiveIntegerField(default=0)  # sheet row to resume from, 0 = not started
+    success_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # first 100 row errors
+    failure = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='user_import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"User import {self.pk} [{self.status}]"
+
+
+#resumable chunked upload of a large source code archive, assembled into a PrototypeAttachment
+class UploadSession(models.Model):
+    STATUS_CHOICES = [
+        ('open', 'Receiving Chunks'),
+        ('complete', 'Complete'),      # assembled, waiting to be used by a new prototype
+        ('attached', 'Attached'),      # stored on a PrototypeAttachment
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='upload_sessions')
+    prototype = models.ForeignKey(Prototype, on_delete=models.CASCADE, null=True, blank=True, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)  # optional checksum declared by the client
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    file = models.FileField(upload_to='prototypes/source_code/', storage=blob_storage, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def expected_chunk_size(self, index):
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.size - self.chunk_size * (self.total_chunks - 1)
+
+    def __str__(self):
+        return f"Upload {self.filename} [{self.status}]"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    file = models.FileField(upload_to='uploads/')
+
+    class Meta:
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
+
+
+#a file in the content-addressed attachment storage, removed once no FileField references it
+class Blob(models.Model):
+    name = models.CharField(max_length=255, unique=True)  # blobs/ab/<sha256>.<ext>
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+#what the background pipeline found inside an attachment, so lists and filters never open the files
+class AttachmentMetadata(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    attachment = models.OneToOneField(PrototypeAttachment, on_delete=models.CASCADE, related_name='metadata')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # File names the results belong to, blob names change whenever the content does
+    report_name = models.CharField(max_length=255, blank=True)
+    source_code_name = models.CharField(max_length=255, blank=True)
+
+    pdf_valid = models.BooleanField(null=True)
+    pdf_pages = models.PositiveIntegerField(null=True)
+    pdf_text = models.TextField(blank=True)
+    preview_digest = models.CharField(max_length=64, blank=True)  # report hash the first-page previews were rendered from
+    preview_format = models.CharField(max_length=10, blank=True)  # PREVIEW_FORMAT they were rendered in
+
+    zip_valid = models.BooleanField(null=True)
+    zip_file_count = models.PositiveIntegerField(null=True)
+    zip_compressed_size = models.PositiveBigIntegerField(null=True)
+    zip_uncompressed_size = models.PositiveBigIntegerField(null=True)
+    zip_compression_ratio = models.FloatField(null=True)
+    zip_languages = models.JSONField(default=dict, blank=True)  # language -> number of files
+    primary_language = models.CharField(max_length=30, blank=True)
+    is_suspicious = models.BooleanField(default=False)  # zip bomb or unsafe paths
+    problems = models.JSONField(default=dict, blank=True)  # 'report'/'source_code' -> list of findings
+
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status']),
+            models.Index(fields=['primary_language']),
+            models.Index(fields=['pdf_pages']),
+            models.Index(fields=['zip_uncompressed_size']),
+            models.Index(fields=['is_suspicious']),
+        ]
+
+    def __str__(self):
+        return f"Metadata for attachment {self.attachment_id} [{self.status}]"
+
+
+#refresh tokens used up by rotation, kept until they expire (see services/token_blacklist.py)
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+#materialized prototype counts for every combination of the statistics dimensions
+#(see services/prototype_stats.py), kept current by signals.py
+class PrototypeStat(models.Model):
+    # Bit per dimension that the row is broken down by, the others are totals over all values
+    grouping = models.PositiveSmallIntegerField()
+    key = models.CharField(max_length=255, unique=True)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    research_group = models.CharField(max_length=50, null=True, blank=True)
+    academic_year = models.CharField(max_length=9, null=True, blank=True)
+    status = models.CharField(max_length=50, null=True, blank=True)
+    has_physical_prototype = models.BooleanField(null=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['grouping']),
+        ]
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
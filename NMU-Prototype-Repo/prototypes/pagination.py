@@ -0,0 +1,37 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PrototypeCursorPagination(CursorPagination):
+    """
+    Keyset pagination for prototype lists, newest submissions first.
+    The cursor holds the last submission_date seen, so deep pages are a range
+    scan on the submission_date index instead of an OFFSET. id breaks ties
+    between prototypes submitted at the same instant. This is the order for every role,
+    students' own prototypes are no longer moved to the front as they were before
+    pagination: the cursor seeks on its first ordering key only, so a two-valued leading
+    key would page by OFFSET. The frontend puts them first within each page.
+    """
+    ordering = ('-submission_date', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination for user lists, newest accounts first, when asked for with ?page_size=.
+    Without it the whole list comes back as a plain array: the student and supervisor pickers
+    in the frontend need every user.
+    """
+    ordering = ('-date_joined', 'id')
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Page numbers for ranked search results. Rank order has no key to seek on, but
+    the full-text index only returns the ids for the requested page.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -20,7 +20,12 @@ class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
             return True
-        return obj.student == request.user
+        return obj.student_id == request.user.pk
+
+class CanDownloadAttachment(BasePermission):
+    """Attachments are for university members, general users only see prototype details."""
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role != "general_user"
 
 class IsReviewer(BasePermission):
     def has_permission(self, request, view):
@@ -30,7 +35,7 @@ class IsReviewer(BasePermission):
         return (
             request.user.role == 'admin' or
             (request.user.role == 'staff' and 
-             obj.department == request.user.department)
+             obj.department_id == request.user.department_id)
         )
     
 class IsPrototypeOwner(BasePermission):
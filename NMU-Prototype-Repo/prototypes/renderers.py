@@ -0,0 +1,56 @@
+import datetime
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib renderer is used instead
+    orjson = None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """
+    DRF's JSONEncoder, except that datetimes and times keep their microseconds, as orjson and
+    DateTimeField write them. DRF's encoder cuts them to milliseconds.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime):
+            representation = obj.isoformat()
+            if representation.endswith('+00:00'):
+                representation = representation[:-6] + 'Z'
+            return representation
+        if isinstance(obj, datetime.time) and obj.utcoffset() is None:
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def _default(obj, encoder=JSONEncoder()):
+    """Types orjson does not know (Decimal, lazy strings, querysets...) are converted like DRF does"""
+    return encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson, several times faster on large lists. datetime, date, time
+    and UUID are encoded natively (datetimes keep their microseconds, as DateTimeField writes
+    them), everything else goes through DRF's JSONEncoder. Indented output (browsable API,
+    ?indent=) and installs without orjson fall back to the stdlib renderer, with an encoder
+    that writes datetimes the same way.
+    """
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # OPT_UTC_Z writes aware UTC datetimes with a 'Z' suffix, like DRF's encoder
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z)
+        # Same strict javascript subset escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
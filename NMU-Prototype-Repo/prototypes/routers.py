@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads made inside this block to the read replica, when one is configured"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reads_from_replica(view):
+    """
+    Decorator for read-only views (lists, search, statistics). Anything outside these views
+    reads from the primary, so a client always sees its own writes on the detail endpoints.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Installed when DB_REPLICA_HOST is set (see settings.py). Writes, migrations and reads
+    inside a transaction on the primary go to 'default', reads in replica_reads() blocks
+    go to 'replica'. The replica is a copy of the same database, so relations are allowed.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -1,7 +1,18 @@
 from rest_framework import serializers
-from .models import CustomUser, Prototype, PrototypeAttachment, Department
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import (
+    CustomUser, Prototype, PrototypeAttachment, Department, ExportJob, UserImportJob, UploadSession,
+    AttachmentMetadata,
+)
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.utils.functional import cached_property
+from .authentication import ClaimsRefreshToken
+from .services.previews import PREVIEW_SIZES
 
 User = get_user_model()
 
@@ -23,10 +34,48 @@ class DepartmentSerializer(serializers.ModelSerializer):
         model = Department
         fields = '__all__'
 
+class AttachmentMetadataSerializer(serializers.ModelSerializer):
+    preview_urls = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttachmentMetadata
+        fields = [
+            'status', 'pdf_valid', 'pdf_pages', 'zip_valid', 'zip_file_count',
+            'zip_uncompressed_size', 'zip_compression_ratio', 'zip_languages',
+            'primary_language', 'is_suspicious', 'problems', 'processed_at', 'preview_urls',
+        ]
+
+    def get_preview_urls(self, obj):
+        """Versioned by the report hash, so browsers can cache the images for good"""
+        if not obj.preview_digest:
+            return None
+        request = self.context.get('request')
+        return {
+            size: reverse('prototype-preview', args=[obj.attachment.prototype_id, size], request=request)
+            + f'?v={obj.preview_digest}'
+            for size in PREVIEW_SIZES
+        }
+
 class PrototypeAttachmentSerializer(serializers.ModelSerializer):
+    metadata = AttachmentMetadataSerializer(read_only=True)
+    # A complete chunked upload (/api/uploads/) can stand in for the source_code file
+    source_code_upload = serializers.PrimaryKeyRelatedField(
+        queryset=UploadSession.objects.filter(status='complete'), write_only=True, required=False,
+    )
+
     class Meta:
         model = PrototypeAttachment
-        fields = ['report', 'source_code']
+        fields = ['report', 'source_code', 'source_code_upload', 'metadata']
+        extra_kwargs = {'source_code': {'required': False}}
+
+    def validate(self, data):
+        upload = data.get('source_code_upload')
+        if upload is None and not data.get('source_code'):
+            raise serializers.ValidationError({'source_code': 'Upload a source code archive.'})
+        request = self.context.get('request')
+        if upload is not None and request and upload.owner_id != request.user.pk:
+            raise serializers.ValidationError({'source_code_upload': 'Upload session not found.'})
+        return data
 class PrototypeSerializer(serializers.ModelSerializer):
     attachment = PrototypeAttachmentSerializer(required=True)
     student = serializers.PrimaryKeyRelatedField(
@@ -81,22 +130,21 @@ class PrototypeSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        
-        # Convert student ID to nested representation
+
+        # Convert student ID to nested representation.
+        # supervisors and reviewer are already nested by their field serializers, so they
+        # are not serialized a second time here; all three read from the objects loaded
+        # by PrototypeViewSet's select_related/prefetch_related plan.
         if 'student' in representation:
-            representation['student'] = UserSerializer(instance.student).data
-        
-        # Convert supervisor ID to nested representation if exists
-        if instance.supervisors and 'supervisors' in representation:
-             representation['supervisors'] = UserSerializer(instance.supervisors.all(), many=True).data
+            representation['student'] = self.student_serializer.to_representation(instance.student)
 
-        
-        # Convert reviewer ID to nested representation if exists
-        if instance.reviewer and 'reviewer' in representation:
-            representation['reviewer'] = UserSerializer(instance.reviewer).data
-        
         return representation
 
+    @cached_property
+    def student_serializer(self):
+        """One UserSerializer for every row of a list, building its fields per row cost more than rendering"""
+        return UserSerializer()
+
     def create(self, validated_data):
         attachment_data = validated_data.pop('attachment')
         student = validated_data['student']
@@ -113,9 +161,79 @@ class PrototypeSerializer(serializers.ModelSerializer):
         if supervisors:
             prototype.supervisors.set(supervisors)
 
+        upload = attachment_data.pop('source_code_upload', None)
+        if upload is not None:
+            attachment_data['source_code'] = upload.file.name
         PrototypeAttachment.objects.create(prototype=prototype, **attachment_data)
+        if upload is not None:
+            upload.status = 'attached'
+            upload.prototype = prototype
+            upload.save(update_fields=['status', 'prototype'])
         return prototype
 
+class PrototypeSummarySerializer:
+    """
+    Flat, read-only prototype rows for table views: ?view=summary or ?fields=a,b,c on the
+    list endpoint. Works on dicts from queryset.values(), so rows are never turned into
+    model instances and no nested serializer runs. Related objects appear as flat
+    *_code/*_name/*_id columns instead of nested objects.
+    """
+    # Output field -> ORM lookup passed to .values()
+    FIELDS = {
+        'id': 'id',
+        'title': 'title',
+        'abstract': 'abstract',
+        'academic_year': 'academic_year',
+        'status': 'status',
+        'submission_date': 'submission_date',
+        'last_modified': 'last_modified',
+        'has_physical_prototype': 'has_physical_prototype',
+        'barcode': 'barcode',
+        'storage_location': 'storage_location',
+        'research_group': 'research_group',
+        'project_link': 'project_link',
+        'department_id': 'department_id',
+        'department_code': 'department__code',
+        'student_id': 'student_id',
+        'student_name': 'student__full_name',
+        'reviewer_id': 'reviewer_id',
+        'reviewer_name': 'reviewer__full_name',
+    }
+    SUMMARY_FIELDS = [
+        'id', 'title', 'academic_year', 'status', 'submission_date',
+        'has_physical_prototype', 'barcode', 'storage_location', 'department_code', 'student_name',
+    ]
+
+    def __init__(self, rows, fields):
+        self.rows = rows
+        self.fields = fields
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        """Field list asked for by the query string, or None for the full representation"""
+        if 'fields' in query_params:
+            fields = [field.strip() for field in query_params['fields'].split(',') if field.strip()]
+            unknown = [field for field in fields if field not in cls.FIELDS]
+            if unknown or not fields:
+                raise serializers.ValidationError({
+                    'fields': f'Unknown field(s): {", ".join(unknown)}. Choose from: {", ".join(cls.FIELDS)}.'
+                })
+            return list(dict.fromkeys(fields))
+        if query_params.get('view') == 'summary':
+            return cls.SUMMARY_FIELDS
+        return None
+
+    @classmethod
+    def lookups(cls, fields, extra=()):
+        """Lookups to pass to .values(), extra adds columns pagination needs"""
+        return list(dict.fromkeys([cls.FIELDS[field] for field in fields] + list(extra)))
+
+    @property
+    def data(self):
+        lookups = [(field, self.FIELDS[field]) for field in self.fields]
+        return [{field: row[lookup] for field, lookup in lookups} for row in self.rows]
+
+
 class PrototypeReviewSerializer(serializers.Serializer):
     feedback = serializers.CharField(required=True)
     status = serializers.ChoiceField(choices=[
@@ -152,4 +270,108 @@ class GeneralUserRegistrationSerializer(serializers.ModelSerializer):
         )
         user.set_password(validated_data['password'])
         user.save()
-        return user
\ No newline at end of file
+        return user
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'status', 'prototype', 'params',
+            'error', 'created_at', 'finished_at', 'download_url',
+        ]
+        read_only_fields = ['id', 'status', 'error', 'created_at', 'finished_at']
+
+    def get_download_url(self, obj):
+        if obj.status != 'done':
+            return None
+        return reverse('export-job-download', args=[obj.pk], request=self.context.get('request'))
+
+    def validate(self, data):
+        if data['kind'] == 'prototype_report' and not data.get('prototype'):
+            raise serializers.ValidationError({'prototype': 'Prototype is required for a prototype report.'})
+        return data
+
+
+class UserImportJobSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(min_value=1, max_value=5000, required=False)
+
+    class Meta:
+        model = UserImportJob
+        fields = [
+            'id', 'file', 'status', 'chunk_size', 'next_row',
+            'success_count', 'error_count', 'errors', 'failure',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = [
+            'id', 'status', 'next_row', 'success_count', 'error_count',
+            'errors', 'failure', 'created_at', 'updated_at',
+        ]
+        extra_kwargs = {'file': {'write_only': True}}
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(min_value=1024, max_value=64 * 1024 * 1024, required=False)
+    size = serializers.IntegerField(min_value=1)
+    total_chunks = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'prototype', 'filename', 'size', 'chunk_size', 'sha256', 'status',
+            'total_chunks', 'received_chunks', 'created_at', 'expires_at',
+        ]
+        read_only_fields = ['id', 'status', 'created_at', 'expires_at']
+
+    def validate_filename(self, value):
+        if not value.lower().endswith('.zip'):
+            raise serializers.ValidationError('Source code must be a .zip archive.')
+        return value
+
+    def get_received_chunks(self, obj):
+        return [chunk.index for chunk in obj.chunks.all()]
+
+    def validate(self, data):
+        if data['size'] > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError({'size': f'Archives are limited to {settings.UPLOAD_MAX_SIZE} bytes.'})
+        data.setdefault('chunk_size', settings.UPLOAD_CHUNK_SIZE)
+
+        # Uploading to an existing prototype replaces its source code on finalize
+        prototype = data.get('prototype')
+        user = self.context['request'].user
+        if prototype is not None:
+            if prototype.student_id != user.pk and user.role not in ['staff', 'admin']:
+                raise serializers.ValidationError({'prototype': 'You cannot change this prototype.'})
+            if not hasattr(prototype, 'attachment'):
+                raise serializers.ValidationError({'prototype': 'This prototype has no attachment to update.'})
+        return data
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """/api/token/ with the user claims of ClaimsRefreshToken"""
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    /api/token/refresh/ for ClaimsRefreshToken. With BLACKLIST_AFTER_ROTATION the old refresh
+    token is revoked before a new one is issued, a token that was already used is refused.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        data = {'access': str(refresh.access_token)}
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION and not refresh.blacklist():
+                raise TokenError('Token is blacklisted')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
@@ -0,0 +1,99 @@
+import os
+import zipfile
+from collections import Counter
+
+from django.conf import settings
+from pypdf import PdfReader
+
+# Source file extensions counted per language, everything else is ignored in the breakdown
+LANGUAGE_EXTENSIONS = {
+    '.py': 'Python', '.ipynb': 'Python',
+    '.js': 'JavaScript', '.jsx': 'JavaScript', '.mjs': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript',
+    '.java': 'Java', '.kt': 'Kotlin', '.dart': 'Dart', '.swift': 'Swift',
+    '.c': 'C', '.h': 'C', '.cpp': 'C++', '.cc': 'C++', '.hpp': 'C++', '.ino': 'Arduino',
+    '.cs': 'C#', '.go': 'Go', '.rs': 'Rust', '.rb': 'Ruby', '.php': 'PHP',
+    '.m': 'MATLAB', '.r': 'R', '.scala': 'Scala',
+    '.html': 'HTML', '.css': 'CSS', '.scss': 'CSS', '.vue': 'Vue', '.sql': 'SQL', '.sh': 'Shell',
+}
+
+
+# Results for a file that could not be read. Every field is returned either way, so the
+# results of a replaced file never outlive it in AttachmentMetadata.
+EMPTY_ZIP_RESULT = {
+    'zip_file_count': None,
+    'zip_compressed_size': None,
+    'zip_uncompressed_size': None,
+    'zip_compression_ratio': None,
+    'zip_languages': {},
+    'primary_language': '',
+}
+EMPTY_PDF_RESULT = {'pdf_pages': None, 'pdf_text': ''}
+
+
+def inspect_zip(fileobj):
+    """
+    Summarise a ZIP archive from its central directory only, nothing is extracted or
+    decompressed. Returns a dict of all AttachmentMetadata zip_* fields plus 'problems'.
+    """
+    try:
+        with zipfile.ZipFile(fileobj) as archive:
+            entries = [info for info in archive.infolist() if not info.is_dir()]
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError) as e:
+        return {**EMPTY_ZIP_RESULT, 'zip_valid': False, 'problems': [f'Not a readable ZIP archive: {e}']}
+
+    compressed = sum(info.compress_size for info in entries)
+    uncompressed = sum(info.file_size for info in entries)
+    ratio = uncompressed / compressed if compressed else 0.0
+
+    languages = Counter()
+    problems = []
+    for info in entries:
+        language = LANGUAGE_EXTENSIONS.get(os.path.splitext(info.filename)[1].lower())
+        if language:
+            languages[language] += 1
+        if info.filename.startswith('/') or '..' in info.filename.replace('\\', '/').split('/'):
+            problems.append(f'Unsafe path in archive: {info.filename}')
+        if info.compress_size and info.file_size / info.compress_size > settings.ZIP_MAX_COMPRESSION_RATIO:
+            problems.append(f'Suspicious compression ratio for {info.filename}')
+
+    if ratio > settings.ZIP_MAX_COMPRESSION_RATIO:
+        problems.append(f'Archive expands {ratio:.0f}x, limit is {settings.ZIP_MAX_COMPRESSION_RATIO}x')
+    if uncompressed > settings.ZIP_MAX_UNCOMPRESSED_SIZE:
+        problems.append(f'Archive expands to {uncompressed} bytes, limit is {settings.ZIP_MAX_UNCOMPRESSED_SIZE}')
+
+    return {
+        'zip_valid': True,
+        'zip_file_count': len(entries),
+        'zip_compressed_size': compressed,
+        'zip_uncompressed_size': uncompressed,
+        'zip_compression_ratio': round(ratio, 2),
+        'zip_languages': dict(languages.most_common()),
+        'primary_language': languages.most_common(1)[0][0] if languages else '',
+        'problems': problems,
+    }
+
+
+def inspect_pdf(fileobj):
+    """Page count and the text of the first pages, up to PDF_TEXT_MAX_CHARS characters"""
+    try:
+        reader = PdfReader(fileobj)
+        if reader.is_encrypted:
+            return {**EMPTY_PDF_RESULT, 'pdf_valid': True, 'problems': ['PDF is encrypted']}
+        page_count = len(reader.pages)
+        text, length = [], 0
+        for page in reader.pages:
+            if length >= settings.PDF_TEXT_MAX_CHARS:
+                break
+            page_text = page.extract_text() or ''
+            text.append(page_text)
+            length += len(page_text)
+    except Exception as e:  # pypdf raises many different errors for malformed files
+        return {**EMPTY_PDF_RESULT, 'pdf_valid': False, 'problems': [f'Not a readable PDF: {e}']}
+
+    return {
+        'pdf_valid': True,
+        'pdf_pages': page_count,
+        'pdf_text': '\n'.join(text)[:settings.PDF_TEXT_MAX_CHARS],
+        'problems': [],
+    }
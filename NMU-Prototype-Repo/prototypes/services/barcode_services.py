@@ -1,9 +1,88 @@
 # services/barcode_service.py
 from barcode import Code128
 from barcode.writer import ImageWriter
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+from io import BytesIO
+import hashlib
 import os
 
-def generate_barcode(prototype_id):
-    barcode = Code128(f'NM-{prototype_id}', writer=ImageWriter())
-    filename = barcode.save(os.path.join('media', 'barcodes', f'NM-{prototype_id}'))
-    return filename
\ No newline at end of file
+# Rendering options are part of the cache key, so changing them never serves stale images
+BARCODE_OPTIONS = {'module_height': 8, 'font_size': 8, 'text_distance': 3, 'quiet_zone': 2, 'dpi': 150}
+
+# Label sheet layout: A4 at 150 dpi, 3 x 8 labels
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 60
+LABEL_COLUMNS = 3
+LABEL_ROWS = 8
+LABELS_PER_PAGE = LABEL_COLUMNS * LABEL_ROWS
+TITLE_LENGTH = 38
+
+
+def lookup_cache_key(code):
+    """Cache key of the compact by-barcode lookup response"""
+    return f'prototype:barcode:{code}'
+
+
+def _image_digest(code):
+    options = ','.join(f'{key}={value}' for key, value in sorted(BARCODE_OPTIONS.items()))
+    return hashlib.sha256(f'code128|{options}|{code}'.encode()).hexdigest()
+
+
+def generate_barcode(code):
+    """
+    Return the path of a Code128 PNG for code, rendering it only if it is not cached yet.
+    Images are stored under media/barcodes by the hash of the code and render options,
+    so every code is rendered once however many labels it appears on.
+    """
+    digest = _image_digest(code)
+    path = os.path.join(settings.MEDIA_ROOT, 'barcodes', digest[:2], f'{digest}.png')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            Code128(code, writer=ImageWriter()).write(f, options=BARCODE_OPTIONS)
+        os.replace(tmp_path, path)  # atomic, concurrent renders of the same code are harmless
+    return path
+
+
+def _label(prototype, width, height, font):
+    label = Image.new('RGB', (width, height), 'white')
+    barcode_image = Image.open(generate_barcode(prototype.barcode)).convert('RGB')
+    barcode_image.thumbnail((width - 10, height - 24))
+    label.paste(barcode_image, ((width - barcode_image.width) // 2, 2))
+
+    title = prototype.title if len(prototype.title) <= TITLE_LENGTH else prototype.title[:TITLE_LENGTH - 1] + '…'
+    draw = ImageDraw.Draw(label)
+    draw.text((width // 2, height - 4), title, fill='black', font=font, anchor='ms')
+    return label
+
+
+def render_label_sheet(prototypes, file_format='pdf'):
+    """
+    Lay out barcode labels for prototypes on A4 pages.
+    Returns PDF bytes with one page per 24 labels, or PNG bytes of the first page.
+    """
+    font = ImageFont.load_default()
+    label_width = (PAGE_SIZE[0] - 2 * PAGE_MARGIN) // LABEL_COLUMNS
+    label_height = (PAGE_SIZE[1] - 2 * PAGE_MARGIN) // LABEL_ROWS
+
+    pages = []
+    for index, prototype in enumerate(prototypes):
+        position = index % LABELS_PER_PAGE
+        if position == 0:
+            pages.append(Image.new('RGB', PAGE_SIZE, 'white'))
+        column, row = position % LABEL_COLUMNS, position // LABEL_COLUMNS
+        pages[-1].paste(
+            _label(prototype, label_width, label_height, font),
+            (PAGE_MARGIN + column * label_width, PAGE_MARGIN + row * label_height),
+        )
+    if not pages:
+        pages.append(Image.new('RGB', PAGE_SIZE, 'white'))
+
+    output = BytesIO()
+    if file_format == 'png':
+        pages[0].save(output, 'PNG', optimize=True)
+    else:
+        pages[0].save(output, 'PDF', resolution=150, save_all=True, append_images=pages[1:])
+    return output.getvalue()
@@ -0,0 +1,117 @@
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from prototypes.models import AttachmentMetadata, Blob, PrototypeAttachment, UploadSession
+from prototypes.services.previews import collect_stale_previews
+from prototypes.storage import BLOB_DIR, blob_storage, is_blob_name
+
+# Every FileField that stores its files in blob_storage, the references counted per blob
+BLOB_FIELDS = {
+    PrototypeAttachment: ('report', 'source_code'),
+    UploadSession: ('file',),
+}
+
+
+def blob_names(instance):
+    """Blob names referenced by a model instance, one entry per field"""
+    return [
+        getattr(instance, field).name for field in BLOB_FIELDS[type(instance)]
+        if is_blob_name(getattr(instance, field).name)
+    ]
+
+
+def retain(names):
+    for name in names:
+        blob, created = Blob.objects.get_or_create(
+            name=name,
+            defaults={'sha256': os.path.basename(name).split('.')[0], 'size': blob_storage.size(name), 'ref_count': 1},
+        )
+        if not created:
+            Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release(names):
+    """Drop one reference per name, unreferenced blobs are collected after the transaction commits"""
+    for name in names:
+        Blob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        transaction.on_commit(lambda name=name: collect_blob(name))
+
+
+def update_references(before, after):
+    """Adjust reference counts for an instance whose blob names changed from before to after"""
+    before, after = Counter(before), Counter(after)
+    retain(list((after - before).elements()))
+    release(list((before - after).elements()))
+
+
+def _is_past_grace(name):
+    """
+    Blobs younger than BLOB_GC_GRACE are kept even without references: a file can be saved
+    to storage (or re-used by a dedup hit, which refreshes its mtime) a moment before the
+    row that references it is saved.
+    """
+    try:
+        modified = os.path.getmtime(blob_storage.path(name))
+    except FileNotFoundError:
+        return True
+    return modified < time.time() - settings.BLOB_GC_GRACE.total_seconds()
+
+
+def collect_blob(name):
+    """Delete a blob and its file if it is no longer referenced, returns True if it was removed"""
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(name=name, ref_count=0).first()
+        if blob is None or not _is_past_grace(name):
+            return False
+        blob.delete()
+        blob_storage.remove_blob(name)
+    return True
+
+
+def find_existing(sha256, size, extension):
+    """A stored blob with this content, so a client declaring its checksum can skip the upload"""
+    return Blob.objects.filter(
+        sha256=sha256.lower(), size=size, name__endswith=extension, ref_count__gt=0,
+    ).first()
+
+
+def collect_garbage():
+    """
+    Recount every blob's references from the FileFields, then delete blobs and stray files
+    (interrupted saves, rows removed with queryset.delete()) that are unreferenced and past
+    the grace period, and report previews no attachment uses. Returns (recounted, removed).
+    """
+    counts = Counter()
+    for model, fields in BLOB_FIELDS.items():
+        for names in model.objects.values_list(*fields).iterator():
+            counts.update(name for name in names if is_blob_name(name))
+
+    recounted = 0
+    for blob in Blob.objects.iterator():
+        if blob.ref_count != counts[blob.name]:
+            Blob.objects.filter(pk=blob.pk).update(ref_count=counts[blob.name])
+            recounted += 1
+    for name in set(counts) - set(Blob.objects.filter(name__in=list(counts)).values_list('name', flat=True)):
+        if blob_storage.exists(name):
+            retain([name] * counts[name])
+
+    removed = sum(collect_blob(name) for name in Blob.objects.filter(ref_count=0).values_list('name', flat=True))
+
+    # Files without a Blob row, including temporary files of interrupted saves
+    root = blob_storage.path(BLOB_DIR)
+    known = set(Blob.objects.values_list('name', flat=True))
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            name = os.path.relpath(os.path.join(directory, filename), blob_storage.location).replace(os.sep, '/')
+            if name not in known and _is_past_grace(name):
+                os.remove(os.path.join(directory, filename))
+                removed += 1
+
+    live_previews = set(AttachmentMetadata.objects.exclude(preview_digest='').values_list('preview_digest', flat=True))
+    removed += collect_stale_previews(live_previews, settings.BLOB_GC_GRACE.total_seconds())
+    return recounted, removed
@@ -0,0 +1,181 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from prototypes.models import UploadChunk, UploadSession
+from prototypes.services.blobs import find_existing
+
+class UploadError(Exception):
+    pass
+
+
+class ChunkConflict(UploadError):
+    """Another request stored different content at the same chunk index"""
+
+
+class HashingReader:
+    """
+    File-like wrapper that hashes and counts the bytes read through it, so data can be
+    checksummed while a storage backend copies it, without holding it in memory.
+    `limit` stops reading one byte past the expected size to detect oversized input.
+    """
+
+    def __init__(self, stream, limit=None):
+        self.stream = stream
+        self.limit = limit
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        if self.limit is not None:
+            room = self.limit + 1 - self.size
+            if room <= 0:
+                return b''
+            size = room if size is None or size < 0 else min(size, room)
+        data = self.stream.read(size)
+        self.hash.update(data)
+        self.size += len(data)
+        return data
+
+
+class ChainedReader:
+    """Read several storage files one after the other as one stream"""
+
+    def __init__(self, field_files):
+        self.field_files = iter(field_files)
+        self.current = None
+
+    def read(self, size=-1):
+        while True:
+            if self.current is None:
+                field_file = next(self.field_files, None)
+                if field_file is None:
+                    return b''
+                self.current = field_file.open('rb')
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+
+def store_chunk(session, index, stream, sha256=None):
+    """
+    Write one chunk from stream straight to storage, replacing an earlier attempt at the
+    same index. Raises UploadError if the size or client checksum does not match, and
+    ChunkConflict if a concurrent request stored different content at this index.
+    """
+    if index >= session.total_chunks:
+        raise UploadError(f'Chunk index must be below {session.total_chunks}.')
+    expected = session.expected_chunk_size(index)
+
+    reader = HashingReader(stream, limit=expected)
+    name = f'{session.pk}/{index:06d}.part'  # under UploadChunk.file's upload_to
+    chunk = UploadChunk(session=session, index=index)
+    chunk.file.save(name, File(reader, name=name), save=False)
+    if reader.size != expected:
+        chunk.file.delete(save=False)
+        raise UploadError(f'Chunk {index} must be {expected} bytes, received {reader.size}.')
+    if sha256 and reader.hash.hexdigest() != sha256.lower():
+        chunk.file.delete(save=False)
+        raise UploadError(f'Chunk {index} does not match its SHA-256 checksum.')
+
+    chunk.size = reader.size
+    chunk.sha256 = reader.hash.hexdigest()
+    with transaction.atomic():
+        for previous in UploadChunk.objects.select_for_update().filter(session=session, index=index):
+            previous.file.delete(save=False)
+            previous.delete()
+        try:
+            with transaction.atomic():
+                chunk.save()
+        except IntegrityError:
+            # A concurrent PUT of this index saved its chunk after the lock above found none
+            chunk.file.delete(save=False)
+            stored = UploadChunk.objects.get(session=session, index=index)
+            if stored.sha256 != chunk.sha256:
+                raise ChunkConflict(f'Chunk {index} was stored with different content by another request.')
+            chunk = stored
+        UploadSession.objects.filter(pk=session.pk).update(expires_at=session_expiry())
+    return chunk
+
+
+def session_expiry():
+    return timezone.now() + settings.UPLOAD_SESSION_TTL
+
+
+def missing_chunks(session):
+    received = set(session.chunks.values_list('index', flat=True))
+    return [index for index in range(session.total_chunks) if index not in received]
+
+
+def assemble(session):
+    """
+    Concatenate the chunks into the final archive, streaming them through a SHA-256 hash,
+    delete the parts, and attach the archive to session.prototype if one was given.
+    """
+    missing = missing_chunks(session)
+    if missing:
+        raise UploadError(f'{len(missing)} chunk(s) missing, first missing index is {missing[0]}.')
+
+    chunks = list(session.chunks.all())
+    reader = HashingReader(ChainedReader(chunk.file for chunk in chunks))
+    filename = os.path.basename(session.filename)
+    session.file.save(filename, File(reader, name=filename), save=False)
+
+    digest = reader.hash.hexdigest()
+    if reader.size != session.size or (session.sha256 and digest != session.sha256.lower()):
+        # The stored blob has no reference and is removed by blobs.collect_garbage
+        session.file.name = ''
+        raise UploadError('Assembled file does not match the declared size or checksum.')
+
+    for chunk in chunks:
+        chunk.file.delete(save=False)
+    session.chunks.all().delete()
+    session.sha256 = digest
+    session.status = 'complete'
+    session.save(update_fields=['file', 'sha256', 'status'])
+
+    if session.prototype_id:
+        attach(session, session.prototype.attachment)
+    return session
+
+
+def complete_from_existing(session):
+    """
+    If the archive the client declared by checksum is already stored, complete the session
+    without any chunks. Returns True when the upload was skipped.
+    """
+    if not session.sha256:
+        return False
+    blob = find_existing(session.sha256, session.size, '.zip')
+    if blob is None:
+        return False
+    session.file.name = blob.name
+    session.status = 'complete'
+    session.save(update_fields=['file', 'status'])
+    if session.prototype_id:
+        attach(session, session.prototype.attachment)
+    return True
+
+
+def attach(session, attachment):
+    """Store a complete session's archive as the attachment's source code"""
+    attachment.source_code.name = session.file.name
+    attachment.save(update_fields=['source_code'])
+    session.status = 'attached'
+    session.save(update_fields=['status'])
+
+
+def discard(session):
+    """
+    Delete a session with its chunk files. Its archive is a shared blob, deleting the
+    session drops its reference and the blob goes once no attachment uses it either.
+    """
+    for chunk in session.chunks.all():
+        chunk.file.delete(save=False)
+    session.delete()
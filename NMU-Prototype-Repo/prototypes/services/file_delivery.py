@@ -0,0 +1,149 @@
+import hashlib
+import mimetypes
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag(name, size, modified):
+    return '"%s"' % hashlib.sha1(f'{name}:{size}:{modified}'.encode()).hexdigest()
+
+
+def _parse_range(header, size):
+    """
+    (start, end) for a single 'bytes=' range, None to send the whole file, or False when
+    the range cannot be satisfied. Multi-range requests are answered with the whole file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _range_is_current(if_range, etag, modified):
+    """If-Range holds either an ETag or a date, the range only applies if it still matches"""
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(modified) <= since
+
+
+def _iter_file(f, start, length):
+    try:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+async def _aiter_file(f, start, length):
+    """
+    _iter_file for ASGI servers. Django reads a synchronous iterator completely into memory
+    before sending it to an ASGI server, this reads each chunk in a worker thread instead.
+    """
+    read = sync_to_async(f.read, thread_sensitive=False)
+    try:
+        await sync_to_async(f.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(f.close, thread_sensitive=False)()
+
+
+def _is_asgi(request):
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def serve_file(request, field_file, filename=None, **options):
+    """Send the file of a FileField, see serve_stored_file"""
+    return serve_stored_file(request, field_file.storage, field_file.name, filename, **options)
+
+
+def serve_stored_file(request, storage, name, filename=None, as_attachment=True, cache_control='private, no-cache'):
+    """
+    Send a stored file with ETag/Last-Modified validation, single byte-range support and
+    optional hand-off to the front-end web server (ATTACHMENT_SENDFILE):
+    'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx, internal location
+    ATTACHMENT_ACCEL_PREFIX mapped to MEDIA_ROOT).
+    """
+    size = storage.size(name)
+    modified = storage.get_modified_time(name).timestamp()
+    etag = _etag(name, size, modified)
+    filename = filename or name.rsplit('/', 1)[-1]
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(modified))
+    if response is None:
+        handoff = getattr(settings, 'ATTACHMENT_SENDFILE', None)
+        if handoff:
+            # The web server reads the file and handles Range itself
+            response = HttpResponse(content_type=content_type)
+            if handoff == 'x-accel-redirect':
+                response['X-Accel-Redirect'] = settings.ATTACHMENT_ACCEL_PREFIX + quote(name)
+            else:
+                response['X-Sendfile'] = storage.path(name)
+        else:
+            byte_range = None
+            if request.method == 'GET' and 'HTTP_RANGE' in request.META and \
+                    _range_is_current(request.META.get('HTTP_IF_RANGE'), etag, modified):
+                byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+            elif byte_range is None and not _is_asgi(request):
+                # FileResponse streams the open file in block_size chunks and sets Content-Length
+                response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+                response.block_size = CHUNK_SIZE
+            elif byte_range is None:
+                response = FileResponse(_aiter_file(storage.open(name, 'rb'), 0, size), content_type=content_type)
+                response['Content-Length'] = str(size)
+            else:
+                start, end = byte_range
+                stream = _aiter_file if _is_asgi(request) else _iter_file
+                response = FileResponse(
+                    stream(storage.open(name, 'rb'), start, end - start + 1),
+                    status=206, content_type=content_type,
+                )
+                response['Content-Range'] = f'bytes {start}-{end}/{size}'
+                response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    response['Cache-Control'] = cache_control
+    return response
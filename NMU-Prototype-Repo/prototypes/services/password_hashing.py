@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import Throttled
+
+# Password checks of a process run on LOGIN_HASH_WORKERS threads, with at most LOGIN_HASH_QUEUE
+# more waiting. The request thread waits for its hash, so a login holds a request thread for the
+# full PBKDF2 time. The defaults keep workers plus queue below GUNICORN_THREADS (see settings.py):
+# once that many logins are hashing, further ones are refused straight away, and the remaining
+# request threads keep serving everything else.
+_lock = threading.Lock()
+_pool = None
+_slots = None
+
+
+class PasswordHashingBusy(Throttled):
+    default_detail = 'Too many logins in progress, try again in a moment.'
+
+    def __init__(self):
+        super().__init__(wait=1)
+
+
+def _executor():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_QUEUE)
+    return _pool, _slots
+
+
+def run(fn, *args):
+    """
+    fn(*args) on the hashing pool, waiting for the result. PasswordHashingBusy when the pool and
+    its queue are full.
+    """
+    pool, slots = _executor()
+    if not slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def _verify(password, encoded):
+    rehashed = []
+    is_correct = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return is_correct, rehashed[0] if rehashed else None
+
+
+def verify(password, encoded):
+    """
+    (is_correct, new_encoded): new_encoded is a fresh hash of a correct password whose stored
+    hash was made by another hasher or with other parameters than the preferred one, else None.
+    """
+    return run(_verify, password, encoded)
+
+
+def dummy_hash(password):
+    """Hash once for an unknown account, so it takes as long as checking a real one"""
+    run(make_password, password)
+
+
+def shutdown():
+    global _pool, _slots
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = _slots = None
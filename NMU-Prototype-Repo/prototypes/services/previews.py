@@ -0,0 +1,79 @@
+import hashlib
+import os
+import time
+
+import pypdfium2 as pdfium
+from PIL import Image
+from django.core.files.storage import default_storage
+
+from prototypes.storage import is_blob_name
+
+PREVIEW_DIR = 'previews'
+# Width in pixels of each rendered size, 'small' for card grids and 'large' for a page preview
+PREVIEW_SIZES = {'small': 320, 'large': 1024}
+PREVIEW_FORMATS = {'webp': ('WEBP', 'image/webp'), 'png': ('PNG', 'image/png')}
+
+
+def preview_name(digest, size, image_format):
+    """Stored name of a preview, image_format is the PREVIEW_FORMATS key it was rendered in"""
+    return f'{PREVIEW_DIR}/{digest[:2]}/{digest}_{size}.{image_format}'
+
+
+def file_digest(field_file):
+    """SHA-256 of a stored file, read from the name for content-addressed blobs"""
+    if is_blob_name(field_file.name):
+        return os.path.basename(field_file.name).split('.')[0]
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_previews(field_file, digest, image_format):
+    """
+    Render the first page of a report PDF at every PREVIEW_SIZES width, as image_format, and
+    store the images under media/previews by the report's hash. Reports with the same content
+    share previews, and nothing is rendered if the images for this hash already exist.
+    """
+    names = {size: preview_name(digest, size, image_format) for size in PREVIEW_SIZES}
+    if all(default_storage.exists(name) for name in names.values()):
+        return names
+
+    # pdfium reads the parts of the report it needs from the file, it is never loaded whole
+    with field_file.open('rb') as f:
+        try:
+            source = field_file.path
+        except NotImplementedError:  # storage without local files
+            source = f.file
+        document = pdfium.PdfDocument(source)
+        try:
+            page = document[0]
+            largest = max(PREVIEW_SIZES.values())
+            image = page.render(scale=largest / page.get_width()).to_pil().convert('RGB')
+        finally:
+            document.close()
+
+    pil_format = PREVIEW_FORMATS[image_format][0]
+    for size, width in PREVIEW_SIZES.items():
+        resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        path = default_storage.path(names[size])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        resized.save(tmp_path, pil_format, quality=80)
+        os.replace(tmp_path, path)  # atomic, a concurrent render of the same report is harmless
+    return names
+
+
+def collect_stale_previews(live_digests, grace_seconds):
+    """Delete preview images of reports that no metadata row refers to any more"""
+    root = default_storage.path(PREVIEW_DIR)
+    removed = 0
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            digest = filename.split('_')[0]
+            if digest not in live_digests and os.path.getmtime(path) < time.time() - grace_seconds:
+                os.remove(path)
+                removed += 1
+    return removed
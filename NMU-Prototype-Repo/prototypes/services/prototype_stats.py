@@ -0,0 +1,129 @@
+import json
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from prototypes.models import Prototype, PrototypeStat
+
+# Prototype counts are kept for all 32 combinations of these dimensions (PrototypeStat rows).
+# A row holds the count for one value of each dimension in its grouping, summed over all
+# values of the others, so any breakdown with any filters is read directly from the rows of
+# one grouping, however many prototypes there are. signals.py applies every prototype save
+# and delete, `python manage.py rebuild_prototype_stats` recounts everything after bulk
+# changes that bypass signals (queryset.update(), bulk_create()).
+DIMENSIONS = ('department', 'research_group', 'academic_year', 'status', 'has_physical_prototype')
+FIELDS = {
+    'department': 'department_id',
+    'research_group': 'research_group',
+    'academic_year': 'academic_year',
+    'status': 'status',
+    'has_physical_prototype': 'has_physical_prototype',
+}
+GROUPINGS = range(2 ** len(DIMENSIONS))
+
+
+def grouping(dimensions):
+    return sum(1 << DIMENSIONS.index(dimension) for dimension in dimensions)
+
+
+def _values(row):
+    values = {dimension: row[field] for dimension, field in FIELDS.items()}
+    values['research_group'] = values['research_group'] or None  # blank and null both mean none
+    return values
+
+
+def dimension_values(prototype):
+    return _values({field: getattr(prototype, field) for field in FIELDS.values()})
+
+
+def stored_values(pk):
+    """
+    dimension_values of the prototype as saved in the database, None if it is not there. The
+    row stays locked until the transaction ends, so call it in the one that moves the counts.
+    """
+    row = Prototype.objects.select_for_update().filter(pk=pk).values(*FIELDS.values()).first()
+    return row and _values(row)
+
+
+def cell(mask, values):
+    """(key, columns) of the row with grouping mask that prototypes with these values count in"""
+    columns = {
+        FIELDS[dimension]: values[dimension] if mask & (1 << i) else None
+        for i, dimension in enumerate(DIMENSIONS)
+    }
+    return json.dumps([mask, *columns.values()]), columns
+
+
+def _add(mask, values, delta):
+    key, columns = cell(mask, values)
+    if PrototypeStat.objects.filter(key=key).update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            PrototypeStat.objects.create(grouping=mask, key=key, count=delta, **columns)
+    except IntegrityError:
+        # Created by a concurrent save in the meantime
+        PrototypeStat.objects.filter(key=key).update(count=F('count') + delta)
+
+
+def apply(old_values, new_values):
+    """
+    Move a prototype from the rows of old_values to those of new_values (either may be None,
+    for a new or deleted prototype). Rows whose dimensions did not change are left alone.
+    """
+    with transaction.atomic():
+        for mask in GROUPINGS:
+            old = old_values and cell(mask, old_values)[0]
+            new = new_values and cell(mask, new_values)[0]
+            if old == new:
+                continue
+            if old_values:
+                _add(mask, old_values, -1)
+            if new_values:
+                _add(mask, new_values, 1)
+
+
+def rebuild(prototype_model=Prototype, stat_model=PrototypeStat):
+    """
+    Recount every row from the prototypes table, returns the number of rows. Migrations pass
+    their historical models.
+    """
+    detailed = prototype_model.objects.order_by().values(*FIELDS.values()).annotate(count=Count('id'))
+    counts = Counter()
+    cells = {}
+    for row in detailed:
+        values = _values(row)
+        for mask in GROUPINGS:
+            key, columns = cell(mask, values)
+            counts[key] += row['count']
+            cells[key] = (mask, columns)
+
+    with transaction.atomic():
+        stat_model.objects.all().delete()
+        stat_model.objects.bulk_create(
+            (stat_model(grouping=cells[key][0], key=key, count=count, **cells[key][1]) for key, count in counts.items()),
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+def breakdown(by, filters):
+    """
+    Prototype counts broken down by the dimensions in by, counting only prototypes whose
+    dimensions equal filters. Returns a list of {dimension: value, ..., 'count'}, department
+    values are department codes.
+    """
+    rows = PrototypeStat.objects.filter(grouping=grouping({*by, *filters}), count__gt=0)
+    for dimension, value in filters.items():
+        if dimension == 'department':
+            rows = rows.filter(department__code=value)
+        else:
+            rows = rows.filter(**{FIELDS[dimension]: value})
+
+    columns = ['department__code' if dimension == 'department' else FIELDS[dimension] for dimension in by]
+    results = [
+        {**{dimension: row[column] for dimension, column in zip(by, columns)}, 'count': row['count']}
+        for row in rows.values('count', *columns)
+    ]
+    return sorted(results, key=lambda row: tuple((row[d] is None, str(row[d])) for d in by))
@@ -4,20 +4,34 @@ import tempfile
 import os
 from django.conf import settings
 
-def generate_prototype_report(prototype):
+TEMP_REPORTS_DIR = 'temp_reports'
+
+
+def temp_report_path(filename):
+    """Absolute path for a generated file under MEDIA_ROOT/temp_reports"""
+    temp_dir = os.path.join(settings.MEDIA_ROOT, TEMP_REPORTS_DIR)
+    os.makedirs(temp_dir, exist_ok=True)
+    return os.path.join(temp_dir, filename)
+
+
+def render_prototypes_pdf(prototypes, output_file=None):
+    """Render the prototype list export, returns bytes unless output_file is given"""
+    html_content = render_to_string("export_template.html", {"prototypes": prototypes})
+    return HTML(string=html_content).write_pdf(output_file)
+
+
+def generate_prototype_report(prototype, output_file=None):
     """Generate PDF report for a prototype"""
     context = {
         'prototype': prototype,
-        'attachments': prototype.attachments.all()
+        'attachment': getattr(prototype, 'attachment', None),
     }
     
     html_string = render_to_string('reports/prototype_report.html', context)
     html = HTML(string=html_string, base_url=settings.BASE_DIR)
     
-    temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_reports')
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    output_file = os.path.join(temp_dir, f'report_{prototype.barcode}.pdf')
+    if output_file is None:
+        output_file = temp_report_path(f'report_{prototype.barcode or prototype.pk}.pdf')
     html.write_pdf(output_file)
     
-    return output_file
\ No newline at end of file
+    return output_file
@@ -0,0 +1,155 @@
+import re
+
+from django.db import connection, connections, router
+from django.db.models import Q
+
+from prototypes.models import Prototype
+
+# Full-text index over title, abstract and the names of the student and supervisors.
+# SQLite keeps it in an FTS5 virtual table keyed by prototype id (rowid), PostgreSQL in a
+# table holding a weighted tsvector with a GIN index. Both are created by migration 0006
+# and kept in sync by the receivers in prototypes/signals.py. Other databases fall back
+# to icontains filtering. Terms are matched as prefixes without stemming ('unicode61' /
+# 'simple'), stemming the prefix of a name like "Mwaky" would stop it matching "Mwakyusa".
+SEARCH_TABLE = 'prototypes_search'
+
+SQLITE_INDEX_SQL = {
+    'delete': f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+    'insert': f'INSERT INTO {SEARCH_TABLE} (rowid, title, abstract, people) VALUES (%s, %s, %s, %s)',
+    'count': f'SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+    # bm25 weights per column: title, abstract, people. Lower scores rank higher.
+    'search': (
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+        f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0), rowid LIMIT %s OFFSET %s'
+    ),
+}
+
+POSTGRES_INDEX_SQL = {
+    'delete': f'DELETE FROM {SEARCH_TABLE} WHERE prototype_id = %s',
+    'insert': (
+        f'INSERT INTO {SEARCH_TABLE} (prototype_id, document) VALUES (%s, '
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'C') || "
+        "setweight(to_tsvector('simple', %s), 'B')) "
+        'ON CONFLICT (prototype_id) DO UPDATE SET document = EXCLUDED.document'
+    ),
+    'count': f"SELECT count(*) FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+    'search': (
+        f"SELECT prototype_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query "
+        'WHERE document @@ query ORDER BY ts_rank_cd(document, query) DESC, prototype_id LIMIT %s OFFSET %s'
+    ),
+}
+
+
+def _index_sql():
+    return {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRES_INDEX_SQL}.get(connection.vendor)
+
+
+def is_supported():
+    return _index_sql() is not None
+
+
+def _person_name(user):
+    return user.full_name or user.username
+
+
+def document_fields(prototype):
+    """(title, abstract, people) text stored in the index for a prototype"""
+    people = [_person_name(prototype.student)]
+    people += [_person_name(supervisor) for supervisor in prototype.supervisors.all()]
+    return prototype.title, prototype.abstract, ' '.join(people)
+
+
+def index_prototype(prototype):
+    sql = _index_sql()
+    if sql is None:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(sql['delete'], [prototype.pk])
+        cursor.execute(sql['insert'], [prototype.pk, *document_fields(prototype)])
+
+
+def remove_prototype(prototype_id):
+    sql = _index_sql()
+    if sql is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql['delete'], [prototype_id])
+
+
+def reindex_prototypes(queryset):
+    for prototype in queryset.select_related('student').prefetch_related('supervisors').iterator(chunk_size=500):
+        index_prototype(prototype)
+
+
+def rebuild_index():
+    """Re-create every index entry, returns the number of prototypes indexed"""
+    sql = _index_sql()
+    if sql is None:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    reindex_prototypes(Prototype.objects.all())
+    return Prototype.objects.count()
+
+
+def _match_expression(terms):
+    """Turn user input into a prefix-matching AND query, never passing raw syntax through"""
+    tokens = re.findall(r'\w+', terms.lower())
+    if not tokens:
+        return None
+    if connection.vendor == 'sqlite':
+        return ' '.join(f'"{token}"*' for token in tokens)
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+class SearchResults:
+    """
+    Lazy, ranked search result list. Supports count() and slicing, so it can be handed
+    to a Django Paginator: only the requested page of ids is read from the index and
+    only those prototypes are loaded, through `hydrate`.
+    """
+
+    def __init__(self, terms, hydrate):
+        self.expression = _match_expression(terms)
+        self.hydrate = hydrate
+        self.sql = _index_sql()
+        # Raw queries bypass the database routers, ask them which database to search
+        self.db = router.db_for_read(Prototype)
+
+    def count(self):
+        if self.expression is None:
+            return 0
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(self.sql['count'], [self.expression])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice):
+            return self[page:page + 1][0]
+        if self.expression is None:
+            return []
+        start = page.start or 0
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(self.sql['search'], [self.expression, page.stop - start, start])
+            ids = [row[0] for row in cursor.fetchall()]
+        prototypes = {prototype.pk: prototype for prototype in self.hydrate(Prototype.objects.filter(pk__in=ids))}
+        return [prototypes[pk] for pk in ids if pk in prototypes]
+
+
+def search_prototypes(terms, hydrate=lambda queryset: queryset):
+    """Ranked results for terms, or an icontains queryset where no full-text index exists"""
+    if is_supported():
+        return SearchResults(terms, hydrate)
+
+    query = Q()
+    for token in re.findall(r'\w+', terms):
+        query &= (
+            Q(title__icontains=token) | Q(abstract__icontains=token) |
+            Q(student__full_name__icontains=token) | Q(supervisors__full_name__icontains=token)
+        )
+    return hydrate(Prototype.objects.filter(query).distinct()).order_by('-submission_date', 'id')
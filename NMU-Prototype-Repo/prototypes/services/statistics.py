@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.db.models import Count, DateField, F
+from django.db.models.functions import ExtractWeekDay, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from prototypes.models import Prototype
+
+WINDOWS = (7, 30, 365)
+GROUPINGS = ('day', 'week', 'month', 'weekday', 'department', 'research_group')
+
+DAYS_OF_WEEK = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+# ExtractWeekDay numbers days 1 (Sunday) to 7 (Saturday) on every backend
+WEEKDAY_NAMES = {1: 'Sun', 2: 'Mon', 3: 'Tue', 4: 'Wed', 5: 'Thu', 6: 'Fri', 7: 'Sat'}
+
+# Expression to group by for each grouping, every one is evaluated by the database
+BUCKET_EXPRESSIONS = {
+    'day': lambda: TruncDate('submission_date'),
+    'week': lambda: TruncWeek('submission_date', output_field=DateField()),
+    'month': lambda: TruncMonth('submission_date', output_field=DateField()),
+    'weekday': lambda: ExtractWeekDay('submission_date'),
+    'department': lambda: F('department__code'),
+    'research_group': lambda: F('research_group'),
+}
+
+
+def submission_counts(window_days=30, group_by='day', queryset=None):
+    """
+    Count prototypes submitted in the last window_days, grouped in the database.
+    Returns a list of {'bucket', 'uploads'} ordered by bucket. Date buckets are ISO dates
+    (weeks start on Monday), weekday buckets are 'Mon'..'Sun' with every day present,
+    department buckets are department codes. Other groupings omit empty buckets.
+    """
+    if queryset is None:
+        queryset = Prototype.objects.all()
+    since = timezone.now() - timedelta(days=window_days)
+
+    rows = (
+        queryset
+        .filter(submission_date__gte=since)
+        .annotate(bucket=BUCKET_EXPRESSIONS[group_by]())
+        .values('bucket')
+        .annotate(uploads=Count('id'))
+        .order_by('bucket')
+    )
+
+    if group_by == 'weekday':
+        counts = {WEEKDAY_NAMES[row['bucket']]: row['uploads'] for row in rows}
+        return [{'bucket': day, 'uploads': counts.get(day, 0)} for day in DAYS_OF_WEEK]
+
+    results = []
+    for row in rows:
+        bucket = row['bucket']
+        if hasattr(bucket, 'isoformat'):
+            bucket = bucket.isoformat()
+        results.append({'bucket': bucket, 'uploads': row['uploads']})
+    return results
+
+
+def department_status_breakdown(queryset=None):
+    """Prototype counts per department and status, as a list of {'department', 'status', 'count'}"""
+    if queryset is None:
+        queryset = Prototype.objects.all()
+    rows = (
+        queryset
+        .values('department__code', 'status')
+        .annotate(count=Count('id'))
+        .order_by('department__code', 'status')
+    )
+    return [
+        {'department': row['department__code'], 'status': row['status'], 'count': row['count']}
+        for row in rows
+    ]
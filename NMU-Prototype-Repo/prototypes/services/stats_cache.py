@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = 'dashboard:generation'
+
+
+def _generation():
+    """
+    Token that is part of every dashboard cache key. Replacing it invalidates all
+    cached statistics at once, including per-student entries, without having to
+    know their keys. A timestamp is used so a token lost to cache eviction is never
+    reissued with a value older entries were stored under.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_dashboard_stats():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _key(generation, name, key_parts):
+    return ':'.join(['dashboard', str(generation), name, *map(str, key_parts)])
+
+
+def cached_stat(name, compute, *key_parts):
+    """Return the cached value for name/key_parts, computing and storing it on a miss"""
+    return cache.get_or_set(_key(_generation(), name, key_parts), compute, settings.DASHBOARD_CACHE_TTL)
+
+
+async def _ageneration():
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, time.time_ns(), None)
+        generation = await cache.aget(GENERATION_KEY)
+    return generation
+
+
+async def acached_stat(name, compute, *key_parts):
+    """cached_stat for async views, compute is a coroutine function"""
+    key = _key(await _ageneration(), name, key_parts)
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        await cache.aset(key, value, settings.DASHBOARD_CACHE_TTL)
+    return value
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from prototypes.models import RevokedToken
+
+# Revoked refresh token ids, in one of two stores picked by TOKEN_BLACKLIST_BACKEND:
+#
+#   cache     one key per token that expires together with it, so nothing ever has to be
+#             purged. Needs a cache shared by all workers (REDIS_URL).
+#   database  RevokedToken rows looked up by primary key, expired ones are deleted hourly by
+#             purge_revoked_tokens, so the table holds at most one refresh lifetime of rotations.
+#
+# Both check and revoke a token in a single key lookup or insert, whatever the store's size.
+
+
+def _key(jti):
+    return f'revoked-token:{jti}'
+
+
+def is_revoked(jti):
+    if settings.TOKEN_BLACKLIST_BACKEND == 'cache':
+        return cache.get(_key(jti)) is not None
+    return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+
+def revoke(jti, expires_at):
+    """Revoke a token until expires_at. False when it already was, so two requests cannot both use it."""
+    if settings.TOKEN_BLACKLIST_BACKEND == 'cache':
+        timeout = (expires_at - timezone.now()).total_seconds()
+        return timeout <= 0 or cache.add(_key(jti), 1, timeout)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def purge():
+    """Delete the expired rows of the database store, returns how many"""
+    count, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return count
@@ -0,0 +1,51 @@
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from prototypes.services.versions import table_version
+
+# pk -> (user, versions, expires). Per process, so authenticating a request does not hit the
+# database. An entry is dropped when its TTL runs out or the users/departments version changes:
+# signals.py bumps those whenever a user or department is saved, which invalidates every
+# process at once when the cache (REDIS_URL) is shared, and this process otherwise.
+_users = {}
+
+
+def current_versions():
+    return table_version('users'), table_version('departments')
+
+
+def cached_user(pk):
+    """The cached user with this pk, or None. Each caller gets its own copy of the instance."""
+    entry = _users.get(pk)
+    if entry is None:
+        return None
+    user, versions, expires = entry
+    if expires < time.monotonic() or versions != current_versions():
+        _users.pop(pk, None)
+        return None
+    return copy.copy(user)
+
+
+def remember(user, versions):
+    """Cache a user under the versions read before it was fetched, so a save in between is not missed"""
+    if len(_users) >= settings.USER_CACHE_SIZE:
+        _users.pop(next(iter(_users), None), None)  # oldest entry first
+    _users[user.pk] = (copy.copy(user), versions, time.monotonic() + settings.USER_CACHE_TTL)
+
+
+def get_user(pk):
+    """User by pk with its department loaded, from the cache or the database (None if missing)"""
+    user = cached_user(pk)
+    if user is None:
+        versions = current_versions()
+        user = get_user_model().objects.select_related('department').filter(pk=pk).first()
+        if user is not None:
+            remember(user, versions)
+    return user
+
+
+def clear():
+    _users.clear()
@@ -0,0 +1,352 @@
+import csv
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+import django
+import openpyxl
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from prototypes.models import CustomUser, Department
+from prototypes.services.versions import bump_version
+
+EXPECTED_COLUMNS = {
+    'email': ['email', 'e-mail', 'email_address'],
+    'full_name': ['full_name', 'name', 'fullname'],
+    'role': ['role', 'user_role', 'account_type'],
+    'phone': ['phone', 'phone_number', 'mobile'],
+    'department_code': ['department_code', 'dept_code', 'department'],
+    'institution_id': ['institution_id', 'id_number', 'student_id'],
+    'level': ['level', 'student_level', 'degree_level']
+}
+REQUIRED_COLUMNS = ['email', 'full_name', 'role', 'phone']
+VALID_ROLES = ['admin', 'staff', 'student']
+VALID_LEVELS = ['phd', 'masters']
+PHONE_REGEX = r'^\+?[0-9]{10,15}$'
+
+# Row layout of the sheet produced by UserImportTemplateView (1-based sheet rows)
+HEADER_ROW = 7
+DATA_START_ROW = 9
+
+BULK_CREATE_BATCH_SIZE = 500
+# Below this many passwords the process pool costs more to start than it saves
+POOL_HASH_THRESHOLD = 50
+# Process pool of hash_passwords, started on first use and kept for the life of the process,
+# so an import does not fork and set up Django in every worker again
+_pool = None
+_pool_lock = threading.Lock()
+# SQLite caps the size of an expression tree, so prefix lookups are OR-ed in batches
+PREFIX_QUERY_BATCH_SIZE = 200
+
+
+def map_columns(columns):
+    """
+    Match spreadsheet headers to the fields the importer understands.
+    Returns (column_mapping, missing_required_columns)
+    """
+    column_mapping = {}
+    missing_columns = []
+
+    for expected, alternatives in EXPECTED_COLUMNS.items():
+        for alt in alternatives:
+            if alt in columns:
+                column_mapping[expected] = alt
+                break
+        else:
+            if expected in REQUIRED_COLUMNS:
+                missing_columns.append(expected)
+
+    return column_mapping, missing_columns
+
+
+def normalize_header(header):
+    """Same normalisation BulkUserImportView applies to DataFrame columns"""
+    return str(header).strip().lower().replace(' ', '_') if header is not None else ''
+
+
+def _iter_raw_rows(file, file_format, min_row=1):
+    """Yield (sheet_row_number, values) without loading the whole sheet"""
+    if file_format == 'csv':
+        reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        for row_number, values in enumerate(reader, start=1):
+            if row_number >= min_row:
+                yield row_number, [value if value != '' else None for value in values]
+    else:
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            for row_number, values in enumerate(wb.active.iter_rows(min_row=min_row, values_only=True), start=min_row):
+                yield row_number, list(values)
+        finally:
+            wb.close()
+
+
+def read_headers(file, file_format):
+    """Normalised header names from the template's header row"""
+    for _, values in _iter_raw_rows(file, file_format, min_row=HEADER_ROW):
+        return [normalize_header(value) for value in values]
+    return []
+
+
+def iter_chunks(file, file_format, headers, start_row, chunk_size):
+    """
+    Yield (next_row, DataFrame) chunks of up to chunk_size data rows starting at sheet
+    row start_row. next_row is where to resume once the chunk is committed. Blank rows
+    are skipped, and the DataFrame index matches the index pd.read_excel would give.
+    """
+    rows = _iter_raw_rows(file, file_format, min_row=start_row)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        next_row = batch[-1][0] + 1
+        data = [
+            (values + [None] * len(headers))[:len(headers)]
+            for _, values in batch if any(value is not None for value in values)
+        ]
+        index = [
+            row_number - DATA_START_ROW
+            for row_number, values in batch if any(value is not None for value in values)
+        ]
+        yield next_row, pd.DataFrame(data, columns=headers, index=index, dtype=object)
+
+
+def _column(df, column_mapping, field):
+    if field in column_mapping:
+        return df[column_mapping[field]]
+    return pd.Series(pd.NA, index=df.index, dtype=object)
+
+
+def _clean_text(series):
+    """
+    Strip cell values, keeping missing cells missing. pd.read_excel reads a column without
+    any values as float NaN, the result is always object dtype so .str works on it.
+    """
+    series = series.astype(object)
+    return series.where(series.isna(), series.astype(str).str.strip())
+
+
+def _error_message(message):
+    # Same text the row-by-row importer produced with str(ValidationError(...))
+    return str(ValidationError(message))
+
+
+def _record(errors, mask, messages):
+    """Set the error for rows in mask that do not already have one (first failure wins)"""
+    mask = mask & errors.isna()
+    if isinstance(messages, pd.Series):
+        errors[mask] = messages[mask].map(_error_message)
+    else:
+        errors[mask] = _error_message(messages)
+
+
+def _existing_usernames(bases):
+    """Usernames already taken that could collide with base or base<N>"""
+    bases = list(bases)
+    taken = set(CustomUser.objects.filter(username__in=bases).values_list('username', flat=True))
+
+    # Only bases that are already taken need their numbered variants looked up
+    collided = [base for base in bases if base in taken]
+    for start in range(0, len(collided), PREFIX_QUERY_BATCH_SIZE):
+        query = Q()
+        for base in collided[start:start + PREFIX_QUERY_BATCH_SIZE]:
+            query |= Q(username__startswith=base)
+        taken.update(CustomUser.objects.filter(query).values_list('username', flat=True))
+    return taken
+
+
+def _unique_usernames(bases, taken):
+    usernames = []
+    for base in bases:
+        username = base
+        counter = 1
+        while username in taken:
+            username = f"{base}{counter}"
+            counter += 1
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def _hash_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        return _pool
+
+
+def hash_passwords(raw_passwords):
+    """
+    Hash passwords with the configured hasher. Large batches are spread over a
+    process pool because every hash is a full PBKDF2 run.
+    """
+    global _pool
+    raw_passwords = list(raw_passwords)
+    workers = getattr(settings, 'USER_IMPORT_HASH_WORKERS', os.cpu_count() or 1)
+    if workers <= 1 or len(raw_passwords) < POOL_HASH_THRESHOLD:
+        return [make_password(password) for password in raw_passwords]
+
+    chunksize = max(1, len(raw_passwords) // (workers * 4))
+    try:
+        return list(_hash_pool(workers).map(make_password, raw_passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died, start a new pool next time and hash this batch here
+        with _pool_lock:
+            _pool = None
+        return [make_password(password) for password in raw_passwords]
+
+
+def prepare_users(df, column_mapping):
+    """
+    Validate the rows of df and build unsaved users for the valid ones, passwords hashed.
+    Only reads from the database, so it runs outside the transaction that saves the users.
+    Returns (users, errors), where errors uses the per-row report format of
+    BulkUserImportView: {'row', 'error', 'data'}. Each user carries its report row as
+    import_row, for the errors of create_users.
+    """
+    email = _clean_text(_column(df, column_mapping, 'email'))
+    full_name = _column(df, column_mapping, 'full_name')
+    role = _clean_text(_column(df, column_mapping, 'role')).str.lower()
+    phone = _clean_text(_column(df, column_mapping, 'phone'))
+    department_code = _clean_text(_column(df, column_mapping, 'department_code'))
+    institution_id = _column(df, column_mapping, 'institution_id')
+    level = _clean_text(_column(df, column_mapping, 'level')).str.lower()
+
+    errors = pd.Series(None, index=df.index, dtype=object)
+
+    # Required field validation
+    _record(errors, email.isna(), 'Email is required')
+    _record(errors, full_name.isna(), 'Full name is required')
+    _record(errors, role.isna(), 'Role is required')
+    _record(errors, phone.isna(), 'Phone is required')
+
+    _record(errors, ~role.isin(VALID_ROLES),
+            'Invalid role: ' + role.astype(str) + '. Must be admin, staff, or student')
+
+    # Phone validation
+    _record(errors, ~phone.astype(str).str.match(PHONE_REGEX), 'Invalid phone number format')
+
+    # Department (optional)
+    codes = set(department_code.dropna())
+    departments = {dept.code: dept for dept in Department.objects.filter(code__in=codes)}
+    _record(errors, department_code.notna() & ~department_code.isin(departments.keys()),
+            'Department not found: ' + department_code.astype(str))
+
+    # Validate level if student
+    is_student = role == 'student'
+    _record(errors, is_student & level.isna(), 'Students require level (phd/masters)')
+    _record(errors, is_student & ~level.isin(VALID_LEVELS),
+            'Invalid level: ' + level.astype(str) + '. Must be phd or masters')
+
+    # Existing emails, plus repeats within the file after the first valid occurrence
+    existing_emails = set(
+        CustomUser.objects.filter(email__in=set(email.dropna())).values_list('email', flat=True)
+    )
+    valid = errors.isna()
+    repeated = pd.Series(False, index=df.index)
+    repeated[valid] = email[valid].duplicated(keep='first')
+    _record(errors, email.isin(existing_emails) | repeated, 'User with this email already exists')
+
+    valid = errors.isna()
+    rows = df.index[valid]
+
+    # Generate usernames from full_name
+    bases = full_name[valid].astype(str).str.lower().str.replace(r'\s+', '', regex=True).tolist()
+    usernames = _unique_usernames(bases, _existing_usernames(set(bases)))
+    passwords = hash_passwords(email[valid].tolist())
+
+    users = []
+    for i, index in enumerate(rows):
+        user_role = role[index]
+        user = CustomUser(
+            email=email[index],
+            username=usernames[i],
+            password=passwords[i],
+            full_name=str(full_name[index]).strip(),
+            role=user_role,
+            phone=phone[index],
+            department=departments.get(department_code[index]) if pd.notna(department_code[index]) else None,
+            institution_id=institution_id[index] if pd.notna(institution_id[index]) else '',
+            is_approved=True,
+            level=level[index] if user_role == 'student' else None,
+            is_staff=(user_role == 'admin'),
+        )
+        user.import_row = index + 2
+        users.append(user)
+
+    error_rows = [
+        {
+            'row': index + 2,
+            'error': errors[index],
+            'data': {k: v for k, v in df.loc[index].items() if pd.notna(v)}
+        }
+        for index in df.index[~valid]
+    ]
+    return users, error_rows
+
+
+def _insert_error(user):
+    if CustomUser.objects.filter(email=user.email).exists():
+        message = 'User with this email already exists'
+    else:
+        message = f'Username {user.username} was taken during the import, import this row again'
+    return {
+        'row': user.import_row,
+        'error': _error_message(message),
+        'data': {'email': user.email, 'full_name': user.full_name, 'role': user.role},
+    }
+
+
+def _create_each(users):
+    """Insert users one at a time, reporting the ones that hit a unique constraint"""
+    created, errors = 0, []
+    for user in users:
+        # The failed bulk insert may have set pks that were rolled back
+        user.pk = None
+        user._state.adding = True
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+            created += 1
+        except IntegrityError:
+            errors.append(_insert_error(user))
+    return created, errors
+
+
+def create_users(users):
+    """
+    Insert the users of prepare_users, returns (created_count, errors). prepare_users checks
+    emails and usernames outside the transaction, so a concurrent import can take some of
+    them first: the batch is then inserted row by row and only those rows are reported.
+    """
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=BULK_CREATE_BATCH_SIZE)
+        created, errors = len(users), []
+    except IntegrityError:
+        created, errors = _create_each(users)
+    # bulk_create sends no post_save, so signals.bump_user_version does not run. The other
+    # user receivers have nothing to do for new users: they are in no prototype's search
+    # entry yet, and the user cache only holds users that have authenticated.
+    if created:
+        bump_version('users')
+    return created, errors
+
+
+def import_users(df, column_mapping):
+    """
+    Validate and create the users in df in a few set-based queries, only the inserts run in
+    a transaction. Returns (success_count, errors), see prepare_users.
+    """
+    users, errors = prepare_users(df, column_mapping)
+    with transaction.atomic():
+        created, insert_errors = create_users(users)
+    return created, errors + insert_errors
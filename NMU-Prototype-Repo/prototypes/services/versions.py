@@ -0,0 +1,144 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from prototypes.models import Prototype
+
+# Per-table version tokens, replaced whenever a row of the table changes (see signals.py).
+# Like the dashboard generation, a lost token is replaced by a new timestamp, never reused.
+# Validators only use them with SHARED_CACHE: with a per-process cache, a bump in one worker
+# is never seen by the others, so those validators return None and the response is sent in full.
+TABLES = ('prototypes', 'users', 'departments')
+
+
+def _key(table):
+    return f'version:{table}'
+
+
+def table_version(table):
+    version = cache.get(_key(table))
+    if version is None:
+        cache.add(_key(table), time.time_ns(), None)
+        version = cache.get(_key(table))
+    return version
+
+
+def bump_version(*tables):
+    cache.set_many({_key(table): time.time_ns() for table in tables}, None)
+
+
+def changed_at(*tables):
+    """When any of the tables last changed: their version tokens are the times of the last bump"""
+    return datetime.fromtimestamp(max(table_version(table) for table in tables) / 1e9, tz=dt_timezone.utc)
+
+
+def _newest(*times):
+    return max(time for time in times if time is not None)
+
+
+def _etag(*parts):
+    return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _prototype_last_modified(request, pk):
+    """last_modified of one prototype, read once per request for both validators"""
+    if not hasattr(request, '_prototype_last_modified'):
+        request._prototype_last_modified = (
+            Prototype.objects.filter(pk=pk).values_list('last_modified', flat=True).first()
+        )
+    return request._prototype_last_modified
+
+
+def _prototype_state(request):
+    """(newest last_modified, row count) of the prototypes table, read once per request"""
+    if not hasattr(request, '_prototype_state'):
+        state = Prototype.objects.aggregate(newest=Max('last_modified'), count=Count('id'))
+        request._prototype_state = state['newest'], state['count']
+    return request._prototype_state
+
+
+# Prototype payloads nest users and departments, so their versions are part of every prototype ETag.
+# The user is included because list ordering depends on who asks. Lists may be read from a replica
+# (see routers.py): the newest last_modified it returns keeps a lagging replica's page from being
+# cached under the version tokens of writes it has not replayed yet. The row count changes on
+# deletes, which do not move the newest last_modified.
+# Last-Modified is the newest of the rows' last_modified and the times the tables in the
+# payload were last bumped, so deletions and user or department changes move it too.
+
+def prototype_etag(request, pk=None, **kwargs):
+    if not settings.SHARED_CACHE:
+        return None
+    last_modified = _prototype_last_modified(request, pk)
+    if last_modified is None:
+        return None
+    return _etag('prototype', pk, last_modified.isoformat(), table_version('users'),
+                 table_version('departments'), request.user.pk)
+
+
+def prototype_last_modified(request, pk=None, **kwargs):
+    if not settings.SHARED_CACHE:
+        return None
+    last_modified = _prototype_last_modified(request, pk)
+    if last_modified is None:
+        return None
+    return _newest(last_modified, changed_at('users', 'departments'))
+
+
+def prototype_list_etag(request, *args, **kwargs):
+    if not settings.SHARED_CACHE:
+        return None
+    newest, count = _prototype_state(request)
+    return _etag('prototypes', *(table_version(table) for table in TABLES),
+                 newest.isoformat() if newest else '', count, request.user.pk, request.get_full_path())
+
+
+def prototype_list_last_modified(request, *args, **kwargs):
+    if not settings.SHARED_CACHE:
+        return None
+    return _newest(_prototype_state(request)[0], changed_at(*TABLES))
+
+
+# Storage locations only depend on the prototypes table, so their ETag is read from the
+# database alone and holds whatever cache the process has.
+
+def storage_locations_etag(request, *args, **kwargs):
+    newest, count = _prototype_state(request)
+    return _etag('storage_locations', newest.isoformat() if newest else '', count)
+
+
+def storage_locations_last_modified(request, *args, **kwargs):
+    if not settings.SHARED_CACHE:
+        return None
+    return _newest(_prototype_state(request)[0], changed_at('prototypes'))
+
+
+def department_list_etag(request, *args, **kwargs):
+    if not settings.SHARED_CACHE:
+        return None
+    return _etag('departments', table_version('departments'), request.get_full_path())
+
+
+def conditional(etag_func, last_modified_func=None):
+    """
+    Decorator for viewset actions: answer If-None-Match / If-Modified-Since with 304 before
+    the action queries or serializes anything, and tell clients to revalidate every time.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(
+                lambda request, *args, **kwargs: view_method(self, request, *args, **kwargs)
+            )
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,181 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from django_q.tasks import async_task
+
+from .models import AttachmentMetadata, CustomUser, Department, Prototype, PrototypeAttachment
+from .services import blobs, prototype_stats, search
+from .services.versions import bump_version
+from .services.barcode_services import lookup_cache_key
+from .services.stats_cache import invalidate_dashboard_stats
+
+
+@receiver([post_save, post_delete], sender=Prototype)
+def prototype_changed(sender, instance, **kwargs):
+    """Drop cached dashboard statistics whenever a prototype is added, changed or removed"""
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=Prototype)
+def index_saved_prototype(sender, instance, **kwargs):
+    search.index_prototype(instance)
+
+
+@receiver(post_delete, sender=Prototype)
+def unindex_deleted_prototype(sender, instance, **kwargs):
+    search.remove_prototype(instance.pk)
+
+
+@receiver(m2m_changed, sender=Prototype.supervisors.through)
+def reindex_on_supervisor_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Supervisor names are part of the search document"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.index_prototype(instance)
+    else:
+        # instance is the user, pk_set the affected prototypes (None on clear)
+        queryset = Prototype.objects.filter(pk__in=pk_set) if pk_set else instance.supervising_prototypes.all()
+        search.reindex_prototypes(queryset)
+
+
+@receiver(post_save, sender=CustomUser)
+def reindex_on_user_rename(sender, instance, created, update_fields, **kwargs):
+    """Keep student and supervisor names in the search index current"""
+    if created or (update_fields is not None and not {'full_name', 'username'} & set(update_fields)):
+        return
+    search.reindex_prototypes(
+        Prototype.objects.filter(Q(student=instance) | Q(supervisors=instance)).distinct()
+    )
+
+
+@receiver([post_save, post_delete], sender=Prototype)
+def drop_cached_barcode_lookup(sender, instance, **kwargs):
+    """The by-barcode response includes storage location and status, drop it when they may change"""
+    if instance.barcode:
+        cache.delete(lookup_cache_key(instance.barcode))
+
+
+def _saves_stat_dimensions(update_fields):
+    if update_fields is None:
+        return True
+    saved = {Prototype._meta.get_field(name).attname for name in update_fields}
+    return bool(set(prototype_stats.FIELDS.values()) & saved)
+
+
+@receiver(pre_save, sender=Prototype)
+def remember_stat_dimensions(sender, instance, update_fields=None, **kwargs):
+    """Read the statistics dimensions stored before this save, post_save moves the counts"""
+    if instance._state.adding or not _saves_stat_dimensions(update_fields):
+        instance._stat_values_before = None
+        return
+    instance._stat_values_before = prototype_stats.stored_values(instance.pk)
+
+
+@receiver(post_save, sender=Prototype)
+def count_saved_prototype(sender, instance, created, update_fields=None, **kwargs):
+    if created or _saves_stat_dimensions(update_fields):
+        prototype_stats.apply(getattr(instance, '_stat_values_before', None), prototype_stats.dimension_values(instance))
+
+
+@receiver(pre_delete, sender=Prototype)
+def remember_deleted_stat_dimensions(sender, instance, **kwargs):
+    """Deletes send their signals in a transaction, the stored row is what leaves the counts"""
+    instance._stat_values_before = prototype_stats.stored_values(instance.pk)
+
+
+@receiver(post_delete, sender=Prototype)
+def uncount_deleted_prototype(sender, instance, **kwargs):
+    prototype_stats.apply(getattr(instance, '_stat_values_before', None), None)
+
+
+@receiver([post_save, post_delete], sender=Prototype)
+def bump_prototype_version(sender, instance, **kwargs):
+    bump_version('prototypes')
+
+
+def touch_prototypes(prototype_ids):
+    """
+    Changes to supervisors, attachments and their metadata show up in the prototype payload,
+    so they move last_modified (and the ETag of the prototype) forward as well.
+    """
+    Prototype.objects.filter(pk__in=prototype_ids).update(last_modified=timezone.now())
+    bump_version('prototypes')
+
+
+@receiver(m2m_changed, sender=Prototype.supervisors.through)
+def touch_on_supervisor_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch_prototypes([instance.pk])
+    elif pk_set:
+        touch_prototypes(pk_set)
+    else:
+        bump_version('prototypes')
+
+
+@receiver([post_save, post_delete], sender=PrototypeAttachment)
+def touch_on_attachment_change(sender, instance, **kwargs):
+    touch_prototypes([instance.prototype_id])
+
+
+@receiver([post_save, post_delete], sender=AttachmentMetadata)
+def touch_on_metadata_change(sender, instance, **kwargs):
+    touch_prototypes(PrototypeAttachment.objects.filter(pk=instance.attachment_id).values('prototype_id'))
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def bump_user_version(sender, instance, update_fields=None, **kwargs):
+    """Users are nested in prototype payloads, logins only touch last_login and are ignored"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_version('users')
+
+
+@receiver([post_save, post_delete], sender=Department)
+def bump_department_version(sender, instance, **kwargs):
+    bump_version('departments')
+
+
+@receiver(post_save, sender=PrototypeAttachment)
+def queue_attachment_processing(sender, instance, update_fields=None, **kwargs):
+    """Inspect new or replaced files in the background, see tasks.process_attachment"""
+    if update_fields is not None and not {'report', 'source_code'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: async_task(
+        'prototypes.tasks.process_attachment', instance.pk, task_name=f'attachment-{instance.pk}',
+    ))
+
+
+def _touches_blob_fields(sender, update_fields):
+    return update_fields is None or bool(set(blobs.BLOB_FIELDS[sender]) & set(update_fields))
+
+
+def remember_blob_names(sender, instance, update_fields=None, **kwargs):
+    """Read the blob names stored before this save, post_save compares them with the new ones"""
+    if instance._state.adding or not _touches_blob_fields(sender, update_fields):
+        instance._blob_names_before = None
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._blob_names_before = blobs.blob_names(previous) if previous else []
+
+
+def count_blob_references(sender, instance, created, update_fields=None, **kwargs):
+    before = getattr(instance, '_blob_names_before', None)
+    if not created and before is None:
+        return
+    blobs.update_references(before or [], blobs.blob_names(instance))
+
+
+def release_blob_references(sender, instance, **kwargs):
+    blobs.release(blobs.blob_names(instance))
+
+
+for model in blobs.BLOB_FIELDS:
+    pre_save.connect(remember_blob_names, sender=model, dispatch_uid=f'remember_blob_names_{model.__name__}')
+    post_save.connect(count_blob_references, sender=model, dispatch_uid=f'count_blob_references_{model.__name__}')
+    post_delete.connect(release_blob_references, sender=model, dispatch_uid=f'release_blob_references_{model.__name__}')
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'blobs'
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{extension}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/') and not name.startswith(f'{BLOB_DIR}/tmp/')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once under MEDIA_ROOT/blobs, named by the SHA-256 of its
+    content plus the original extension. The name passed to save() is only used for the
+    extension, so re-uploading identical bytes returns the existing name without a copy.
+    Blobs are shared, delete() leaves them alone: prototypes.services.blobs counts the
+    references to each one and removes it once nothing points at it.
+    Files saved before this storage was used keep their old names and behave as before.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # _save picks the final name, identical content is meant to map to the same file
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        tmp_dir = self.path(f'{BLOB_DIR}/tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    f.write(chunk)
+            name = blob_name(digest.hexdigest(), extension)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+                os.utime(path)  # a fresh mtime keeps the blob out of the garbage collector's grace window
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        if is_blob_name(name):
+            return
+        super().delete(name)
+
+    def remove_blob(self, name):
+        """Physically delete a blob, only for the garbage collector"""
+        super().delete(name)
+
+
+blob_storage = ContentAddressedStorage()
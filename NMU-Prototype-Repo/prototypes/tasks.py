@@ -0,0 +1,215 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .filters import PrototypeFilter
+from .models import AttachmentMetadata, ExportJob, Prototype, PrototypeAttachment, UploadSession, UserImportJob
+from .services.report_service import (
+    TEMP_REPORTS_DIR, temp_report_path,
+    render_prototypes_pdf, generate_prototype_report,
+)
+from .services.attachment_inspection import inspect_pdf, inspect_zip
+from .services.previews import file_digest, render_previews
+from .services.chunked_upload import discard
+from .services import token_blacklist
+from .services.user_import import (
+    DATA_START_ROW, read_headers, map_columns, iter_chunks, prepare_users, create_users,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def run_export_job(job_id):
+    """django-q task: render the file for an ExportJob and record the outcome"""
+    job = ExportJob.objects.select_related('prototype').get(pk=job_id)
+    job.status = 'running'
+    job.save(update_fields=['status'])
+
+    filename = f'{job.kind}_{job.pk}.pdf'
+    output_file = temp_report_path(filename)
+    try:
+        if job.kind == 'prototypes_pdf':
+            prototypes = PrototypeFilter(job.params, queryset=Prototype.objects.all()).qs
+            render_prototypes_pdf(prototypes, output_file)
+        elif job.kind == 'prototype_report':
+            prototype = (
+                Prototype.objects
+                .select_related('student', 'department', 'attachment')
+                .prefetch_related('supervisors')
+                .get(pk=job.prototype_id)
+            )
+            generate_prototype_report(prototype, output_file)
+        else:
+            raise ValueError(f'Unknown export kind: {job.kind}')
+
+        job.file.name = f'{TEMP_REPORTS_DIR}/{filename}'
+        job.status = 'done'
+    except Exception as e:
+        logger.error(f"Export job {job.pk} failed: {str(e)}", exc_info=True)
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file', 'error', 'finished_at'])
+    return job.status
+
+
+def purge_expired_exports():
+    """
+    Delete export jobs older than EXPORT_RETENTION together with their files, then remove
+    any stray files left in MEDIA_ROOT/temp_reports for longer than the retention period.
+    Scheduled hourly in django-q by migration 0014, also available as `python manage.py purge_exports`.
+    """
+    cutoff = timezone.now() - settings.EXPORT_RETENTION
+
+    expired = ExportJob.objects.filter(created_at__lt=cutoff)
+    job_count = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job_count += 1
+    expired.delete()
+
+    file_count = 0
+    temp_dir = os.path.join(settings.MEDIA_ROOT, TEMP_REPORTS_DIR)
+    if os.path.isdir(temp_dir):
+        cutoff_ts = time.time() - settings.EXPORT_RETENTION.total_seconds()
+        live_files = {
+            os.path.basename(name)
+            for name in ExportJob.objects.exclude(file='').values_list('file', flat=True)
+        }
+        for entry in os.scandir(temp_dir):
+            if entry.is_file() and entry.name not in live_files and entry.stat().st_mtime < cutoff_ts:
+                os.remove(entry.path)
+                file_count += 1
+
+    return job_count, file_count
+
+
+def purge_expired_uploads():
+    """
+    Delete upload sessions past their expires_at with their chunk files, and any assembled
+    archive that was never attached to a prototype. Scheduled hourly in django-q by
+    migration 0007, also available as `python manage.py purge_uploads`.
+    """
+    expired = list(UploadSession.objects.filter(expires_at__lt=timezone.now()))
+    for session in expired:
+        discard(session)
+    return len(expired)
+
+
+def purge_revoked_tokens():
+    """
+    Delete revoked refresh tokens that have expired anyway. Scheduled hourly in django-q by
+    migration 0012, also available as `python manage.py purge_revoked_tokens`.
+    """
+    return token_blacklist.purge()
+
+
+MAX_STORED_IMPORT_ERRORS = 100
+
+
+def run_user_import_job(job_id):
+    """
+    django-q task: import a UserImportJob's sheet chunk by chunk.
+    Each chunk is validated and hashed first, then its users and the job's progress are
+    committed in one transaction, so re-running the task after a failure resumes at the
+    first uncommitted row.
+    """
+    job = UserImportJob.objects.get(pk=job_id)
+    job.status = 'running'
+    job.failure = ''
+    job.save(update_fields=['status', 'failure', 'updated_at'])
+
+    file_format = 'csv' if job.file.name.lower().endswith('.csv') else 'xlsx'
+    try:
+        with job.file.open('rb') as f:
+            headers = read_headers(f, file_format)
+        column_mapping, missing_columns = map_columns(headers)
+        if missing_columns:
+            raise ValueError(f'Missing required columns: {", ".join(missing_columns)}')
+
+        start_row = job.next_row or DATA_START_ROW
+        with job.file.open('rb') as f:
+            for next_row, df in iter_chunks(f, file_format, headers, start_row, job.chunk_size):
+                users, errors = prepare_users(df, column_mapping) if len(df) else ([], [])
+                with transaction.atomic():
+                    created, insert_errors = create_users(users)
+                    errors = errors + insert_errors
+                    job.next_row = next_row
+                    job.success_count += created
+                    job.error_count += len(errors)
+                    room = MAX_STORED_IMPORT_ERRORS - len(job.errors)
+                    if room > 0:
+                        job.errors = job.errors + [
+                            {**error, 'data': {k: str(v) for k, v in error['data'].items()}}
+                            for error in errors[:room]
+                        ]
+                    job.save(update_fields=['next_row', 'success_count', 'error_count', 'errors', 'updated_at'])
+
+        job.status = 'done'
+    except Exception as e:
+        logger.error(f"User import {job.pk} stopped at row {job.next_row}: {str(e)}", exc_info=True)
+        job.status = 'failed'
+        job.failure = str(e)
+
+    job.save(update_fields=['status', 'failure', 'updated_at'])
+    return job.status
+
+
+def process_attachment(attachment_id):
+    """
+    django-q task: inspect an attachment's report and source archive and store the results
+    in AttachmentMetadata. A file whose name is unchanged since the last run is skipped,
+    blob names are content hashes so an unchanged name means unchanged content.
+    """
+    attachment = PrototypeAttachment.objects.filter(pk=attachment_id).first()
+    if attachment is None:
+        return 'missing'
+    metadata, _ = AttachmentMetadata.objects.get_or_create(attachment=attachment)
+    problems = dict(metadata.problems)
+
+    try:
+        if attachment.report and attachment.report.name != metadata.report_name:
+            with attachment.report.open('rb') as f:
+                result = inspect_pdf(f)
+            problems['report'] = result.pop('problems')
+            for field, value in result.items():
+                setattr(metadata, field, value)
+            metadata.preview_digest = metadata.preview_format = ''
+            if metadata.pdf_valid:
+                try:
+                    digest = file_digest(attachment.report)
+                    render_previews(attachment.report, digest, settings.PREVIEW_FORMAT)
+                    # Stored with the digest, so existing previews stay reachable when PREVIEW_FORMAT changes
+                    metadata.preview_digest, metadata.preview_format = digest, settings.PREVIEW_FORMAT
+                except Exception as e:
+                    logger.warning(f"No preview for attachment {attachment_id}: {str(e)}")
+                    problems['report'].append(f'Preview could not be rendered: {e}')
+            metadata.report_name = attachment.report.name
+
+        if attachment.source_code and attachment.source_code.name != metadata.source_code_name:
+            with attachment.source_code.open('rb') as f:
+                result = inspect_zip(f)
+            problems['source_code'] = result.pop('problems')
+            for field, value in result.items():
+                setattr(metadata, field, value)
+            metadata.is_suspicious = bool(metadata.zip_valid and problems['source_code'])
+            metadata.source_code_name = attachment.source_code.name
+
+        metadata.status = 'done'
+    except Exception as e:
+        logger.error(f"Processing attachment {attachment_id} failed: {str(e)}", exc_info=True)
+        problems['error'] = [str(e)]
+        metadata.status = 'failed'
+    else:
+        problems.pop('error', None)
+
+    metadata.problems = problems
+    metadata.processed_at = timezone.now()
+    metadata.save()
+    return metadata.status
@@ -1,3 +1,1614 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+import brotli
+import openpyxl
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .authentication import ClaimsRefreshToken
+from .filters import PrototypeFilter
+from .models import (
+    AttachmentMetadata, Blob, CustomUser, Department, ExportJob, Prototype, PrototypeAttachment,
+    PrototypeStat, RevokedToken, UploadChunk, UploadSession, UserImportJob,
+)
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, _replica_reads, replica_reads
+from .serializers import PrototypeSummarySerializer
+from .services import password_hashing, previews, prototype_stats, token_blacklist, user_cache, user_import
+from .services.barcode_services import generate_barcode
+from .services.versions import table_version
+from .services.blobs import collect_garbage
+from .tasks import (
+    process_attachment, purge_expired_exports, purge_expired_uploads, purge_revoked_tokens, run_export_job,
+    run_user_import_job,
+)
+
+
+class PrototypeTestMixin:
+    """Shared fixtures for prototype API tests"""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name='Computer Science', code='CS')
+        self.student = CustomUser.objects.create_user(
+            username='student', email='student@nmu.edu', password='pass12345',
+            role='student', level='masters', department=self.department,
+        )
+        self.staff = CustomUser.objects.create_user(
+            username='staff', email='staff@nmu.edu', password='pass12345',
+            role='staff', department=self.department,
+        )
+        self.admin = CustomUser.objects.create_user(
+            username='admin', email='admin@nmu.edu', password='pass12345',
+            role='admin', is_staff=True, department=self.department,
+        )
+        self.client = APIClient()
+
+    def make_prototypes(self, count, **kwargs):
+        prototypes = []
+        for i in range(count):
+            prototype = Prototype.objects.create(
+                student=self.student,
+                title=kwargs.get('title', f'Prototype {i}'),
+                abstract=kwargs.get('abstract', 'Abstract'),
+                department=self.department,
+                academic_year=kwargs.get('academic_year', '2024/2025'),
+                has_physical_prototype=kwargs.get('has_physical_prototype', True),
+                reviewer=self.staff,
+            )
+            prototype.supervisors.set([self.staff, self.admin])
+            PrototypeAttachment.objects.create(
+                prototype=prototype,
+                report=f'prototypes/reports/report_{prototype.pk}.pdf',
+                source_code=f'prototypes/source_code/source_{prototype.pk}.zip',
+            )
+            prototypes.append(prototype)
+        return prototypes
+
+
+class PrototypeQueryCountTests(PrototypeTestMixin, TestCase):
+    """Listing prototypes must not issue queries per row"""
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_constant_queries(self, url):
+        self.make_prototypes(1)
+        baseline = self.count_queries(url)
+        self.make_prototypes(20)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.staff)
+        self.assert_constant_queries('/api/prototypes/')
+
+    def test_student_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.student)
+        self.assert_constant_queries('/api/prototypes/')
+
+    def test_all_prototypes_query_count_is_constant(self):
+        self.client.force_authenticate(self.admin)
+        self.assert_constant_queries('/api/prototypes/all_prototypes/')
+
+    def test_nested_representation(self):
+        self.make_prototypes(1)
+        self.client.force_authenticate(self.staff)
+        data = self.client.get('/api/prototypes/').json()
+        row = data['results'][0]
+        self.assertEqual(row['student']['email'], self.student.email)
+        self.assertEqual(row['reviewer']['email'], self.staff.email)
+        self.assertEqual({s['email'] for s in row['supervisors']}, {self.staff.email, self.admin.email})
+        self.assertEqual(row['department']['code'], 'CS')
+
+
+class PrototypePaginationTests(PrototypeTestMixin, TestCase):
+
+    def test_cursor_walk_returns_every_row_once(self):
+        prototypes = self.make_prototypes(7)
+        # Same submission_date for some rows so the id tie-breaker is exercised
+        Prototype.objects.filter(pk__in=[p.pk for p in prototypes[:4]]).update(
+            submission_date=prototypes[0].submission_date
+        )
+        self.client.force_authenticate(self.staff)
+
+        seen = []
+        url = '/api/prototypes/?page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+
+        self.assertEqual(sorted(seen), sorted(p.pk for p in prototypes))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_students_get_the_same_order_as_staff(self):
+        self.make_prototypes(3)
+        other = CustomUser.objects.create_user(
+            username='other', email='other@nmu.edu', password='pass12345', role='student', department=self.department,
+        )
+        Prototype.objects.filter(pk=Prototype.objects.order_by('pk').first().pk).update(student=other)
+        self.client.force_authenticate(self.staff)
+        expected = [row['id'] for row in self.client.get('/api/prototypes/').json()['results']]
+        self.client.force_authenticate(self.student)
+        self.assertEqual([row['id'] for row in self.client.get('/api/prototypes/').json()['results']], expected)
+
+    def test_list_ignores_the_frontend_id_parameters(self):
+        """The frontend sends user and department ids, which PrototypeFilter would read as an email and a code"""
+        self.make_prototypes(2)
+        self.client.force_authenticate(self.student)
+        response = self.client.get('/api/prototypes/', {'student': self.student.pk, 'department': self.department.pk})
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_user_lists_are_paginated_on_request(self):
+        self.client.force_authenticate(self.staff)
+        data = self.client.get('/api/users/supervisors/?page_size=1').json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNotNone(data['next'])
+        self.assertIn('page_size=1', data['next'])
+
+    def test_user_pickers_get_every_user_by_default(self):
+        for i in range(30):
+            CustomUser.objects.create(username=f'supervisor{i}', email=f'supervisor{i}@nmu.edu', role='staff')
+        self.client.force_authenticate(self.student)
+        supervisors = self.client.get('/api/users/supervisors/').json()
+        self.assertIsInstance(supervisors, list)
+        self.assertEqual(len(supervisors), 32)
+        self.assertIsInstance(self.client.get('/api/users/students/').json(), list)
+
+        self.client.force_authenticate(self.admin)
+        self.assertIsInstance(self.client.get('/api/admin/users/').json(), list)
+        self.assertIsInstance(self.client.get('/api/admin/users/general_users/').json(), list)
+
+
+class PrototypeExportTests(PrototypeTestMixin, TestCase):
+
+    def test_export_excel_streams_filtered_rows(self):
+        self.make_prototypes(3, academic_year='2024/2025')
+        self.make_prototypes(2, academic_year='2023/2024')
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get('/api/prototypes/export_excel/?academic_year=2023/2024')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        wb = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        rows = list(wb.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'ID')
+        self.assertEqual(len(rows), 3)
+
+    def test_export_excel_rejects_invalid_filters(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/prototypes/export_excel/?status=unknown')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json())
+
+
+class TempMediaMixin:
+    """Point MEDIA_ROOT at a throwaway directory for the duration of a test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+
+class ExportJobTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def enqueue(self, payload):
+        # Run the task inline instead of handing it to the qcluster
+        with mock.patch('prototypes.views.async_task', side_effect=lambda func, job_id, **kw: run_export_job(job_id)):
+            return self.client.post('/api/exports/', payload, format='json')
+
+    def test_export_job_lifecycle(self):
+        self.make_prototypes(2)
+        self.client.force_authenticate(self.staff)
+
+        response = self.enqueue({'kind': 'prototypes_pdf', 'params': {'academic_year': '2024/2025'}})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+
+        job = self.client.get(f'/api/exports/{job_id}/').json()
+        self.assertEqual(job['status'], 'done')
+        self.assertIsNotNone(job['download_url'])
+
+        download = self.client.get(f'/api/exports/{job_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+
+    def test_prototype_report_job(self):
+        prototype = self.make_prototypes(1)[0]
+        self.client.force_authenticate(self.staff)
+        response = self.enqueue({'kind': 'prototype_report', 'prototype': prototype.pk})
+        self.assertEqual(ExportJob.objects.get(pk=response.json()['id']).status, 'done')
+
+    def test_prototype_report_requires_prototype(self):
+        self.client.force_authenticate(self.staff)
+        response = self.enqueue({'kind': 'prototype_report'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_jobs_are_private_to_requester(self):
+        job = ExportJob.objects.create(kind='prototypes_pdf', requested_by=self.admin)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get(f'/api/exports/{job.pk}/').status_code, 404)
+
+    def test_purge_removes_expired_jobs_and_files(self):
+        self.make_prototypes(1)
+        self.client.force_authenticate(self.staff)
+        job_id = self.enqueue({'kind': 'prototypes_pdf'}).json()['id']
+        job = ExportJob.objects.get(pk=job_id)
+        ExportJob.objects.filter(pk=job_id).update(created_at=job.created_at - timedelta(days=2))
+
+        self.assertEqual(purge_expired_exports(), (1, 0))
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(job.file.storage.exists(job.file.name))
+
+
+class BulkUserImportTests(PrototypeTestMixin, TestCase):
+
+    def build_sheet(self, rows):
+        """Fill the downloadable import template with rows"""
+        self.client.force_authenticate(self.admin)
+        template = self.client.get('/api/admin/download_users_template/')
+        wb = openpyxl.load_workbook(BytesIO(template.content))
+        ws = wb.active
+        ws.delete_rows(9)  # example row
+        for offset, row in enumerate(rows):
+            for col, value in enumerate(row, start=1):
+                ws.cell(row=9 + offset, column=col, value=value)
+        buffer = BytesIO()
+        wb.save(buffer)
+        return SimpleUploadedFile('users.xlsx', buffer.getvalue())
+
+    def test_import_creates_valid_rows_and_reports_errors(self):
+        sheet = self.build_sheet([
+            ['amina@nmu.edu', 'Amina Said', 'student', 'CS', '+255712345678', 'STD1', 'masters'],
+            ['peter@nmu.edu', 'Student', 'staff', None, '+255712345679', None, None],
+            ['nolevel@nmu.edu', 'No Level', 'student', 'CS', '+255712345670', None, None],
+            ['nodept@nmu.edu', 'No Dept', 'staff', 'XX', '+255712345671', None, None],
+            ['amina@nmu.edu', 'Amina Again', 'staff', None, '+255712345672', None, None],
+            ['staff@nmu.edu', 'Existing', 'staff', None, '+255712345673', None, None],
+            ['badphone@nmu.edu', 'Bad Phone', 'staff', None, '12', None, None],
+        ])
+        response = self.client.post('/api/admin/users_import/', {'excel_file': sheet}, format='multipart')
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual(data['success_count'], 2)
+        self.assertEqual(
+            [error['error'] for error in data['errors']],
+            [
+                "['Students require level (phd/masters)']",
+                "['Department not found: XX']",
+                "['User with this email already exists']",
+                "['User with this email already exists']",
+                "['Invalid phone number format']",
+            ]
+        )
+
+        amina = CustomUser.objects.get(email='amina@nmu.edu')
+        self.assertEqual((amina.username, amina.level, amina.department), ('aminasaid', 'masters', self.department))
+        self.assertTrue(amina.check_password('amina@nmu.edu'))
+        # 'student' is already taken by the fixture user
+        self.assertEqual(CustomUser.objects.get(email='peter@nmu.edu').username, 'student1')
+
+    def test_import_without_any_level_values(self):
+        # pd.read_excel reads the all-empty Level column of a staff-only sheet as float NaN
+        sheet = self.build_sheet([
+            ['lecturer@nmu.edu', 'New Lecturer', 'staff', None, '+255712345678', None, None],
+            ['head@nmu.edu', 'New Head', 'admin', None, '+255712345679', None, None],
+        ])
+        users_version = table_version('users')
+        response = self.client.post('/api/admin/users_import/', {'excel_file': sheet}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['success_count'], 2)
+        self.assertNotEqual(table_version('users'), users_version)
+
+    def test_rows_taken_by_a_concurrent_import_are_reported(self):
+        df = pd.DataFrame({
+            'email': ['first@nmu.edu', 'second@nmu.edu'],
+            'full_name': ['First User', 'Second User'],
+            'role': ['staff', 'staff'],
+            'phone': ['+255712345678', '+255712345679'],
+        })
+        column_mapping, _ = user_import.map_columns(df.columns)
+        users, errors = user_import.prepare_users(df, column_mapping)
+        self.assertEqual((len(users), errors), (2, []))
+        # Created by another import after the checks of prepare_users
+        CustomUser.objects.create(username='second', email='second@nmu.edu', role='staff')
+
+        with transaction.atomic():
+            created, errors = user_import.create_users(users)
+        self.assertEqual(created, 1)
+        self.assertEqual(errors, [{
+            'row': 3,
+            'error': "['User with this email already exists']",
+            'data': {'email': 'second@nmu.edu', 'full_name': 'Second User', 'role': 'staff'},
+        }])
+        self.assertTrue(CustomUser.objects.filter(email='first@nmu.edu').exists())
+
+    @override_settings(USER_IMPORT_HASH_WORKERS=2, PASSWORD_HASH_ITERATIONS=1000)
+    def test_hash_pool_is_reused_between_imports(self):
+        def shutdown():
+            if user_import._pool is not None:
+                user_import._pool.shutdown()
+            user_import._pool = None
+        shutdown()
+        self.addCleanup(shutdown)
+
+        with mock.patch.object(user_import, 'POOL_HASH_THRESHOLD', 2):
+            first = user_import.hash_passwords(['a', 'b', 'c'])
+            pool = user_import._pool
+            user_import.hash_passwords(['d', 'e'])
+        self.assertIsNotNone(pool)
+        self.assertIs(user_import._pool, pool)
+        self.assertTrue(first[0].startswith('pbkdf2_sha256$'))
+
+
+class UserImportJobTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    HEADER = ['Email', 'Full Name', 'Role', 'Department Code', 'Phone', 'Institution ID', 'Level']
+
+    def build_csv(self, count):
+        # Same row layout as the template: header on row 7, descriptions on row 8
+        lines = [''] * 6 + [','.join(self.HEADER), ','.join(['Required'] * 7)]
+        lines += [f'user{i}@nmu.edu,User {i},staff,CS,+2557123456{i:02d},,' for i in range(count)]
+        return SimpleUploadedFile('users.csv', '\n'.join(lines).encode())
+
+    def start(self, count, chunk_size):
+        self.client.force_authenticate(self.admin)
+        with mock.patch('prototypes.views.async_task'):
+            response = self.client.post(
+                '/api/admin/user-imports/',
+                {'file': self.build_csv(count), 'chunk_size': chunk_size},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 202)
+        return response.json()['id']
+
+    def test_import_in_chunks(self):
+        job_id = self.start(7, chunk_size=3)
+        self.assertEqual(run_user_import_job(job_id), 'done')
+        job = UserImportJob.objects.get(pk=job_id)
+        self.assertEqual((job.success_count, job.error_count), (7, 0))
+        self.assertEqual(CustomUser.objects.filter(email__startswith='user').count(), 7)
+
+    def test_failed_import_resumes_from_last_committed_chunk(self):
+        job_id = self.start(7, chunk_size=3)
+
+        calls = []
+
+        def fail_on_second_chunk(df, column_mapping):
+            calls.append(len(df))
+            if len(calls) == 2:
+                raise RuntimeError('worker lost')
+            return user_import.prepare_users(df, column_mapping)
+
+        with mock.patch('prototypes.tasks.prepare_users', side_effect=fail_on_second_chunk), \
+                self.assertLogs('prototypes.tasks', level='ERROR'):
+            self.assertEqual(run_user_import_job(job_id), 'failed')
+        self.assertEqual(CustomUser.objects.filter(email__startswith='user').count(), 3)
+
+        with mock.patch('prototypes.views.async_task') as enqueue:
+            response = self.client.post(f'/api/admin/user-imports/{job_id}/resume/')
+            # Queued again, a second resume would run the same rows twice
+            self.assertEqual(self.client.post(f'/api/admin/user-imports/{job_id}/resume/').status_code, 409)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        enqueue.assert_called_once()
+
+        self.assertEqual(run_user_import_job(job_id), 'done')
+        job = UserImportJob.objects.get(pk=job_id)
+        self.assertEqual((job.success_count, job.error_count), (7, 0))
+        self.assertEqual(CustomUser.objects.filter(email__startswith='user').count(), 7)
+
+
+class SubmissionStatisticsTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.dates = [now - timedelta(days=days) for days in (0, 1, 1, 3, 9, 40, 200)]
+        for prototype, date in zip(self.make_prototypes(len(self.dates)), self.dates):
+            Prototype.objects.filter(pk=prototype.pk).update(submission_date=date)
+        self.client.force_authenticate(self.staff)
+
+    def test_30_day_summary_matches_python_bucketing(self):
+        expected = {day: 0 for day in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']}
+        for date in self.dates:
+            if date >= timezone.now() - timedelta(days=30):
+                expected[date.strftime('%a')] += 1
+
+        data = self.client.get('/api/30-day-summary/').json()
+        self.assertEqual(data, [{'day': day, 'uploads': count} for day, count in expected.items()])
+
+    def test_grouped_statistics(self):
+        data = self.client.get('/api/stats/submissions/?window=365&group_by=month').json()
+        self.assertEqual(sum(row['uploads'] for row in data['results']), 7)
+
+        data = self.client.get('/api/stats/submissions/?window=7&group_by=day').json()
+        self.assertEqual(sum(row['uploads'] for row in data['results']), 4)
+        self.assertEqual(data['results'][-1]['bucket'], self.dates[0].date().isoformat())
+
+        data = self.client.get('/api/stats/submissions/?window=30&group_by=department').json()
+        self.assertEqual(data['results'], [{'bucket': 'CS', 'uploads': 5}])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/stats/submissions/?window=12').status_code, 400)
+        self.assertEqual(self.client.get('/api/stats/submissions/?group_by=year').status_code, 400)
+
+
+class DashboardCacheTests(PrototypeTestMixin, TestCase):
+
+    def test_counts_are_cached_per_role_and_invalidated_on_change(self):
+        self.make_prototypes(2)
+        other = CustomUser.objects.create_user(
+            username='other', email='other@nmu.edu', password='pass12345',
+            role='student', level='phd', department=self.department,
+        )
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get('/api/count/').json(), {'your_count': 2, 'available_count': 2})
+        with self.assertNumQueries(0):
+            self.client.get('/api/count/')
+
+        # Per-student counts are not shared between students
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/count/').json(), {'your_count': 0, 'available_count': 2})
+
+        prototype = self.make_prototypes(1)[0]
+        self.assertEqual(self.client.get('/api/count/').json()['available_count'], 3)
+
+        prototype.delete()
+        self.assertEqual(self.client.get('/api/count/').json()['available_count'], 2)
+
+    def test_breakdown(self):
+        self.make_prototypes(2)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(
+            self.client.get('/api/stats/breakdown/').json(),
+            [{'department': 'CS', 'status': 'submitted_not_reviewed', 'count': 2}]
+        )
+        with self.assertNumQueries(0):
+            self.client.get('/api/stats/breakdown/')
+
+
+class PrototypeSearchTests(PrototypeTestMixin, TestCase):
+
+    def search(self, terms, **params):
+        self.client.force_authenticate(self.staff)
+        return self.client.get('/api/prototypes/search/', {'q': terms, **params}).json()
+
+    def test_ranked_search_over_title_abstract_and_people(self):
+        in_abstract = self.make_prototypes(1, title='Irrigation controller', abstract='Uses a solar panel')[0]
+        in_title = self.make_prototypes(1, title='Solar tracker', abstract='Moves panels')[0]
+        self.make_prototypes(1, title='Chat bot', abstract='Language model')
+
+        data = self.search('solar')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([row['id'] for row in data['results']], [in_title.pk, in_abstract.pk])
+
+        # Student and supervisor names are searchable, prefixes match
+        self.staff.full_name = 'Neema Mwakyusa'
+        self.staff.save()
+        self.assertEqual(self.search('mwaky')['count'], 3)
+
+    def test_index_follows_changes(self):
+        prototype = self.make_prototypes(1, title='Water quality sensor')[0]
+        self.assertEqual(self.search('water')['count'], 1)
+
+        prototype.title = 'Air quality sensor'
+        prototype.save()
+        self.assertEqual(self.search('water')['count'], 0)
+        self.assertEqual(self.search('air')['count'], 1)
+
+        prototype.delete()
+        self.assertEqual(self.search('air')['count'], 0)
+
+    def test_search_is_paginated(self):
+        self.make_prototypes(5, title='Drone')
+        data = self.search('drone', page_size=2, page=3)
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+
+    def test_query_syntax_is_not_passed_through(self):
+        self.make_prototypes(1, title='Drone')
+        self.assertEqual(self.search('"drone*')['count'], 1)
+        self.assertEqual(self.search('*')['count'], 0)
+
+
+class BarcodeTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def test_lookup_by_barcode_is_cached_and_invalidated(self):
+        prototype = self.make_prototypes(1)[0]
+        self.client.force_authenticate(self.staff)
+        url = f'/api/prototypes/by-barcode/{prototype.barcode}/'
+
+        data = self.client.get(url).json()
+        self.assertEqual((data['id'], data['department__code']), (prototype.pk, 'CS'))
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        prototype.storage_location = 'Shelf B2'
+        prototype.save()
+        self.assertEqual(self.client.get(url).json()['storage_location'], 'Shelf B2')
+        self.assertEqual(self.client.get('/api/prototypes/by-barcode/NM-CS-MISSING/').status_code, 404)
+
+    def test_label_sheet_pages(self):
+        self.make_prototypes(30)
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get('/api/prototypes/labels/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content.count(b'/Type /Page\n'), 2)
+
+        response = self.client.get('/api/prototypes/labels/?output=png&page=2')
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get('/api/prototypes/labels/').status_code, 403)
+
+    def test_barcode_images_are_rendered_once(self):
+        first = generate_barcode('NM-CS-0000ABCD')
+        mtime = os.path.getmtime(first)
+        self.assertEqual(generate_barcode('NM-CS-0000ABCD'), first)
+        self.assertEqual(os.path.getmtime(first), mtime)
+        self.assertNotEqual(generate_barcode('NM-CS-0000ABCE'), first)
+
+
+class AttachmentDownloadTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prototype = self.make_prototypes(1)[0]
+        self.payload = bytes(range(256)) * 1024
+        path = os.path.join(self.media_root, self.prototype.attachment.source_code.name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(self.payload)
+        self.url = f'/api/prototypes/{self.prototype.pk}/download/source_code/'
+        self.client.force_authenticate(self.student)
+
+    def test_full_download_streams_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Length'], str(len(self.payload)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(b''.join(response.streaming_content), self.payload)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-1999')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-1999/{len(self.payload)}')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[1000:2000])
+
+        # Resume from an offset, and suffix ranges
+        response = self.client.get(self.url, HTTP_RANGE='bytes=200000-')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[200000:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range validator gets the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    @override_settings(ATTACHMENT_SENDFILE='x-accel-redirect')
+    def test_accel_redirect_handoff(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.prototype.attachment.source_code.name)
+        self.assertEqual(response.content, b'')
+
+    def test_permissions_and_missing_files(self):
+        self.assertEqual(self.client.get(f'/api/prototypes/{self.prototype.pk}/download/report/').status_code, 404)
+
+        visitor = CustomUser.objects.create_user(
+            username='visitor', email='visitor@example.com', password='pass12345', role='general_user',
+        )
+        self.client.force_authenticate(visitor)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class ChunkedUploadTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.payload = os.urandom(5000)
+        self.client.force_authenticate(self.student)
+
+    def open_session(self, **extra):
+        data = {'filename': 'source.zip', 'size': len(self.payload), 'chunk_size': 2048, **extra}
+        response = self.client.post('/api/uploads/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def put_chunk(self, session_id, index, data, **headers):
+        return self.client.put(
+            f'/api/uploads/{session_id}/chunks/{index}/', data,
+            content_type='application/octet-stream', **headers,
+        )
+
+    def upload_all(self, session_id, chunk_size=2048):
+        for index in range(0, len(self.payload), chunk_size):
+            response = self.put_chunk(session_id, index // chunk_size, self.payload[index:index + chunk_size])
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_resume_and_finalize_into_existing_prototype(self):
+        prototype = self.make_prototypes(1)[0]
+        session = self.open_session(prototype=prototype.pk)
+        self.assertEqual(session['total_chunks'], 3)
+
+        self.put_chunk(session['id'], 2, self.payload[4096:])
+        self.put_chunk(session['id'], 0, self.payload[:2048])
+        # Resuming: the client asks which chunks arrived and sends the rest
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/").json()['received_chunks'], [0, 2])
+        self.assertEqual(self.client.post(f"/api/uploads/{session['id']}/finalize/").status_code, 400)
+        self.put_chunk(session['id'], 1, self.payload[2048:4096])
+
+        response = self.client.post(f"/api/uploads/{session['id']}/finalize/")
+        self.assertEqual(response.json()['status'], 'attached')
+        prototype.attachment.refresh_from_db()
+        with prototype.attachment.source_code.open('rb') as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'uploads', session['id'])))
+
+    def test_concurrent_puts_of_the_same_chunk(self):
+        session = self.open_session()
+        self.assertEqual(self.put_chunk(session['id'], 0, self.payload[:2048]).status_code, 200)
+        # The other request's row appears after our lock found no earlier attempt to replace
+        nothing = UploadChunk.objects.none()
+        with mock.patch.object(UploadChunk.objects, 'select_for_update', return_value=nothing):
+            retried = self.put_chunk(session['id'], 0, self.payload[:2048])
+            different = self.put_chunk(session['id'], 0, self.payload[2048:4096])
+
+        self.assertEqual(retried.status_code, 200, retried.content)
+        self.assertEqual(retried.json()['sha256'], hashlib.sha256(self.payload[:2048]).hexdigest())
+        self.assertEqual(different.status_code, 409, different.content)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'uploads', session['id']))), 1)
+
+    def test_chunk_validation(self):
+        session = self.open_session()
+        self.assertEqual(self.put_chunk(session['id'], 0, self.payload[:100]).status_code, 400)
+        self.assertEqual(self.put_chunk(session['id'], 0, self.payload[:3000]).status_code, 400)
+        self.assertEqual(self.put_chunk(session['id'], 3, self.payload[:2048]).status_code, 400)
+        response = self.put_chunk(session['id'], 0, self.payload[:2048], HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/uploads/', {'filename': 'source.tar', 'size': 10}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.upload_all(session['id'])
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/").json()['received_chunks'], [0, 1, 2])
+
+    def test_declared_checksum_is_verified(self):
+        session = self.open_session(sha256='f' * 64)
+        self.upload_all(session['id'])
+        self.assertEqual(self.client.post(f"/api/uploads/{session['id']}/finalize/").status_code, 400)
+
+    def test_new_prototype_uses_complete_upload(self):
+        session = self.open_session()
+        self.upload_all(session['id'])
+        self.assertEqual(self.client.post(f"/api/uploads/{session['id']}/finalize/").json()['status'], 'complete')
+
+        response = self.client.post('/api/prototypes/', {
+            'title': 'Chunked', 'abstract': 'Abstract', 'academic_year': '2024/2025',
+            'supervisor_ids': [self.staff.pk],
+            'attachment.report': SimpleUploadedFile('report.pdf', b'%PDF-1.4', content_type='application/pdf'),
+            'attachment.source_code_upload': session['id'],
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        attachment = PrototypeAttachment.objects.get(prototype_id=response.json()['id'])
+        self.assertEqual(attachment.source_code.size, len(self.payload))
+        self.assertEqual(UploadSession.objects.get(pk=session['id']).status, 'attached')
+
+    def test_expired_sessions_are_purged(self):
+        session = self.open_session()
+        self.put_chunk(session['id'], 0, self.payload[:2048])
+        UploadSession.objects.filter(pk=session['id']).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(self.put_chunk(session['id'], 1, self.payload[2048:4096]).status_code, 410)
+        self.assertEqual(purge_expired_uploads(), 1)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'uploads', session['id'])))
+
+        other = self.open_session()
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get(f"/api/uploads/{other['id']}/").status_code, 404)
+
+
+@override_settings(BLOB_GC_GRACE=timedelta(0))
+class BlobStorageTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.student)
+
+    def submit(self, title, report=b'%PDF-1.4 same report', source=b'PK same source'):
+        response = self.client.post('/api/prototypes/', {
+            'title': title, 'abstract': 'Abstract', 'academic_year': '2024/2025',
+            'supervisor_ids': [self.staff.pk],
+            'attachment.report': SimpleUploadedFile(f'{title}.pdf', report, content_type='application/pdf'),
+            'attachment.source_code': SimpleUploadedFile(f'{title}.zip', source, content_type='application/zip'),
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        return Prototype.objects.select_related('attachment').get(pk=response.json()['id'])
+
+    def test_identical_uploads_share_one_blob(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.submit('First')
+            second = self.submit('Second', source=b'PK other source')
+
+        self.assertEqual(first.attachment.report.name, second.attachment.report.name)
+        self.assertNotEqual(first.attachment.source_code.name, second.attachment.source_code.name)
+        self.assertEqual(Blob.objects.get(name=first.attachment.report.name).ref_count, 2)
+
+        report_path = first.attachment.report.path
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(report_path))
+        self.assertEqual(Blob.objects.get(name=second.attachment.report.name).ref_count, 1)
+        self.assertFalse(Blob.objects.filter(name=first.attachment.source_code.name).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(report_path))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_replacing_a_file_releases_the_old_blob(self):
+        prototype = self.submit('First')
+        old_name = prototype.attachment.source_code.name
+        with self.captureOnCommitCallbacks(execute=True):
+            prototype.attachment.source_code = SimpleUploadedFile('new.zip', b'PK new source')
+            prototype.attachment.save()
+        self.assertFalse(Blob.objects.filter(name=old_name).exists())
+        self.assertEqual(Blob.objects.get(name=prototype.attachment.source_code.name).ref_count, 1)
+
+    def test_upload_session_completes_for_known_content(self):
+        source = b'PK shared source archive'
+        prototype = self.submit('First', source=source)
+        response = self.client.post('/api/uploads/', {
+            'filename': 'again.zip', 'size': len(source), 'sha256': hashlib.sha256(source).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.json()['status'], 'complete')
+        session = UploadSession.objects.get(pk=response.json()['id'])
+        self.assertEqual(session.file.name, prototype.attachment.source_code.name)
+        self.assertEqual(Blob.objects.get(name=session.file.name).ref_count, 2)
+
+    def test_collect_garbage_repairs_counts(self):
+        prototype = self.submit('First')
+        Blob.objects.update(ref_count=5)
+        stray = os.path.join(self.media_root, 'blobs', 'tmp', 'interrupted')
+        with open(stray, 'wb') as f:
+            f.write(b'partial')
+        # queryset.delete() bypasses the signals, the sweep notices the blobs are unreferenced
+        PrototypeAttachment.objects.filter(pk=prototype.attachment.pk).delete()
+
+        self.assertEqual(collect_garbage(), (2, 3))
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(stray))
+
+
+def make_pdf(page_texts):
+    """A minimal text PDF with one page per string"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in page_texts:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>'
+        )
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    output = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    output += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return output
+
+
+def make_zip(files):
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return output.getvalue()
+
+
+class AttachmentProcessingTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def make_attachment(self, report, source_code):
+        prototype = self.make_prototypes(1)[0]
+        attachment = prototype.attachment
+        attachment.report = SimpleUploadedFile('report.pdf', report)
+        attachment.source_code = SimpleUploadedFile('source.zip', source_code)
+        attachment.save()
+        return attachment
+
+    def test_metadata_extraction(self):
+        attachment = self.make_attachment(
+            make_pdf(['Smart irrigation controller', 'Results chapter']),
+            make_zip({'app/main.py': 'print(1)', 'app/util.py': '', 'web/index.js': '', 'README.md': ''}),
+        )
+        self.assertEqual(process_attachment(attachment.pk), 'done')
+
+        metadata = AttachmentMetadata.objects.get(attachment=attachment)
+        self.assertEqual(metadata.pdf_pages, 2)
+        self.assertIn('Smart irrigation controller', metadata.pdf_text)
+        self.assertEqual(metadata.zip_file_count, 4)
+        self.assertEqual(metadata.zip_languages, {'Python': 2, 'JavaScript': 1})
+        self.assertEqual(metadata.primary_language, 'Python')
+        self.assertFalse(metadata.is_suspicious)
+
+        prototypes = Prototype.objects.all()
+        self.assertEqual(
+            list(PrototypeFilter({'language': 'python', 'min_pages': 2}, queryset=prototypes).qs), [attachment.prototype]
+        )
+        self.assertFalse(PrototypeFilter({'language': 'java'}, queryset=prototypes).qs.exists())
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/prototypes/')
+        self.assertEqual(response.json()['results'][0]['attachment']['metadata']['pdf_pages'], 2)
+
+    def test_zip_bomb_and_invalid_files_are_flagged(self):
+        attachment = self.make_attachment(
+            b'not a pdf', make_zip({'zeros.bin': b'\0' * 2_000_000, '../escape.py': ''}),
+        )
+        process_attachment(attachment.pk)
+
+        metadata = AttachmentMetadata.objects.get(attachment=attachment)
+        self.assertFalse(metadata.pdf_valid)
+        self.assertTrue(metadata.is_suspicious)
+        self.assertGreater(metadata.zip_compression_ratio, 100)
+        self.assertEqual(len(metadata.problems['source_code']), 3)
+
+    def test_replacing_files_with_invalid_ones_clears_old_results(self):
+        attachment = self.make_attachment(make_pdf(['Report']), make_zip({'main.py': ''}))
+        process_attachment(attachment.pk)
+        attachment.report = SimpleUploadedFile('report.pdf', b'not a pdf')
+        attachment.source_code = SimpleUploadedFile('source.zip', b'not a zip')
+        attachment.save()
+        process_attachment(attachment.pk)
+
+        metadata = AttachmentMetadata.objects.get(attachment=attachment)
+        self.assertEqual((metadata.pdf_valid, metadata.pdf_pages, metadata.pdf_text), (False, None, ''))
+        self.assertEqual(metadata.preview_digest, '')
+        self.assertFalse(metadata.zip_valid)
+        self.assertIsNone(metadata.zip_file_count)
+        self.assertEqual((metadata.zip_languages, metadata.primary_language), ({}, ''))
+        self.assertFalse(metadata.is_suspicious)
+
+    def test_unchanged_files_are_not_inspected_again(self):
+        attachment = self.make_attachment(make_pdf(['Report']), make_zip({'main.c': ''}))
+        process_attachment(attachment.pk)
+        with mock.patch('prototypes.tasks.inspect_pdf') as inspect_pdf, \
+                mock.patch('prototypes.tasks.inspect_zip') as inspect_zip:
+            process_attachment(attachment.pk)
+        inspect_pdf.assert_not_called()
+        inspect_zip.assert_not_called()
+
+    def test_saving_an_attachment_queues_processing(self):
+        with mock.patch('prototypes.signals.async_task') as enqueue, \
+                self.captureOnCommitCallbacks(execute=True):
+            attachment = self.make_attachment(make_pdf(['Report']), make_zip({'main.c': ''}))
+        enqueue.assert_called_with('prototypes.tasks.process_attachment', attachment.pk, task_name=f'attachment-{attachment.pk}')
+
+
+class ReportPreviewTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        prototype = self.make_prototypes(1)[0]
+        self.attachment = prototype.attachment
+        self.attachment.report = SimpleUploadedFile('report.pdf', make_pdf(['Cover page']))
+        self.attachment.source_code = SimpleUploadedFile('source.zip', make_zip({'main.py': ''}))
+        self.attachment.save()
+        process_attachment(self.attachment.pk)
+        self.client.force_authenticate(self.staff)
+
+    def test_previews_are_served_with_long_lived_headers(self):
+        data = self.client.get(f'/api/prototypes/{self.attachment.prototype_id}/').json()
+        urls = data['attachment']['metadata']['preview_urls']
+        self.assertEqual(set(urls), {'small', 'large'})
+
+        response = self.client.get(urls['small'])
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('inline', response['Content-Disposition'])
+        image = Image.open(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(image.width, 320)
+
+        response = self.client.get(f'/api/prototypes/{self.attachment.prototype_id}/preview/large/')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_previews_survive_a_format_change(self):
+        url = f'/api/prototypes/{self.attachment.prototype_id}/preview/small/'
+        with override_settings(PREVIEW_FORMAT='png'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/webp')
+
+            self.attachment.report = SimpleUploadedFile('new.pdf', make_pdf(['Revised cover']))
+            self.attachment.save()
+            process_attachment(self.attachment.pk)
+            self.assertEqual(AttachmentMetadata.objects.get(attachment=self.attachment).preview_format, 'png')
+            self.assertEqual(self.client.get(url)['Content-Type'], 'image/png')
+
+    def test_report_is_not_read_into_memory(self):
+        other = self.make_prototypes(1)[0].attachment
+        other.report = SimpleUploadedFile('other.pdf', make_pdf(['Other cover']))
+        other.save()
+        with mock.patch('prototypes.services.previews.pdfium.PdfDocument',
+                        wraps=previews.pdfium.PdfDocument) as document:
+            process_attachment(other.pk)
+        self.assertEqual(document.call_args.args[0], other.report.path)
+
+    def test_previews_are_rendered_once_per_report_hash(self):
+        digest = AttachmentMetadata.objects.get(attachment=self.attachment).preview_digest
+        other = self.make_prototypes(1)[0].attachment
+        other.report = SimpleUploadedFile('copy.pdf', make_pdf(['Cover page']))
+        other.source_code = SimpleUploadedFile('source.zip', make_zip({'main.py': ''}))
+        other.save()
+        with mock.patch('prototypes.services.previews.pdfium.PdfDocument') as document:
+            process_attachment(other.pk)
+        document.assert_not_called()
+        self.assertEqual(AttachmentMetadata.objects.get(attachment=other).preview_digest, digest)
+
+        self.attachment.report = SimpleUploadedFile('new.pdf', make_pdf(['Revised cover']))
+        self.attachment.save()
+        process_attachment(self.attachment.pk)
+        self.assertNotEqual(AttachmentMetadata.objects.get(attachment=self.attachment).preview_digest, digest)
+
+
+@override_settings(SHARED_CACHE=True)
+class ConditionalRequestTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prototype = self.make_prototypes(2)[0]
+        self.client.force_authenticate(self.staff)
+
+    def assert_not_modified(self, url, **headers):
+        with self.assertNumQueries(1):  # the validator lookup only, nothing is serialized
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304)
+
+    def test_retrieve(self):
+        url = f'/api/prototypes/{self.prototype.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        self.assert_not_modified(url, HTTP_IF_NONE_MATCH=etag)
+        self.assert_not_modified(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Direct edits, supervisor changes and renamed students all change the ETag
+        self.prototype.supervisors.remove(self.admin)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.student.full_name = 'Renamed Student'
+        self.student.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_and_storage_locations(self):
+        for url in ['/api/prototypes/', '/api/prototypes/storage_locations/']:
+            etag = self.client.get(url)['ETag']
+            self.assert_not_modified(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.prototype.storage_location = f'Shelf {url}'
+            self.prototype.save()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # Deleting a row does not move the newest last_modified, the version counter catches it
+        etag = self.client.get('/api/prototypes/')['ETag']
+        Prototype.objects.exclude(pk=self.prototype.pk).get().delete()
+        self.assertEqual(self.client.get('/api/prototypes/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_last_modified_moves_on_deletes_and_user_changes(self):
+        later = iter(range(time.time_ns() + 5 * 10**9, time.time_ns() + 50 * 10**9, 5 * 10**9))
+        for url, change in [
+            ('/api/prototypes/', lambda: Prototype.objects.exclude(pk=self.prototype.pk).get().delete()),
+            ('/api/prototypes/storage_locations/', lambda: self.prototype.delete()),
+        ]:
+            last_modified = self.client.get(url)['Last-Modified']
+            self.assert_not_modified(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            with mock.patch('prototypes.services.versions.time.time_ns', return_value=next(later)):
+                change()
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+        prototype = self.make_prototypes(1)[0]
+        url = f'/api/prototypes/{prototype.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        with mock.patch('prototypes.services.versions.time.time_ns', return_value=next(later)):
+            self.student.full_name = 'Renamed Student'
+            self.student.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_department_list(self):
+        etag = self.client.get('/api/departments/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/departments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Department.objects.create(name='Mathematics', code='MATH')
+        self.assertEqual(self.client.get('/api/departments/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_caches(self):
+        """Two gunicorn workers, each with its own LocMemCache, do not see each other's version bumps"""
+        worker, other_worker = LocMemCache('worker', {}), LocMemCache('other_worker', {})
+        self.prototype.storage_location = 'Shelf A'
+        self.prototype.save()
+        url = '/api/prototypes/storage_locations/'
+        with mock.patch('prototypes.services.versions.cache', worker):
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertFalse(response.has_header('Last-Modified'))
+            self.assert_not_modified(url, HTTP_IF_NONE_MATCH=etag)
+
+            list_response = self.client.get('/api/prototypes/')
+            self.assertFalse(list_response.has_header('ETag'))
+            self.assertFalse(list_response.has_header('Last-Modified'))
+            self.assertFalse(self.client.get(f'/api/prototypes/{self.prototype.pk}/').has_header('ETag'))
+            self.assertFalse(self.client.get('/api/departments/').has_header('ETag'))
+
+        with mock.patch('prototypes.services.versions.cache', other_worker):
+            self.prototype.delete()
+
+        with mock.patch('prototypes.services.versions.cache', worker):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+
+class SparseFieldsTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_prototypes(3)
+        self.client.force_authenticate(self.staff)
+
+    def test_summary_view(self):
+        full = self.client.get('/api/prototypes/').json()['results'][0]
+        summary = self.client.get('/api/prototypes/?view=summary').json()['results'][0]
+        self.assertEqual(list(summary), PrototypeSummarySerializer.SUMMARY_FIELDS)
+        self.assertEqual(summary['id'], full['id'])
+        self.assertEqual(summary['submission_date'], full['submission_date'])
+        self.assertEqual(summary['department_code'], 'CS')
+
+    def test_fields_are_paginated_and_filtered(self):
+        response = self.client.get('/api/prototypes/', {'fields': 'id,title', 'page_size': 2, 'status': 'submitted_not_reviewed'})
+        data = response.json()
+        self.assertEqual([list(row) for row in data['results']], [['id', 'title'], ['id', 'title']])
+
+        rest = self.client.get(data['next']).json()['results']
+        self.assertEqual(len(rest), 1)
+        self.assertEqual(list(rest[0]), ['id', 'title'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/prototypes/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown field(s): password', response.json()['fields'])
+
+    @override_settings(SHARED_CACHE=True)
+    def test_sparse_list_query_count(self):
+        self.client.get('/api/prototypes/?view=summary')  # warm the version tokens
+        # newest last_modified and row count for the validators, then the page itself
+        with self.assertNumQueries(2):
+            self.client.get('/api/prototypes/?view=summary')
+
+
+class JSONRenderingTests(PrototypeTestMixin, TestCase):
+
+    payload = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'created': datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+        'local': datetime(2025, 3, 1, 12, 30, 5, 120000),
+        'day': date(2025, 3, 1),
+        'ratio': Decimal('1.50'),
+        'label': gettext_lazy('Computer Science'),
+        'rows': [{'title': 'Prototype   0', 'pages': None}],
+    }
+
+    def test_matches_stdlib_renderer(self):
+        rendered = FastJSONRenderer().render(self.payload)
+        with mock.patch('prototypes.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), rendered)
+        # DRF's renderer except for datetimes, which keep their microseconds
+        expected = json.loads(JSONRenderer().render(self.payload))
+        expected.update(created='2025-03-01T12:30:05.123456Z', local='2025-03-01T12:30:05.120000')
+        self.assertEqual(json.loads(rendered), expected)
+
+    def test_parser_falls_back_without_orjson(self):
+        with mock.patch('prototypes.parsers.orjson', None):
+            self.assertEqual(FastJSONParser().parse(BytesIO(b'{"a": [1, 2.5]}')), {'a': [1, 2.5]})
+
+    def test_indented_output_uses_stdlib(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_api_round_trip(self):
+        self.make_prototypes(2)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/prototypes/')
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(len(response.json()['results']), 2)
+
+        response = self.client.post('/api/uploads/', '{"filename": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_prototypes(5)
+        self.client.force_authenticate(self.staff)
+
+    def test_brotli_preferred(self):
+        response = self.client.get('/api/prototypes/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))['results']), 5)
+
+    def test_gzip_and_q_values(self):
+        response = self.client.get('/api/prototypes/', HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 5)
+
+        response = self.client.get('/api/prototypes/', HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_and_streaming_responses_untouched(self):
+        response = self.client.get('/api/prototypes/storage_locations/', HTTP_ACCEPT_ENCODING='br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.client.get('/api/prototypes/export_excel/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(SHARED_CACHE=True)
+    def test_conditional_get_with_weak_etag(self):
+        response = self.client.get('/api/prototypes/', HTTP_ACCEPT_ENCODING='br')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            '/api/prototypes/', HTTP_ACCEPT_ENCODING='br', HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class ReplicaRoutingTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.router = ReplicaRouter()
+
+    def test_reads_in_replica_block_go_to_replica(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', False):
+            self.assertEqual(self.router.db_for_read(Prototype), 'default')
+            with replica_reads():
+                self.assertEqual(self.router.db_for_read(Prototype), 'replica')
+                self.assertEqual(self.router.db_for_write(Prototype), 'default')
+            self.assertEqual(self.router.db_for_read(Prototype), 'default')
+
+    def test_transactions_on_primary_read_from_primary(self):
+        with replica_reads(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Prototype), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'prototypes'))
+        self.assertFalse(self.router.allow_migrate('replica', 'prototypes'))
+
+    def test_statistics_views_read_from_replica(self):
+        seen = []
+        real_count = Prototype.objects.count
+
+        def count():
+            seen.append(_replica_reads.get())
+            return real_count()
+
+        self.client.force_authenticate(self.staff)
+        with mock.patch.object(Prototype.objects, 'count', count):
+            self.client.get('/api/count/')
+        self.assertEqual(seen, [True])
+
+
+class AsyncViewTests(TempMediaMixin, PrototypeTestMixin, TestCase):
+    """The async views run on the event loop, any synchronous ORM access would raise SynchronousOnlyOperation"""
+
+    def setUp(self):
+        super().setUp()
+        self.prototypes = self.make_prototypes(3)
+        self.headers = self.auth_headers(self.staff)
+
+    def auth_headers(self, user):
+        return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    async def test_list_matches_sync_list(self):
+        self.client.force_authenticate(self.staff)
+        expected = (await sync_to_async(self.client.get)('/api/prototypes/')).json()['results']
+
+        response = await self.async_client.get('/api/async/prototypes/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], expected)
+
+    async def get_both(self, url):
+        self.client.force_authenticate(self.staff)
+        expected = (await sync_to_async(self.client.get)(f'/api/prototypes/{url}')).json()
+        actual = (await self.async_client.get(f'/api/async/prototypes/{url}', headers=self.headers)).json()
+        return expected, actual
+
+    async def test_search_ordering_and_filters_match_sync_list(self):
+        queries = [
+            '?search=Prototype%201', '?search=nothing', '?ordering=submission_date', '?ordering=-submission_date',
+            '?ordering=title', '?student=1&department=1', '?search=prototype&ordering=submission_date&fields=id,title',
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                expected, actual = await self.get_both(query)
+                self.assertEqual(actual['results'], expected['results'])
+                self.assertEqual(actual['next'] is None, expected['next'] is None)
+                self.assertIsNone(actual['previous'])
+
+    async def test_pages_and_previous_links_match_sync_list(self):
+        for ordering in ['submission_date', '-submission_date']:
+            expected, actual = await self.get_both(f'?ordering={ordering}&page_size=1&fields=id')
+            pages = []
+            while True:
+                self.assertEqual(actual['results'], expected['results'])
+                self.assertEqual(actual['previous'] is None, expected['previous'] is None)
+                pages.append(actual['results'])
+                if expected['next'] is None:
+                    self.assertIsNone(actual['next'])
+                    break
+                self.client.force_authenticate(self.staff)
+                expected = (await sync_to_async(self.client.get)(expected['next'])).json()
+                actual = (await self.async_client.get(actual['next'], headers=self.headers)).json()
+            self.assertEqual(len(pages), 3)
+
+            for page in reversed(pages[:-1]):
+                actual = (await self.async_client.get(actual['previous'], headers=self.headers)).json()
+                self.assertEqual(actual['results'], page)
+            self.assertIsNone(actual['previous'])
+            self.assertEqual((await self.async_client.get(actual['next'], headers=self.headers)).json()['results'], pages[1])
+
+    async def test_cursor_pagination_and_sparse_fields(self):
+        response = await self.async_client.get('/api/async/prototypes/?page_size=2&fields=id,title', headers=self.headers)
+        data = response.json()
+        self.assertEqual([list(row) for row in data['results']], [['id', 'title'], ['id', 'title']])
+
+        rest = (await self.async_client.get(data['next'], headers=self.headers)).json()
+        self.assertIsNone(rest['next'])
+        ids = [row['id'] for row in data['results'] + rest['results']]
+        self.assertEqual(sorted(ids), sorted(prototype.pk for prototype in self.prototypes))
+
+        response = await self.async_client.get('/api/async/prototypes/?cursor=bogus', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_detail_count_locations_and_profile(self):
+        pk = self.prototypes[0].pk
+        response = await self.async_client.get(f'/api/async/prototypes/{pk}/', headers=self.headers)
+        self.assertEqual(response.json()['id'], pk)
+        response = await self.async_client.get('/api/async/prototypes/0/', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get('/api/async/count/', headers=self.headers)
+        self.assertEqual(response.json(), {'your_count': 3, 'available_count': 3})
+        response = await self.async_client.get('/api/async/prototypes/storage_locations/', headers=self.headers)
+        self.assertEqual(response.json(), [])
+        response = await self.async_client.get('/api/async/user/profile/', headers=self.headers)
+        self.assertEqual(response.json()['department'], 'Computer Science')
+
+    async def test_authentication_required(self):
+        response = await self.async_client.get('/api/async/count/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = await self.async_client.get('/api/async/count/', headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.post('/api/async/count/', headers=self.headers)
+        self.assertEqual(response.status_code, 405)
+
+    async def test_download_streams_asynchronously(self):
+        payload = bytes(range(256)) * 1024
+        attachment = self.prototypes[0].attachment
+        path = os.path.join(self.media_root, attachment.source_code.name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(payload)
+        url = f'/api/async/prototypes/{self.prototypes[0].pk}/download/source_code/'
+
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Length'], str(len(payload)))
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), payload)
+
+        response = await self.async_client.get(url, headers={**self.headers, 'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), payload[100:200])
+
+        visitor = await CustomUser.objects.acreate(username='visitor', email='visitor@example.com', role='general_user')
+        response = await self.async_client.get(url, headers=self.auth_headers(visitor))
+        self.assertEqual(response.status_code, 403)
+
+
+class CachedAuthenticationTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        response = self.client.post('/api/token/', {'email': 'staff@nmu.edu', 'password': 'pass12345'}, format='json')
+        self.access = response.json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_token_carries_user_claims(self):
+        token = AccessToken(self.access)
+        self.assertEqual(token['role'], 'staff')
+        self.assertEqual(token['department_id'], self.department.pk)
+        self.assertTrue(token['is_approved'])
+
+    def test_authenticated_requests_use_the_cached_user(self):
+        self.assertEqual(self.client.get('/api/user/profile/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/user/profile/')
+        self.assertEqual(response.json()['department'], 'Computer Science')
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.client.get('/api/user/profile/')
+        self.staff.phone = '0700000000'
+        self.staff.save()
+        self.assertEqual(self.client.get('/api/user/profile/').json()['phone'], '0700000000')
+
+        self.department.name = 'Informatics'
+        self.department.save()
+        self.assertEqual(self.client.get('/api/user/profile/').json()['department'], 'Informatics')
+
+    def test_changed_claims_require_a_new_login(self):
+        self.staff.role = 'student'
+        self.staff.save()
+        response = self.client.get('/api/user/profile/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'claims_changed')
+
+
+class LoginPipelineTests(PrototypeTestMixin, TestCase):
+
+    def login(self, email='staff@nmu.edu', password='pass12345', **extra):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password}, format='json', **extra)
+
+    def test_login_checks_the_password_on_the_pool(self):
+        with mock.patch.object(password_hashing, 'verify', wraps=password_hashing.verify) as verify:
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(self.login(password='wrong').status_code, 400)
+        self.assertEqual(self.login(email='nobody@nmu.edu').status_code, 400)
+
+    def test_hash_is_upgraded_when_the_iterations_change(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.staff.set_password('pass12345')
+            self.staff.save()
+        self.assertTrue(self.staff.password.startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 200)
+        self.staff.refresh_from_db()
+        self.assertTrue(self.staff.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_full_pool_refuses_logins(self):
+        self.addCleanup(password_hashing.shutdown)
+        with override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0):
+            password_hashing.shutdown()
+            _, slots = password_hashing._executor()
+            slots.acquire()
+            response = self.login()
+            slots.release()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_default_pool_leaves_a_request_thread_free(self):
+        self.addCleanup(password_hashing.shutdown)
+        password_hashing.shutdown()
+        _, slots = password_hashing._executor()
+        hashing = 0  # logins that hold a request thread while their password is checked
+        while slots.acquire(blocking=False):
+            hashing += 1
+        try:
+            response = self.login()
+        finally:
+            for _ in range(hashing):
+                slots.release()
+        self.assertLess(hashing, settings.GUNICORN_THREADS)
+        self.assertEqual(response.status_code, 429)
+
+    def test_attempts_are_limited_per_email_and_per_address(self):
+        with mock.patch('rest_framework.throttling.SimpleRateThrottle.THROTTLE_RATES',
+                        {'login_ip': '5/min', 'login_email': '2/min'}):
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            response = self.login()
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            # Token endpoint shares the counters
+            self.assertEqual(self.client.post('/api/token/', {'email': 'staff@nmu.edu', 'password': 'pass12345'},
+                                              format='json').status_code, 429)
+
+            self.assertEqual(self.login(email='student@nmu.edu').status_code, 200)
+            self.assertEqual(self.login(email='admin@nmu.edu').status_code, 429)
+            self.assertEqual(self.login(email='admin@nmu.edu', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+
+class TokenBlacklistTests(PrototypeTestMixin, TestCase):
+
+    def refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, format='json')
+
+    def check_rotation(self):
+        token = str(ClaimsRefreshToken.for_user(self.staff))
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['refresh'], token)
+        self.assertEqual(AccessToken(response.json()['access'])['role'], 'staff')
+
+        replayed = self.refresh(token)
+        self.assertEqual(replayed.status_code, 401)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    @override_settings(TOKEN_BLACKLIST_BACKEND='database')
+    def test_rotated_tokens_are_revoked_in_the_database(self):
+        self.check_rotation()
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+    @override_settings(TOKEN_BLACKLIST_BACKEND='cache')
+    def test_rotated_tokens_are_revoked_in_the_cache(self):
+        self.check_rotation()
+        self.assertFalse(RevokedToken.objects.exists())
+
+    @override_settings(TOKEN_BLACKLIST_BACKEND='database')
+    def test_purge_keeps_unexpired_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti='old', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='current', expires_at=now + timedelta(days=1))
+        self.assertEqual(purge_revoked_tokens(), 1)
+        self.assertTrue(token_blacklist.is_revoked('current'))
+        self.assertFalse(token_blacklist.is_revoked('old'))
+
+
+class PrototypeStatisticsTests(PrototypeTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = Department.objects.create(name='Mathematics', code='MA')
+        prototypes = self.make_prototypes(6)
+        for prototype, (department, group, year, state, physical) in zip(prototypes, [
+            (self.department, 'ai', '2024/2025', 'submitted_reviewed', True),
+            (self.department, 'ai', '2023/2024', 'submitted_not_reviewed', False),
+            (self.department, 'cyber', '2024/2025', 'submitted_reviewed', False),
+            (self.other, None, '2024/2025', 'submitted_not_reviewed', True),
+            (self.other, 'ai', '2024/2025', 'submitted_reviewed', True),
+            (self.other, '', '2023/2024', 'submitted_reviewed', False),
+        ]):
+            prototype.department, prototype.research_group, prototype.academic_year = department, group, year
+            prototype.status, prototype.has_physical_prototype = state, physical
+            prototype.save()
+        self.client.force_authenticate(self.staff)
+
+    def expected(self, by, **filters):
+        columns = ['department__code' if dimension == 'department' else dimension for dimension in by]
+        counts = {}
+        for prototype in Prototype.objects.filter(**filters).values(*columns, 'research_group'):
+            if 'research_group' in by:
+                prototype['research_group'] = prototype['research_group'] or None
+            key = tuple(prototype[column] for column in columns)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def stats(self, **params):
+        response = self.client.get('/api/stats/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def as_counts(self, results, by):
+        return {tuple(row[dimension] for dimension in by): row['count'] for row in results}
+
+    def test_breakdowns_match_group_by(self):
+        for by in [[], ['department'], ['research_group', 'status'], list(prototype_stats.DIMENSIONS)]:
+            self.assertEqual(self.as_counts(self.stats(by=','.join(by)), by), self.expected(by))
+        self.assertEqual(
+            self.as_counts(self.stats(by='department', academic_year='2024/2025', has_physical_prototype='true'), ['department']),
+            self.expected(['department'], academic_year='2024/2025', has_physical_prototype=True),
+        )
+        self.assertEqual(self.stats(by='department', research_group=''), [{'department': 'MA', 'count': 2}])
+        with self.assertNumQueries(1):
+            self.client.get('/api/stats/', {'by': 'status', 'department': 'CS'})
+
+    def test_saves_and_deletes_move_the_counts(self):
+        prototype = Prototype.objects.filter(status='submitted_not_reviewed').first()
+        prototype.status = 'submitted_reviewed'
+        prototype.save(update_fields=['status'])
+        Prototype.objects.filter(research_group='cyber').first().delete()
+        prototype.title = 'Renamed'
+        prototype.save(update_fields=['title'])
+
+        by = ['department', 'research_group', 'status']
+        self.assertEqual(self.as_counts(self.stats(by=','.join(by)), by), self.expected(by))
+        rows = {stat.key: stat.count for stat in PrototypeStat.objects.filter(count__gt=0)}
+        prototype_stats.rebuild()
+        self.assertEqual({stat.key: stat.count for stat in PrototypeStat.objects.all()}, rows)
+
+    def test_counts_follow_the_stored_row_not_the_loaded_instance(self):
+        prototype = Prototype.objects.filter(status='submitted_not_reviewed').first()
+        stale = Prototype.objects.get(pk=prototype.pk)
+        prototype.status = 'submitted_reviewed'
+        prototype.save()
+        stale.delete()  # loaded before the status change
+
+        by = ['status']
+        self.assertEqual(self.as_counts(self.stats(by='status'), by), self.expected(by))
+
+    def test_saves_run_in_one_transaction_with_their_signals(self):
+        prototype = Prototype.objects.first()
+        with mock.patch('prototypes.signals.prototype_stats.apply') as apply, \
+                mock.patch('prototypes.models.transaction.atomic', wraps=transaction.atomic) as atomic:
+            prototype.status = 'submitted_reviewed'
+            prototype.save()
+        atomic.assert_called_once_with()
+        apply.assert_called_once()
+
+    def test_unknown_dimensions_are_rejected(self):
+        self.assertEqual(self.client.get('/api/stats/', {'by': 'title'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/stats/', {'has_physical_prototype': 'maybe'}).status_code, 400)
@@ -0,0 +1,26 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPThrottle(SimpleRateThrottle):
+    """Login attempts per client address (NUM_PROXIES tells how many proxies to look behind)"""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(SimpleRateThrottle):
+    """Login attempts per account, whatever address they come from"""
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+LOGIN_THROTTLES = [LoginIPThrottle, LoginEmailThrottle]
@@ -1,12 +1,13 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import PrototypeViewSet, user_profile
 from .api_views import register_user, login_user
+from . import async_views
 from .views import (
     UserViewSet, PrototypeViewSet,
-    DepartmentViewSet, AdminUserViewSet,
+    DepartmentViewSet, AdminUserViewSet, ExportJobViewSet, UserImportJobViewSet, UploadSessionViewSet,
     change_password,
-    prototype_count_view, upload_summary_30_days,
+    prototype_count_view, upload_summary_30_days, submission_statistics, status_breakdown, prototype_statistics,
     UserImportTemplateView, BulkUserImportView
 )
 
@@ -16,6 +17,9 @@ router.register(r'prototypes', PrototypeViewSet, basename="prototype")
 router.register(r'users', UserViewSet) 
 router.register(r'departments', DepartmentViewSet) 
 router.register('admin/users', AdminUserViewSet, basename='admin-users')
+router.register(r'exports', ExportJobViewSet, basename='export-job')
+router.register(r'uploads', UploadSessionViewSet, basename='upload-session')
+router.register('admin/user-imports', UserImportJobViewSet, basename='user-import-job')
 
 
 urlpatterns = [
@@ -26,7 +30,19 @@ urlpatterns = [
     path("user/change-password/", change_password, name="change-password"),
     path("count/", prototype_count_view, name="prototype-count"),
     path("30-day-summary/", upload_summary_30_days, name='upload-summary-30-days'),
+    path("stats/", prototype_statistics, name='prototype-statistics'),
+    path("stats/submissions/", submission_statistics, name='submission-statistics'),
+    path("stats/breakdown/", status_breakdown, name='status-breakdown'),
     path('admin/download_users_template/', UserImportTemplateView.as_view(), name='user-import-template'),
     path('admin/users_import/', BulkUserImportView.as_view(), name='bulk-user-import'),
+
+    # Async variants of the hot read endpoints, for ASGI deployments (see async_views.py)
+    path('async/prototypes/', async_views.prototype_list, name='async-prototype-list'),
+    path('async/prototypes/storage_locations/', async_views.storage_locations, name='async-storage-locations'),
+    path('async/prototypes/<int:pk>/', async_views.prototype_detail, name='async-prototype-detail'),
+    re_path(r'^async/prototypes/(?P<pk>\d+)/download/(?P<kind>report|source_code)/$', async_views.prototype_download,
+            name='async-prototype-download'),
+    path('async/count/', async_views.prototype_count, name='async-prototype-count'),
+    path('async/user/profile/', async_views.user_profile, name='async-user-profile'),
 ]
 
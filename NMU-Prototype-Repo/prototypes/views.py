@@ -1,31 +1,55 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Case, When, Value, IntegerField
-from rest_framework import viewsets,  filters
+from rest_framework import viewsets,  filters, mixins
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 import openpyxl
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse
 from weasyprint import HTML
 from django.template.loader import render_to_string
-from .permissions import IsPrototypeOwner, IsAdmin, IsStaff, IsStudent, IsOwnerOrReadOnly, IsReviewer
+from .permissions import IsPrototypeOwner, IsAdmin, IsStaff, IsStudent, IsOwnerOrReadOnly, IsReviewer, CanDownloadAttachment
 from .serializers import (
     UserSerializer, PrototypeSerializer, PrototypeAttachmentSerializer, 
-    DepartmentSerializer, PrototypeReviewSerializer,  
+    DepartmentSerializer, PrototypeReviewSerializer, ExportJobSerializer,
+    UserImportJobSerializer, UploadSessionSerializer, PrototypeSummarySerializer,
+)
+from .models import CustomUser, Prototype, PrototypeAttachment, Department, ExportJob, UserImportJob, UploadSession
+from .pagination import PrototypeCursorPagination, UserCursorPagination, SearchPagination
+from .filters import PrototypeFilter
+from .services.report_service import render_prototypes_pdf
+from .services.user_import import map_columns, import_users
+from .services.statistics import (
+    submission_counts, department_status_breakdown,
+    WINDOWS as STATISTICS_WINDOWS, GROUPINGS as STATISTICS_GROUPINGS,
+)
+from .services.stats_cache import cached_stat
+from .services import prototype_stats
+from .services.search import search_prototypes
+from .services.barcode_services import render_label_sheet, lookup_cache_key, LABELS_PER_PAGE
+from .services.file_delivery import serve_file, serve_stored_file
+from .services.previews import preview_name
+from .services.versions import (
+    conditional, prototype_etag, prototype_last_modified, prototype_list_etag,
+    prototype_list_last_modified, storage_locations_etag, storage_locations_last_modified, department_list_etag,
 )
-from .models import CustomUser, Prototype, PrototypeAttachment, Department
+from django.core.files.storage import default_storage
+from .services.chunked_upload import UploadError, ChunkConflict, store_chunk, assemble, complete_from_existing, discard, session_expiry
+from django.core.cache import cache
+from django_q.tasks import async_task
 import logging
 from django.db.models import Q
 from django.contrib.auth import update_session_auth_hash
 logger = logging.getLogger(__name__)
 User = get_user_model()
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.parsers import JSONParser
+from .parsers import FastJSONParser
+from .routers import reads_from_replica
 from django.db.models.functions import TruncMonth
 from django.db.models import Count
 from datetime import datetime
 from django.utils import timezone
+from django.conf import settings
 from datetime import timedelta
 from collections import defaultdict
 from .serializers import GeneralUserRegistrationSerializer
@@ -49,6 +73,9 @@ from openpyxl.worksheet.datavalidation import DataValidation
 from rest_framework import status
 from django.core.validators import RegexValidator
 import re
+import os
+from django.utils.text import slugify
+import tempfile
 
 class GeneralUserRegistrationView(generics.CreateAPIView):
     serializer_class = GeneralUserRegistrationSerializer
@@ -106,6 +133,7 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -120,15 +148,21 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({"error": "You are not allowed to modify this list."}, status=status.HTTP_403_FORBIDDEN)
 
         students = User.objects.filter(role="student")
-        serializer = self.get_serializer(students, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(students)
+        if page is None:
+            return Response(self.get_serializer(students, many=True).data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=["GET"], permission_classes=[IsAuthenticated])
     def supervisors(self, request):
         """Retrieve all staff members who act as supervisors"""
         supervisors = User.objects.filter(Q(role="staff") | Q(role="admin"))
-        serializer = self.get_serializer(supervisors, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(supervisors)
+        if page is None:
+            return Response(self.get_serializer(supervisors, many=True).data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 class PrototypeViewSet(viewsets.ModelViewSet):
     """Manage prototypes and provide role-based filtering"""
@@ -139,38 +173,78 @@ class PrototypeViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'barcode', 'storage_location']
     ordering_fields = ['submission_date']
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = PrototypeCursorPagination
+
+    # Relations each action serializes, so list pages run a fixed number of queries
+    # instead of one per row for student/department/reviewer/supervisors/attachment.
+    # Actions not listed here use DEFAULT_QUERY_PLAN.
+    DEFAULT_QUERY_PLAN = {
+        'select_related': ('student', 'department', 'reviewer', 'attachment__metadata'),
+        'prefetch_related': ('supervisors',),
+    }
+    QUERY_PLANS = {
+        'storage_locations': {'select_related': (), 'prefetch_related': ()},
+        'export_excel': {'select_related': (), 'prefetch_related': ()},
+        'export_pdf': {'select_related': (), 'prefetch_related': ()},
+        'review_prototype': {'select_related': ('department',), 'prefetch_related': ()},
+        'download': {'select_related': ('attachment',), 'prefetch_related': ()},
+        'preview': {'select_related': ('attachment__metadata',), 'prefetch_related': ()},
+    }
+
+    # Sparse lists read flat columns with .values(), the joins come from the lookups themselves
+    VALUES_QUERY_PLAN = {'select_related': (), 'prefetch_related': ()}
+
+    def get_query_plan(self):
+        if getattr(self, 'sparse_fields', None):
+            return self.VALUES_QUERY_PLAN
+        return self.QUERY_PLANS.get(self.action, self.DEFAULT_QUERY_PLAN)
+
+    def plan_queryset(self, queryset):
+        """Apply the select_related/prefetch_related plan for the current action"""
+        plan = self.get_query_plan()
+        if plan['select_related']:
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan['prefetch_related']:
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        return queryset
 
     def get_queryset(self):
-        """Ensure students see their own prototypes first"""
-        user = self.request.user
-        queryset = Prototype.objects.all()
-
-        if user.role == "student":
-            return queryset.annotate(
-                priority=Case(
-                    When(student=user, then=Value(0)), 
-                    default=Value(1),
-                    output_field=IntegerField(),
-                )
-            ).order_by("priority", "-submission_date")
-
-        elif user.role == "staff":
-            return queryset  
-
-        return queryset         # Admin and staff can see all prototypes
+        """Every role sees all prototypes, lists are ordered by PrototypeCursorPagination (newest first)"""
+        return self.plan_queryset(Prototype.objects.all())
+
+    # Polling clients get 304 Not Modified while nothing they can see has changed
+    @reads_from_replica
+    @conditional(prototype_list_etag, prototype_list_last_modified)
+    def list(self, request, *args, **kwargs):
+        """Full prototypes, or flat rows with ?view=summary / ?fields=, see PrototypeSummarySerializer"""
+        self.sparse_fields = PrototypeSummarySerializer.requested_fields(request.query_params)
+        if not self.sparse_fields:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # The cursor is built from the ordering columns, so they are always fetched
+        ordering = [field.lstrip('-') for field in self.paginator.ordering]
+        rows = queryset.values(*PrototypeSummarySerializer.lookups(self.sparse_fields, extra=ordering))
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(PrototypeSummarySerializer(page, self.sparse_fields).data)
+
+    @conditional(prototype_etag, prototype_last_modified)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated])
     def all_prototypes(self, request):
         """Return all prototypes for staff & admin."""
         if request.user.role in ['staff', 'admin']:
-            prototypes = Prototype.objects.all()
+            prototypes = self.plan_queryset(Prototype.objects.all())
         else:
             return Response({"error": "Unauthorized access."}, status=403)
 
-        serializer = PrototypeSerializer(prototypes, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(prototypes)
+        serializer = PrototypeSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-    @action(detail=True, methods=['POST'], parser_classes=[JSONParser])
+    @action(detail=True, methods=['POST'], parser_classes=[FastJSONParser])
     def assign_storage(self, request, pk=None):
         """Allow admins to assign a storage location"""
         user = request.user
@@ -194,7 +268,7 @@ class PrototypeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-    @action(detail=True, methods=['POST'], permission_classes=[IsAuthenticated], parser_classes=[JSONParser])
+    @action(detail=True, methods=['POST'], permission_classes=[IsAuthenticated], parser_classes=[FastJSONParser])
     def review_prototype(self, request, pk=None):
         """Staff and Admin can review a specific prototype (approval and feedback)."""
         user = request.user
@@ -227,34 +301,168 @@ class PrototypeViewSet(viewsets.ModelViewSet):
 
         return Response({"message": "Prototype reviewed and approved successfully."}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['GET'])
+    @reads_from_replica
+    def search(self, request):
+        """Ranked full-text search over title, abstract, student and supervisor names (?q=)"""
+        terms = request.query_params.get('q', '').strip()
+        if not terms:
+            return Response({"error": "Search query (q) is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search_prototypes(terms, hydrate=self.plan_queryset)
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    BARCODE_CACHE_TTL = 60 * 60
+    MAX_LABELS = 480
+
+    @action(detail=False, methods=['GET'], url_path=r'by-barcode/(?P<code>[^/]+)')
+    def by_barcode(self, request, code=None):
+        """Compact lookup of a scanned barcode for handheld scanners"""
+        key = lookup_cache_key(code)
+        data = cache.get(key)
+        if data is None:
+            data = (
+                Prototype.objects
+                .filter(barcode=code)
+                .values('id', 'title', 'barcode', 'storage_location', 'has_physical_prototype',
+                        'status', 'academic_year', 'department__code', 'student__full_name')
+                .first()
+            )
+            if data is None:
+                return Response({"error": "No prototype with this barcode."}, status=status.HTTP_404_NOT_FOUND)
+            cache.set(key, data, self.BARCODE_CACHE_TTL)
+        return Response(data)
+
+    @action(detail=False, methods=['GET'])
+    def labels(self, request):
+        """
+        Barcode label sheet for prototypes with a barcode, as a multi-page PDF (default) or as
+        a PNG of one page (?output=png&page=). Select prototypes with ?ids=1,2,3 or with the
+        PrototypeFilter parameters.
+        """
+        if request.user.role not in ['staff', 'admin']:
+            return Response({"error": "Only staff and admins can print labels."}, status=status.HTTP_403_FORBIDDEN)
+
+        queryset = Prototype.objects.exclude(barcode__isnull=True).exclude(barcode='').only('id', 'title', 'barcode')
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                queryset = queryset.filter(pk__in=[int(pk) for pk in ids.split(',')])
+            except ValueError:
+                return Response({"error": "ids must be a comma separated list of prototype ids."}, status=status.HTTP_400_BAD_REQUEST)
+        filterset = PrototypeFilter(request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = filterset.qs.order_by('barcode')
+
+        file_format = request.query_params.get('output', 'pdf')
+        if file_format == 'png':
+            try:
+                page = max(int(request.query_params.get('page', 1)), 1)
+            except ValueError:
+                page = 1
+            start = (page - 1) * LABELS_PER_PAGE
+            prototypes = list(queryset[start:start + LABELS_PER_PAGE])
+            content_type = "image/png"
+        elif file_format == 'pdf':
+            prototypes = list(queryset[:self.MAX_LABELS + 1])
+            if len(prototypes) > self.MAX_LABELS:
+                return Response({"error": f"At most {self.MAX_LABELS} labels per sheet, narrow the selection."}, status=status.HTTP_400_BAD_REQUEST)
+            content_type = "application/pdf"
+        else:
+            return Response({"error": "output must be pdf or png."}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = HttpResponse(render_label_sheet(prototypes, file_format), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="prototype_labels.{file_format}"'
+        return response
+
+    @action(detail=True, methods=['GET'], permission_classes=[CanDownloadAttachment],
+            url_path=r'download/(?P<kind>report|source_code)')
+    def download(self, request, pk=None, kind=None):
+        """
+        Download the report PDF or source code ZIP. Supports Range requests (resuming large ZIPs)
+        and conditional GET, see services/file_delivery.py.
+        """
+        prototype = self.get_object()
+        attachment = getattr(prototype, 'attachment', None)
+        field_file = getattr(attachment, kind, None)
+        if not field_file or not field_file.storage.exists(field_file.name):
+            return Response({"error": "This prototype has no such file."}, status=status.HTTP_404_NOT_FOUND)
+        # Stored names are content hashes, name the download after the prototype instead
+        extension = os.path.splitext(field_file.name)[1]
+        return serve_file(request, field_file, filename=f'{slugify(prototype.title) or prototype.pk}_{kind}{extension}')
+
+    # Preview URLs carry the report hash (?v=), so a matching response never changes
+    PREVIEW_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+    @action(detail=True, methods=['GET'], url_path=r'preview/(?P<size>small|large)')
+    def preview(self, request, pk=None, size=None):
+        """First-page image of the report, rendered in the background by tasks.process_attachment"""
+        prototype = self.get_object()
+        metadata = getattr(getattr(prototype, 'attachment', None), 'metadata', None)
+        digest = metadata.preview_digest if metadata else ''
+        name = digest and preview_name(digest, size, metadata.preview_format)
+        if not digest or not default_storage.exists(name):
+            return Response({"error": "No preview is available yet."}, status=status.HTTP_404_NOT_FOUND)
+
+        cache_control = self.PREVIEW_CACHE_CONTROL if request.query_params.get('v') == digest else 'private, no-cache'
+        return serve_stored_file(
+            request, default_storage, name,
+            as_attachment=False, cache_control=cache_control,
+        )
+
     @action(detail=False, methods=["GET"])
+    @conditional(storage_locations_etag, storage_locations_last_modified)
     def storage_locations(self, request):
         """Retrieve all unique storage locations"""
         locations = Prototype.objects.exclude(storage_location__isnull=True).exclude(storage_location="").values_list("storage_location", flat=True).distinct()
 
         return Response(list(locations))
 
+    EXPORT_CHUNK_SIZE = 2000
+
     @action(detail=False, methods=['GET'])
     def export_excel(self, request):
-        """Export prototypes as an Excel file"""
-        wb = openpyxl.Workbook()
-        ws = wb.active
+        """
+        Export prototypes as an Excel file.
+        Accepts the list endpoint's search and ordering parameters plus the PrototypeFilter
+        ones. Rows are read in chunks into a write-only workbook saved to a temporary file,
+        and the finished file is returned as a FileResponse, so memory stays flat no matter
+        how large the archive is.
+        """
+        filterset = PrototypeFilter(request.query_params, queryset=self.filter_queryset(self.get_queryset()), request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        rows = filterset.qs.values_list(
+            'id', 'title', 'barcode', 'storage_location', 'has_physical_prototype'
+        )
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Prototypes")
         ws.append(["ID", "Title", "Barcode", "Storage Location", "Has Physical Prototype"])
+        for row in rows.iterator(chunk_size=self.EXPORT_CHUNK_SIZE):
+            ws.append(list(row))
 
-        for proto in Prototype.objects.all():
-            ws.append([proto.id, proto.title, proto.barcode, proto.storage_location, proto.has_physical_prototype])
+        # FileResponse streams the file in blocks and closes (and so deletes) it when done
+        export_file = tempfile.TemporaryFile()
+        wb.save(export_file)
+        export_file.seek(0)
 
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="prototypes.xlsx"'
-        wb.save(response)
-        return response
+        return FileResponse(
+            export_file,
+            as_attachment=True,
+            filename="prototypes.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
 
     @action(detail=False, methods=['GET'])
     def export_pdf(self, request):
-        """Export prototypes as a PDF file"""
+        """Export prototypes as a PDF file (small archives, large ones should use /api/exports/)"""
         prototypes = Prototype.objects.all()
-        html_content = render_to_string("export_template.html", {"prototypes": prototypes})
-        pdf_file = HTML(string=html_content).write_pdf()
+        pdf_file = render_prototypes_pdf(prototypes)
 
         response = HttpResponse(pdf_file, content_type="application/pdf")
         response["Content-Disposition"] = 'attachment; filename="prototypes.pdf"'
@@ -268,12 +476,115 @@ class PrototypeViewSet(viewsets.ModelViewSet):
     
 
 
+class ExportJobViewSet(viewsets.ModelViewSet):
+    """
+    Queue PDF exports and per-prototype reports for the django-q cluster.
+    POST to enqueue, GET to poll status, GET <id>/download/ once status is 'done'.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post']
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+    def perform_create(self, serializer):
+        job = serializer.save(requested_by=self.request.user)
+        async_task('prototypes.tasks.run_export_job', job.pk, task_name=f'export-{job.pk}')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['GET'])
+    def download(self, request, pk=None):
+        """Download the finished export file"""
+        job = self.get_object()
+        if job.status != 'done' or not job.file:
+            return Response({"error": f"Export is not ready (status: {job.status})."}, status=status.HTTP_409_CONFLICT)
+
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=f"{job.kind}.pdf", content_type="application/pdf")
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked upload of a source code archive.
+    POST {filename, size, chunk_size?, sha256?, prototype?} to open a session (its status is
+    already 'complete' or 'attached' if an archive with that sha256 is stored), PUT the raw
+    bytes of each chunk to <id>/chunks/<index>/ (optional X-Chunk-SHA256 header), GET <id>/
+    to see which chunks arrived, then POST <id>/finalize/. With a prototype the archive
+    replaces its source code, otherwise pass the session id as attachment.source_code_upload
+    when creating the prototype.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [FastJSONParser]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user).prefetch_related('chunks')
+
+    def perform_create(self, serializer):
+        session = serializer.save(owner=self.request.user, expires_at=session_expiry())
+        # A declared sha256 matching a stored archive completes the session straight away
+        complete_from_existing(session)
+
+    def perform_destroy(self, instance):
+        discard(instance)
+
+    def get_open_session(self):
+        session = self.get_object()
+        if session.expires_at < timezone.now():
+            return None, Response({"error": "Upload session has expired."}, status=status.HTTP_410_GONE)
+        if session.status != 'open':
+            return None, Response({"error": f"Upload session is {session.status}."}, status=status.HTTP_409_CONFLICT)
+        return session, None
+
+    @action(detail=True, methods=['PUT'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        """Store one chunk, read from the request body without buffering it in memory"""
+        session, error = self.get_open_session()
+        if error:
+            return error
+        try:
+            chunk = store_chunk(session, int(index), request, request.headers.get('X-Chunk-SHA256'))
+        except ChunkConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'index': chunk.index, 'size': chunk.size, 'sha256': chunk.sha256})
+
+    @action(detail=True, methods=['POST'])
+    def finalize(self, request, pk=None):
+        with transaction.atomic():
+            session, error = self.get_open_session()
+            if error:
+                return error
+            # Lock the session so concurrent finalize calls assemble it only once
+            session = UploadSession.objects.select_for_update().select_related('prototype__attachment').get(pk=session.pk)
+            if session.status != 'open':
+                return Response({"error": f"Upload session is {session.status}."}, status=status.HTTP_409_CONFLICT)
+            try:
+                assemble(session)
+            except UploadError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            session.expires_at = session_expiry()
+            session.save(update_fields=['expires_at'])
+        return Response(self.get_serializer(session).data)
+
+
 class DepartmentViewSet(viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post']
 
+    @conditional(department_list_etag)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 
 
@@ -302,12 +613,13 @@ def change_password(request):
 
 
 @api_view(['GET'])
+@reads_from_replica
 def prototype_count_view(request):
     user = request.user
-    available_count = Prototype.objects.count()
+    available_count = cached_stat('count', Prototype.objects.count)
     
     if user.role == 'student':
-        user_count = Prototype.objects.filter(student=user).count()
+        user_count = cached_stat('count', Prototype.objects.filter(student=user).count, 'student', user.pk)
     else:
         # admin or staff can see all
         user_count = available_count
@@ -318,35 +630,82 @@ def prototype_count_view(request):
     })
 
 @api_view(['GET'])
+@reads_from_replica
 def upload_summary_30_days(request):
-    today = timezone.now()  # aware datetime
-    start_date = today - timedelta(days=30)
+    """Uploads per weekday over the last 30 days, counted by the database"""
+    rows = cached_stat('submissions', lambda: submission_counts(window_days=30, group_by='weekday'), 30, 'weekday')
+    data = [{"day": row["bucket"], "uploads": row["uploads"]} for row in rows]
+    return Response(data)
 
-    # Only use timezone-aware filtering
-    prototypes = Prototype.objects.filter(submission_date__gte=start_date)
 
-    # Initialize day counts
-    days_of_week = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    upload_counts = defaultdict(int)
+@api_view(['GET'])
+@reads_from_replica
+def submission_statistics(request):
+    """
+    Submission counts over a window of 7, 30 or 365 days (?window=),
+    grouped by day, week, month, weekday, department or research_group (?group_by=).
+    """
+    try:
+        window = int(request.query_params.get('window', 30))
+    except ValueError:
+        window = None
+    group_by = request.query_params.get('group_by', 'day')
+
+    if window not in STATISTICS_WINDOWS:
+        return Response({"error": f"window must be one of {', '.join(map(str, STATISTICS_WINDOWS))}."}, status=status.HTTP_400_BAD_REQUEST)
+    if group_by not in STATISTICS_GROUPINGS:
+        return Response({"error": f"group_by must be one of {', '.join(STATISTICS_GROUPINGS)}."}, status=status.HTTP_400_BAD_REQUEST)
 
-    for prototype in prototypes:
-        # Make sure submission_date is timezone-aware
-        submission_date = prototype.submission_date
-        if timezone.is_naive(submission_date):
-            submission_date = timezone.make_aware(submission_date)
-        weekday = submission_date.strftime('%a')  # 'Mon', 'Tue', ...
-        upload_counts[weekday] += 1
+    return Response({
+        "window": window,
+        "group_by": group_by,
+        "results": cached_stat('submissions', lambda: submission_counts(window_days=window, group_by=group_by), window, group_by),
+    })
 
-    # Ensure all 7 days are present
-    data = [{"day": day, "uploads": upload_counts.get(day, 0)} for day in days_of_week]
 
-    return Response(data)
+@api_view(['GET'])
+@reads_from_replica
+def status_breakdown(request):
+    """Prototype counts per department and status"""
+    return Response(cached_stat('breakdown', department_status_breakdown))
+
+
+@api_view(['GET'])
+@reads_from_replica
+def prototype_statistics(request):
+    """
+    Prototype counts broken down by any of department, research_group, academic_year, status
+    and has_physical_prototype (?by=department,status), counting only prototypes that match
+    the other parameters (?academic_year=2024/2025&has_physical_prototype=true). Read from the
+    materialized PrototypeStat rows, see services/prototype_stats.py.
+    """
+    dimensions = prototype_stats.DIMENSIONS
+    by = [dimension for dimension in request.query_params.get('by', '').split(',') if dimension]
+    unknown = [dimension for dimension in by if dimension not in dimensions]
+    if unknown or len(set(by)) != len(by):
+        return Response({"error": f"by must list distinct dimensions out of {', '.join(dimensions)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {dimension: request.query_params[dimension] for dimension in dimensions if dimension in request.query_params}
+    if 'has_physical_prototype' in filters:
+        value = filters['has_physical_prototype'].lower()
+        if value not in ('true', 'false'):
+            return Response({"error": "has_physical_prototype must be true or false."}, status=status.HTTP_400_BAD_REQUEST)
+        filters['has_physical_prototype'] = value == 'true'
+    if filters.get('research_group') == '':
+        filters['research_group'] = None  # prototypes without a research group
+
+    return Response({
+        "by": by,
+        "filters": filters,
+        "results": prototype_stats.breakdown(by, filters),
+    })
 
 
 class AdminUserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
         # Optional: Filter out superuser accounts from view
@@ -355,8 +714,11 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def general_users(self, request):
         general_users = CustomUser.objects.filter(role='general_user')
-        serializer = self.get_serializer(general_users, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(general_users)
+        if page is None:
+            return Response(self.get_serializer(general_users, many=True).data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def approve_user(self, request, pk=None):
@@ -507,7 +869,6 @@ class BulkUserImportView(APIView):
     permission_classes = [IsAdminUser]
     parser_classes = [MultiPartParser]
 
-    @transaction.atomic
     def post(self, request):
         try:
             if 'excel_file' not in request.FILES:
@@ -521,27 +882,7 @@ class BulkUserImportView(APIView):
             except Exception as e:
                 return Response({'error': f'Invalid Excel file: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
-            expected_columns = {
-                'email': ['email', 'e-mail', 'email_address'],
-                'full_name': ['full_name', 'name', 'fullname'],
-                'role': ['role', 'user_role', 'account_type'],
-                'phone': ['phone', 'phone_number', 'mobile'],
-                'department_code': ['department_code', 'dept_code', 'department'],
-                'institution_id': ['institution_id', 'id_number', 'student_id'],
-                'level': ['level', 'student_level', 'degree_level']
-            }
-
-            column_mapping = {}
-            missing_columns = []
-
-            for expected, alternatives in expected_columns.items():
-                for alt in alternatives:
-                    if alt in df.columns:
-                        column_mapping[expected] = alt
-                        break
-                else:
-                    if expected in ['email', 'full_name', 'role', 'phone']:
-                        missing_columns.append(expected)
+            column_mapping, missing_columns = map_columns(df.columns)
 
             if missing_columns:
                 return Response(
@@ -549,92 +890,7 @@ class BulkUserImportView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            success_count = 0
-            errors = []
-            valid_roles = ['admin', 'staff', 'student']
-            valid_levels = ['phd', 'masters']
-            phone_validator = RegexValidator(regex=r'^\+?[0-9]{10,15}$', message='Invalid phone number format')
-
-            for index, row in df.iterrows():
-                row_num = index + 2
-                try:
-                    email = row[column_mapping['email']]
-                    full_name = row[column_mapping['full_name']]
-                    role = row[column_mapping['role']].strip().lower() if pd.notna(row[column_mapping['role']]) else None
-                    phone = row[column_mapping['phone']]
-
-                    # Required field validation
-                    if pd.isna(email):
-                        raise ValidationError('Email is required')
-                    if pd.isna(full_name):
-                        raise ValidationError('Full name is required')
-                    if pd.isna(role):
-                        raise ValidationError('Role is required')
-                    if pd.isna(phone):
-                        raise ValidationError('Phone is required')
-
-                    if role not in valid_roles:
-                        raise ValidationError(f'Invalid role: {role}. Must be admin, staff, or student')
-
-                    # Phone validation
-                    phone_str = str(phone).strip()
-                    phone_validator(phone_str)
-
-                    # Department (optional)
-                    department = None
-                    if 'department_code' in column_mapping and pd.notna(row[column_mapping['department_code']]):
-                        try:
-                            department = Department.objects.get(code=row[column_mapping['department_code']])
-                        except Department.DoesNotExist:
-                            raise ValidationError(f'Department not found: {row[column_mapping["department_code"]]}')
-
-                    institution_id = row[column_mapping['institution_id']] if 'institution_id' in column_mapping else ''
-
-                    # Validate level if student
-                    level = None
-                    if role == 'student':
-                        if 'level' not in column_mapping or pd.isna(row[column_mapping['level']]):
-                            raise ValidationError('Students require level (phd/masters)')
-                        level = row[column_mapping['level']].strip().lower()
-                        if level not in valid_levels:
-                            raise ValidationError(f'Invalid level: {level}. Must be phd or masters')
-
-                    if CustomUser.objects.filter(email=email).exists():
-                        raise ValidationError('User with this email already exists')
-
-                    # Generate username from full_name
-                    base_username = re.sub(r'\s+', '', full_name.lower())
-                    username = base_username
-                    counter = 1
-                    while CustomUser.objects.filter(username=username).exists():
-                        username = f"{base_username}{counter}"
-                        counter += 1
-
-                    user = CustomUser(
-                        email=email,
-                        username=username,
-                        full_name=full_name.strip(),
-                        role=role,
-                        phone=phone_str,
-                        department=department,
-                        institution_id=institution_id,
-                        is_approved=True,
-                        level=level if role == 'student' else None,
-                         is_staff=(role == 'admin')
-
-                    )
-                    user.set_password(email)
-                    user.save()
-
-                    success_count += 1
-
-                except Exception as e:
-                    errors.append({
-                        'row': row_num,
-                        'error': str(e),
-                        'data': {k: v for k, v in row.items() if pd.notna(v)}
-                    })
-                    continue
+            success_count, errors = import_users(df, column_mapping)
 
             response_data = {
                 'success_count': success_count,
@@ -650,3 +906,44 @@ class BulkUserImportView(APIView):
                 {'error': 'Internal server error during import'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class UserImportJobViewSet(viewsets.ModelViewSet):
+    """
+    Chunked bulk user import for large sheets (same template as UserImportTemplateView).
+    POST an .xlsx/.csv as 'file' (optional 'chunk_size') to start, GET to follow progress,
+    POST <id>/resume/ to continue a failed or interrupted import from its last committed chunk.
+    """
+    serializer_class = UserImportJobSerializer
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FastJSONParser]
+    http_method_names = ['get', 'post']
+
+    def get_queryset(self):
+        return UserImportJob.objects.all()
+
+    def enqueue(self, job):
+        async_task('prototypes.tasks.run_user_import_job', job.pk, task_name=f'user-import-{job.pk}')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(created_by=request.user)
+        self.enqueue(job)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['POST'])
+    def resume(self, request, pk=None):
+        job = self.get_object()
+        # A job still marked running with no progress for longer than a task timeout was interrupted.
+        # Done jobs, queued ones (their task is waiting) and live running ones are left alone.
+        stale_before = timezone.now() - timedelta(seconds=settings.Q_CLUSTER['timeout'])
+        resumable = Q(status='failed') | Q(status='running', updated_at__lte=stale_before)
+        # Requeued only if the status is still resumable, so of two concurrent resumes one enqueues
+        if not UserImportJob.objects.filter(resumable, pk=job.pk).update(status='queued', updated_at=timezone.now()):
+            job.refresh_from_db(fields=['status'])
+            return Response({'error': f'Import cannot be resumed (status: {job.status}).'}, status=status.HTTP_409_CONFLICT)
+
+        job.refresh_from_db()
+        self.enqueue(job)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
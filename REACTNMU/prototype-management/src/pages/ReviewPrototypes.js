@@ -23,8 +23,9 @@ const ReviewPrototypes = () => {
   const [error, setError] = useState(null);
   const [departmentFilter, setDepartmentFilter] = useState('');
   const [departments, setDepartments] = useState([]);
-  const [currentPage, setCurrentPage] = useState(1);
-  const [totalItems, setTotalItems] = useState(0);
+  // The list is cursor-paginated: a page is fetched by the cursor of the previous/next link
+  const [cursor, setCursor] = useState(null);
+  const [pageLinks, setPageLinks] = useState({ next: null, previous: null });
   const [showViewModal, setShowViewModal] = useState(false);
   const [selectedPrototypeIdForView, setSelectedPrototypeIdForView] = useState(null);
   const [showEditModal, setShowEditModal] = useState(false);
@@ -37,86 +38,19 @@ const ReviewPrototypes = () => {
   const [storageFilter, setStorageFilter] = useState("");
 
   // Classic Pagination Component (added to the same file)
-  const ClassicPagination = ({ currentPage, totalPages, onPageChange }) => {
-    const getPageNumbers = () => {
-      const pages = [];
-      const maxVisiblePages = 3;
-      
-      if (totalPages <= maxVisiblePages) {
-        for (let i = 1; i <= totalPages; i++) {
-          pages.push(i);
-        }
-      } else {
-        // Always show first page
-        pages.push(1);
-        
-        // Show current page and surrounding pages
-        let start = Math.max(2, currentPage - 1);
-        let end = Math.min(totalPages - 1, currentPage + 1);
-        
-        if (currentPage <= 3) {
-          end = 4;
-        } else if (currentPage >= totalPages - 2) {
-          start = totalPages - 3;
-        }
-        
-        // Add ellipsis if needed
-        if (start > 2) {
-          pages.push('...');
-        }
-        
-        // Add middle pages
-        for (let i = start; i <= end; i++) {
-          pages.push(i);
-        }
-        
-        // Add ellipsis if needed
-        if (end < totalPages - 1) {
-          pages.push('...');
-        }
-        
-        // Always show last page
-        pages.push(totalPages);
-      }
-      
-      return pages;
-    };
+  const ClassicPagination = ({ hasPrevious, hasNext, onPrevious, onNext }) => (
+    <div className="classic-pagination">
+      <button onClick={onPrevious} disabled={!hasPrevious} className="pagination-arrow">
+        &laquo;
+      </button>
+      <button onClick={onNext} disabled={!hasNext} className="pagination-arrow">
+        &raquo;
+      </button>
+    </div>
+  );
 
-    return (
-      <div className="classic-pagination">
-        <button 
-          onClick={() => onPageChange(currentPage - 1)} 
-          disabled={currentPage === 1}
-          className="pagination-arrow"
-        >
-          &laquo;
-        </button>
-        
-        {getPageNumbers().map((page, index) => (
-          <React.Fragment key={index}>
-            {page === '...' ? (
-              <span className="pagination-ellipsis">...</span>
-            ) : (
-              <button
-                onClick={() => onPageChange(page)}
-                className={currentPage === page ? 'active' : ''}
-              >
-                {page}
-              </button>
-            )}
-          </React.Fragment>
-        ))}
-        
-        <button 
-          onClick={() => onPageChange(currentPage + 1)} 
-          disabled={currentPage === totalPages}
-          className="pagination-arrow"
-        >
-          &raquo;
-        </button>
-      </div>
-    );
-  };
+  const cursorOf = (url) => (url ? new URL(url).searchParams.get('cursor') : null);
+  const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
 
   useEffect(() => {
     fetchUserProfile();
@@ -129,7 +63,11 @@ const ReviewPrototypes = () => {
       fetchPrototypes();
       fetchStorageLocations();
     }
-  }, [user, searchTerm, storageFilter, currentPage]);
+  }, [user, searchTerm, storageFilter, cursor]);
+
+  useEffect(() => {
+    setCursor(null);
+  }, [searchTerm, storageFilter]);
 
   const fetchUserProfile = async () => {
     try {
@@ -162,9 +100,10 @@ const ReviewPrototypes = () => {
   const fetchPrototypes = async () => {
     setLoading(true);
     try {
-      const response = await api.get(`prototypes/?search=${searchTerm}&storage_location=${storageFilter}&page=${currentPage}&page_size=10`);
+      const response = await api.get(`prototypes/?search=${searchTerm}&storage_location=${storageFilter}&page_size=${ITEMS_PER_PAGE}${cursorParam}`);
       const data = response.data;
-      const fetchedPrototypes = Array.isArray(data) ? data : data.results || [];
+      const fetchedPrototypes = data.results || [];
+      setPageLinks({ next: data.next, previous: data.previous });
 
       const studentPrototypes = fetchedPrototypes.filter(p => p.student && p.student.id === user.id);
       const otherPrototypes = fetchedPrototypes.filter(p => p.student && p.student.id !== user.id);
@@ -195,24 +134,24 @@ const ReviewPrototypes = () => {
       try {
         let response;
         if (user?.role === 'student') {
-          response = await api.get(`prototypes/?student=${user.id}&page=${currentPage}&page_size=${ITEMS_PER_PAGE}`);
+          response = await api.get(`prototypes/?page_size=${ITEMS_PER_PAGE}${cursorParam}`);
         } else if (user?.role === 'staff') {
-          response = await api.get(`prototypes/?department=${user.department?.id}&page=${currentPage}&page_size=${ITEMS_PER_PAGE}${departmentFilter ? `&department_filter=${departmentFilter}` : ''}`);
+          response = await api.get(`prototypes/?page_size=${ITEMS_PER_PAGE}${cursorParam}${departmentFilter ? `&department_filter=${departmentFilter}` : ''}`);
         } else if (user?.role === 'admin') {
-          response = await api.get(`prototypes/?page=${currentPage}&page_size=${ITEMS_PER_PAGE}${departmentFilter ? `&department_filter=${departmentFilter}` : ''}`);
+          response = await api.get(`prototypes/?page_size=${ITEMS_PER_PAGE}${cursorParam}${departmentFilter ? `&department_filter=${departmentFilter}` : ''}`);
         } else {
           setPrototypes([]);
-          setTotalItems(0);
+          setPageLinks({ next: null, previous: null });
           setLoading(false);
           return;
         }
-        setPrototypes(response.data.results || response.data || []);
-        setTotalItems(response.data.count || 0);
+        setPrototypes(response.data.results || []);
+        setPageLinks({ next: response.data.next, previous: response.data.previous });
       } catch (error) {
         console.error("Error fetching prototypes:", error);
         setError("Failed to load prototypes.");
         setPrototypes([]);
-        setTotalItems(0);
+        setPageLinks({ next: null, previous: null });
       } finally {
         setLoading(false);
       }
@@ -221,7 +160,7 @@ const ReviewPrototypes = () => {
     if (user) {
       fetchData();
     }
-  }, [user, currentPage, departmentFilter]);
+  }, [user, cursor, departmentFilter]);
 
   const getStudentName = (studentId) => {
     const student = students.find(s => s.id === studentId);
@@ -272,18 +211,16 @@ const ReviewPrototypes = () => {
     setSelectedPrototypeForAssignStorage(null);
   };
 
-  const handlePageChange = (pageNumber) => {
-    setCurrentPage(pageNumber);
+  const handlePageChange = (url) => {
+    setCursor(cursorOf(url));
   };
 
-  const totalPages = Math.ceil(totalItems / ITEMS_PER_PAGE);
-
   if (loading) return <p className="mt-5 text-center">Loading prototypes...</p>;
   if (error) return <p className="mt-5 text-center text-danger">{error}</p>;
 
   const handleDepartmentChange = (departmentId) => {
     setDepartmentFilter(departmentId);
-    setCurrentPage(1);
+    setCursor(null);
   };
 
   return (
@@ -404,12 +341,13 @@ const ReviewPrototypes = () => {
           />
 
           {/* Classic Pagination */}
-          {totalPages > 1 && (
+          {(pageLinks.next || pageLinks.previous) && (
             <div className="pagination-wrapper" style={{ marginTop: '2rem', display: 'flex', justifyContent: 'center' }}>
-              <ClassicPagination 
-                currentPage={currentPage}
-                totalPages={totalPages}
-                onPageChange={handlePageChange}
+              <ClassicPagination
+                hasPrevious={Boolean(pageLinks.previous)}
+                hasNext={Boolean(pageLinks.next)}
+                onPrevious={() => handlePageChange(pageLinks.previous)}
+                onNext={() => handlePageChange(pageLinks.next)}
               />
             </div>
           )}
@@ -18,6 +18,7 @@ const ViewAllPrototype =  ({ show, onHide, prototypeId })  => {
   const [user, setUser] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
   const [allPrototypes, setAllPrototypes] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [students, setStudents] = useState([]);
@@ -52,7 +53,8 @@ const ViewAllPrototype =  ({ show, onHide, prototypeId })  => {
     setError(null);
     try {
       const response = await api.get(`/prototypes/?search=${searchTerm}`);
-      setAllPrototypes(response.data.results || response.data || []);
+      setAllPrototypes(response.data.results || []);
+      setNextPage(response.data.next);
     } catch (error) {
       console.error("Error fetching prototypes:", error);
       setError("Failed to load prototypes.");
@@ -61,6 +63,17 @@ const ViewAllPrototype =  ({ show, onHide, prototypeId })  => {
     }
   };
 
+  // The list is cursor-paginated, each page links to the next one
+  const loadMorePrototypes = async () => {
+    try {
+      const response = await api.get(nextPage);
+      setAllPrototypes((current) => [...current, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error("Error fetching more prototypes:", error);
+    }
+  };
+
   // Fetch prototype details when one is selected
   const fetchPrototypeDetails = async (id) => {
     setLoading(true);
@@ -228,6 +241,13 @@ const ViewAllPrototype =  ({ show, onHide, prototypeId })  => {
               )}
             </div>
           )}
+          {!loading && !error && nextPage && (
+            <div className="text-center mt-4">
+              <button className="btn btn-outline-secondary" onClick={loadMorePrototypes}>
+                Load more
+              </button>
+            </div>
+          )}
         </div>
 
         {/* Prototype Detail Modal */}